@@ -1,13 +1,21 @@
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 
+from celery import states
 from celery.result import AsyncResult
 from sqlalchemy import (
+    BigInteger,
     Column,
     DateTime,
     Float,
+    Index,
     String,
     Integer,
+    text,
 )
+from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql import expression
+
+from depobs.util.semver_util import parse_semver
 
 
 class PackageReportColumnsMixin:
@@ -38,6 +46,111 @@ class PackageReportColumnsMixin:
     all_deps = Column(Integer)
 
 
+SEMVER_COLUMN_NAMES = (
+    "version_major",
+    "version_minor",
+    "version_patch",
+    "version_prerelease_key",
+)
+
+
+def get_semver_columns(version: Optional[str]) -> Dict[str, Any]:
+    """
+    Returns a dict of SemverColumnsMixin column name to value for a
+    version with null values for invalid versions
+
+    >>> get_semver_columns("1.2.3-rc.1")
+    {'version_major': 1, 'version_minor': 2, 'version_patch': 3, 'version_prerelease_key': '1rc 0011'}
+    >>> get_semver_columns("not-a-version")["version_major"] is None
+    True
+    """
+    parsed = parse_semver(version)
+    return {
+        column_name: getattr(parsed, column_name[len("version_") :]) if parsed else None
+        for column_name in SEMVER_COLUMN_NAMES
+    }
+
+
+def semver_component_default(
+    version_column_name: str, component: str
+) -> Callable[[Any], Any]:
+    "Returns an insert default for a parsed semver component of the version column"
+
+    def default(context: Any) -> Any:
+        version = context.get_current_parameters().get(version_column_name)
+        return get_semver_columns(version)[f"version_{component}"]
+
+    return default
+
+
+class SemverColumnsMixin:
+    """
+    mix into tables with a version column to save its parsed semver
+    major, minor, patch, and prerelease ordering key on insert for
+    ordering and filtering by version in SQL
+
+    Set semver_version_column_name to the name of the version column.
+    The columns are null for invalid versions.
+    """
+
+    semver_version_column_name = "version"
+
+    @declared_attr
+    def version_major(cls) -> Column:
+        return Column(
+            BigInteger,
+            nullable=True,
+            default=semver_component_default(cls.semver_version_column_name, "major"),
+        )
+
+    @declared_attr
+    def version_minor(cls) -> Column:
+        return Column(
+            BigInteger,
+            nullable=True,
+            default=semver_component_default(cls.semver_version_column_name, "minor"),
+        )
+
+    @declared_attr
+    def version_patch(cls) -> Column:
+        return Column(
+            BigInteger,
+            nullable=True,
+            default=semver_component_default(cls.semver_version_column_name, "patch"),
+        )
+
+    # compares in prerelease precedence order with the "C" collation
+    @declared_attr
+    def version_prerelease_key(cls) -> Column:
+        return Column(
+            String(collation="C"),
+            nullable=True,
+            default=semver_component_default(
+                cls.semver_version_column_name, "prerelease_key"
+            ),
+        )
+
+    @classmethod
+    def semver_index(cls, name_column_name: str) -> Index:
+        "Returns an index for finding the highest versions of a package name first"
+        return Index(
+            f"{cls.__tablename__}_semver_idx",  # type: ignore
+            name_column_name,
+            *(
+                text(f"{column_name} DESC NULLS LAST")
+                for column_name in SEMVER_COLUMN_NAMES
+            ),
+        )
+
+    @classmethod
+    def semver_desc(cls) -> Tuple[Any, ...]:
+        "Returns order by clauses for highest semver first and invalid versions last"
+        return tuple(
+            expression.nullslast(expression.desc(getattr(cls, column_name)))
+            for column_name in SEMVER_COLUMN_NAMES
+        )
+
+
 class TaskIDMixin:
     """
     mix into a table of results from a celery task to track data the root celery task that created the data
@@ -56,3 +169,33 @@ class TaskIDMixin:
         if self.task_id is None:
             return None
         return AsyncResult(id=self.task_id).status
+
+
+def get_task_statuses(task_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    Returns a dict of task id to celery task status for the non-null
+    task ids.
+
+    Looks up each distinct task id once and uses a single multi-get
+    when the result backend is a key value store (e.g. redis).
+    Statuses for tasks missing from the backend are PENDING like
+    AsyncResult.status.
+    """
+    unique_task_ids = sorted({task_id for task_id in task_ids if task_id})
+    if not unique_task_ids:
+        return {}
+
+    backend = AsyncResult(id=unique_task_ids[0]).backend
+    if not hasattr(backend, "mget"):
+        return {task_id: AsyncResult(id=task_id).status for task_id in unique_task_ids}
+
+    statuses = {task_id: states.PENDING for task_id in unique_task_ids}
+    keys = [backend.get_key_for_task(task_id) for task_id in unique_task_ids]
+    values = backend.mget(keys)
+    if hasattr(values, "items"):
+        # some clients return a dict of key to value
+        values = [values.get(key) for key in keys]
+    for task_id, value in zip(unique_task_ids, values):
+        if value is not None:
+            statuses[task_id] = backend.decode_result(value)["status"]
+    return statuses
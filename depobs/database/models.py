@@ -1,7 +1,19 @@
+from collections import defaultdict
 from datetime import datetime
 from functools import cached_property
 import logging
-from typing import Any, Dict, List, Optional, Set, Tuple, Iterable
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Iterable,
+    Type,
+    Union,
+)
 
 import flask
 from flask_sqlalchemy import SQLAlchemy
@@ -21,18 +33,29 @@ from sqlalchemy import (
     Sequence,
     String,
     Table,
+    Text,
     UniqueConstraint,
+    tuple_,
 )
 from sqlalchemy.orm import backref, deferred, relationship
 from sqlalchemy.sql import func, expression
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.dialects.postgresql import ARRAY, ENUM, JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM, JSONB, insert
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.types import DateTime
 from sqlalchemy.schema import Table
 from sqlalchemy import func
 
-from depobs.database.mixins import PackageReportColumnsMixin, TaskIDMixin
+from depobs.database.mixins import (
+    SEMVER_COLUMN_NAMES,
+    PackageReportColumnsMixin,
+    SemverColumnsMixin,
+    TaskIDMixin,
+    get_semver_columns,
+    get_task_statuses,
+)
+from depobs.util.semver_util import parse_semver
+from depobs.util.serialize_util import grouper
 
 
 log = logging.getLogger(__name__)
@@ -66,11 +89,26 @@ class Dependency(db.Model):
     used_by_id = Column(Integer, ForeignKey("reports.id"), primary_key=True)
 
 
-class PackageReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
+class PackageReport(
+    PackageReportColumnsMixin, SemverColumnsMixin, TaskIDMixin, db.Model
+):
     __tablename__ = "reports"
 
     id = Column("id", Integer, primary_key=True)
 
+    @declared_attr
+    def __table_args__(cls) -> Iterable[Index]:
+        return (
+            cls.semver_index("package"),
+            # for get_most_recently_scored_package_report through report_score_view
+            Index(
+                f"{cls.__tablename__}_scoring_date_idx",
+                "package",
+                "version",
+                expression.text("scoring_date DESC"),
+            ),
+        )
+
     # this relationship is used for persistence
     dependencies: sqlalchemy.orm.RelationshipProperty = relationship(
         "PackageReport",
@@ -82,11 +120,14 @@ class PackageReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
 
     @property
     def report_json(self) -> Dict:
+        return self.report_json_with_task_status(self.task_status)
+
+    def report_json_with_task_status(self, task_status: Optional[str]) -> Dict:
         return dict(
             id=self.id,
             task_id=self.task_id,
             # from database.mixins.TaskIDMixin
-            task_status=self.task_status,
+            task_status=task_status,
             package=self.package,
             version=self.version,
             status=self.status,
@@ -110,25 +151,15 @@ class PackageReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
         )
 
     def json_with_dependencies(self, depth: int = 1) -> Dict:
-        return {
-            "dependencies": [
-                rep.json_with_dependencies(depth - 1) for rep in self.dependencies
-            ]
-            if depth > 0
-            else [],
-            **self.report_json,
-        }
+        return get_report_tree_json(self, depth, "dependencies")
 
     def json_with_parents(self, depth: int = 1) -> Dict:
-        return {
-            "parents": [rep.json_with_parents(depth - 1) for rep in self.parents]
-            if depth > 0
-            else [],
-            **self.report_json,
-        }
+        return get_report_tree_json(self, depth, "parents")
 
 
-class PackageScoreReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
+class PackageScoreReport(
+    PackageReportColumnsMixin, SemverColumnsMixin, TaskIDMixin, db.Model
+):
     __tablename__ = "report_score_view"
 
     id = Column("id", Integer, primary_key=True)
@@ -147,13 +178,16 @@ class PackageScoreReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
 
     @property
     def report_json(self) -> Dict:
+        return self.report_json_with_task_status(self.task_status)
+
+    def report_json_with_task_status(self, task_status: Optional[str]) -> Dict:
         return dict(
             score=self.score,
             score_code=self.score_code,
             id=self.id,
             task_id=self.task_id,
             # from database.mixins.TaskIDMixin
-            task_status=self.task_status,
+            task_status=task_status,
             package=self.package,
             version=self.version,
             status=self.status,
@@ -177,25 +211,53 @@ class PackageScoreReport(PackageReportColumnsMixin, TaskIDMixin, db.Model):
         )
 
     def json_with_dependencies(self, depth: int = 1) -> Dict:
-        return {
-            "dependencies": [
-                rep.json_with_dependencies(depth - 1) for rep in self.dependencies
-            ]
-            if depth > 0
-            else [],
-            **self.report_json,
-        }
+        return get_report_tree_json(self, depth, "dependencies")
 
     def json_with_parents(self, depth: int = 1) -> Dict:
-        return {
-            "parents": [rep.json_with_parents(depth - 1) for rep in self.parents]
-            if depth > 0
-            else [],
-            **self.report_json,
-        }
+        return get_report_tree_json(self, depth, "parents")
+
+
+class ReportScore(db.Model):
+    """
+    Scores and score codes for scanned reports saved by
+    refresh_report_scores to back report_score_view when
+    MATERIALIZE_SCORE_VIEWS is enabled
+
+    Only saves the computed columns. report_score_view reads the
+    other report columns from reports so they're never stale and
+    looks up reports with the reports_scoring_date_idx index.
+    """
+
+    __tablename__ = "report_scores"
+
+    id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True)
+
+    score = Column(Float)
+    # text to match the type of the score_code CASE in the unmaterialized view
+    score_code = Column(Text)
+
+
+class ReportFingerprint(db.Model):
+    """
+    Subtree fingerprints of scored reports to reuse a report for the
+    same package version with the same dependencies and scoring inputs
+    in other package graphs (see scoring.package_graph_fingerprints)
+    """
+
+    __tablename__ = "report_fingerprints"
+
+    # hex SHA-256 digest
+    fingerprint = Column(String(64), primary_key=True)
+    report_id = Column(
+        Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False
+    )
+
+    @declared_attr
+    def __table_args__(cls) -> Iterable[Index]:
+        return (Index(f"{cls.__tablename__}_report_id_idx", "report_id"),)
 
 
-class PackageVersion(db.Model):
+class PackageVersion(SemverColumnsMixin, db.Model):
     __tablename__ = "package_versions"
 
     id = Column(Integer, Sequence("package_version_id_seq"), primary_key=True)
@@ -231,6 +293,7 @@ class PackageVersion(db.Model):
                 "inserted_at",
                 expression.desc(cls.inserted_at),
             ),
+            cls.semver_index("name"),
         )
 
 
@@ -280,6 +343,29 @@ class PackageLink(db.Model):
         )
 
 
+class PackageGraphLink(db.Model):
+    """
+    Membership of package links in package graphs i.e. the direct and
+    transitive dependency links of a resolved package graph
+    """
+
+    __tablename__ = "package_graph_links"
+
+    graph_id = Column(
+        Integer, primary_key=True, nullable=False  # ForeignKey("package_graphs.id"),
+    )
+    link_id = Column(
+        Integer, primary_key=True, nullable=False  # ForeignKey("package_links.id"),
+    )
+
+    @declared_attr
+    def __table_args__(cls) -> Iterable[Index]:
+        return (
+            # the (graph_id, link_id) primary key index finds links in a graph
+            Index(f"{cls.__tablename__}_link_id_idx", "link_id"),
+        )
+
+
 class PackageGraph(db.Model):
     __tablename__ = "package_graphs"
 
@@ -291,6 +377,9 @@ class PackageGraph(db.Model):
     )
 
     # link ids of direct and transitive deps
+    #
+    # deprecated: only set for graphs saved before package_graph_links
+    # use PackageGraphLink to find links in a graph instead
     link_ids = deferred(Column(ARRAY(Integer)))  # ForeignKey("package_links.id"))
 
     # what resolved it
@@ -304,11 +393,26 @@ class PackageGraph(db.Model):
     def package_links_by_id(
         self,
     ) -> Dict[PackageLinkID, Tuple[PackageVersionID, PackageVersionID]]:
-        return {
-            link.id: (link.parent_package_id, link.child_package_id)
-            for link in db.session.query(PackageLink).filter(
-                PackageLink.id.in_([lid[0] for lid in self.link_ids])
+        links_query = db.session.query(
+            PackageLink.id, PackageLink.parent_package_id, PackageLink.child_package_id
+        )
+        links = (
+            links_query.join(
+                PackageGraphLink, PackageGraphLink.link_id == PackageLink.id
             )
+            .filter(PackageGraphLink.graph_id == self.id)
+            .all()
+            if self.id is not None
+            else []
+        )
+        if not links and self.link_ids:
+            # fall back to link IDs for graphs not backfilled into package_graph_links
+            links = links_query.filter(
+                PackageLink.id.in_([lid[0] for lid in self.link_ids])
+            ).all()
+        return {
+            link_id: (parent_package_id, child_package_id)
+            for (link_id, parent_package_id, child_package_id) in links
         }
 
     @cached_property
@@ -330,16 +434,36 @@ class PackageGraph(db.Model):
 
     def get_npm_registry_data_by_package_version_id(
         self,
-    ) -> Dict[PackageVersionID, Optional["NPMRegistryEntry"]]:
-        # TODO: fetch all entries in one request
-        # want latest entry data matching package name and version
-        # e.g. GROUP BY name, version ORDER BY inserted_at or updated_at DESC
+    ) -> Dict[
+        PackageVersionID, Optional[Tuple[Optional[datetime], Any, Any]],
+    ]:
+        """
+        Returns a dict of package version ID to the latest inserted
+        registry entry data:
+
+        Optional[Tuple[published_at: datetime, maintainers: JSONB, contributors: JSONB]]
+
+        for all package versions in the graph using one query.
+        """
         # not cached since it can change as more entries fetched or updated
+        package_versions = self.distinct_package_versions_by_id.values()
+        registry_data_by_name_and_version: Dict[
+            Tuple[str, str], Tuple[Optional[datetime], Any, Any]
+        ] = {
+            (name, version): (published_at, maintainers, contributors)
+            for (
+                name,
+                version,
+                published_at,
+                maintainers,
+                contributors,
+            ) in get_latest_npm_registry_data_for_package_versions(package_versions)
+        }
         return {
-            package_version.id: get_npm_registry_data(
-                package_version.name, package_version.version
-            ).first()
-            for package_version in self.distinct_package_versions_by_id.values()
+            package_version.id: registry_data_by_name_and_version.get(
+                (package_version.name, package_version.version), None
+            )
+            for package_version in package_versions
         }
 
     def get_npmsio_scores_by_package_version_id(
@@ -350,43 +474,55 @@ class PackageGraph(db.Model):
 
         Tuple[desired_package_version: str, Dict[scored_package_version: str, score: float]]
 
-        ordered by analyzed_at field.
+        using the most recently analyzed score for each scored
+        version. When the desired version was scored only its score is
+        included otherwise all scored versions of the package are
+        included.
 
         e.g. {0: ('0.0.0', {'2.0.0': 0.75, '1.0.0': 0.3})}
         """
-        # TODO: fetch all scores in one request
         # not cached since it can change as scores are updated
+        package_versions = self.distinct_package_versions_by_id.values()
+        scores_by_package_name: Dict[str, Dict[str, float]] = {}
+        for (
+            name,
+            scored_version,
+            score,
+        ) in get_latest_npms_io_scores_for_package_names(
+            set(package_version.name for package_version in package_versions)
+        ):
+            scores_by_package_name.setdefault(name, {})[scored_version] = score
+
         def get_package_scores_by_version(
             package_version: PackageVersion,
         ) -> Dict[str, float]:
-            return {
-                scored_version: score
-                for (score, scored_version) in (
-                    get_npms_io_score(
-                        package_version.name, package_version.version
-                    ).all()
-                    or get_npms_io_score(package_version.name).all()
-                )
-            }
+            package_scores = scores_by_package_name.get(package_version.name, {})
+            if package_version.version in package_scores:
+                return {
+                    package_version.version: package_scores[package_version.version]
+                }
+            return package_scores
 
         return {
             package_version.id: (
                 package_version.version,
                 get_package_scores_by_version(package_version),
             )
-            for package_version in self.distinct_package_versions_by_id.values()
+            for package_version in package_versions
         }
 
     def get_advisories_by_package_version_id(
         self,
     ) -> Dict[PackageVersionID, List["Advisory"]]:
-        # TOOD: fetch all with one DB call
-        return {
-            package_version.id: get_advisories_by_package_versions(
-                [package_version]
-            ).all()
-            for package_version in self.distinct_package_versions_by_id.values()
+        advisories_by_package_version_id: Dict[PackageVersionID, List[Advisory]] = {
+            package_version_id: []
+            for package_version_id in self.distinct_package_versions_by_id.keys()
         }
+        for (package_version_id, advisory) in get_advisories_by_package_version_ids(
+            advisories_by_package_version_id.keys()
+        ):
+            advisories_by_package_version_id[package_version_id].append(advisory)
+        return advisories_by_package_version_id
 
     @declared_attr
     def __table_args__(cls) -> Iterable[Index]:
@@ -571,7 +707,7 @@ class NPMSIOScore(db.Model):
         )
 
 
-class NPMRegistryEntry(db.Model):
+class NPMRegistryEntry(SemverColumnsMixin, db.Model):
     __tablename__ = "npm_registry_entries"
 
     """
@@ -685,6 +821,8 @@ class NPMRegistryEntry(db.Model):
     inserted_at = deferred(Column(DateTime(timezone=False), server_default=utcnow()))
     updated_at = deferred(Column(DateTime(timezone=False), onupdate=utcnow()))
 
+    semver_version_column_name = "package_version"
+
     # TODO: add the following fields?
     #
     # main: the package's entry point (e.g., index.js or main.js)
@@ -736,6 +874,7 @@ class NPMRegistryEntry(db.Model):
                 "inserted_at",
                 expression.desc(cls.inserted_at),
             ),
+            cls.semver_index("package_name"),
         )
 
 
@@ -743,9 +882,10 @@ def get_package_report(
     package: str, version: Optional[str] = None
 ) -> Optional[PackageReport]:
     if None == version:
-        # TODO order-by is hard with semver. Think about splitting out versions
-        no_version_query = db.session.query(PackageReport).filter(
-            PackageReport.package == package
+        no_version_query = (
+            db.session.query(PackageReport)
+            .filter(PackageReport.package == package)
+            .order_by(*PackageReport.semver_desc())
         )
         log.debug(f"Query is {no_version_query}")
         for rep in no_version_query:
@@ -828,7 +968,8 @@ def get_latest_graph_including_package_as_parent(
         return None
     graph_query = (
         db.session.query(PackageGraph)
-        .filter(PackageGraph.link_ids.contains([link.id]))
+        .join(PackageGraphLink, PackageGraphLink.graph_id == PackageGraph.id)
+        .filter(PackageGraphLink.link_id == link.id)
         .order_by(PackageGraph.inserted_at.desc())
         .limit(1)
     )
@@ -836,6 +977,411 @@ def get_latest_graph_including_package_as_parent(
     return graph_query.one_or_none()
 
 
+def get_latest_graphs_including_package_versions_query(
+    package_version_ids: Iterable[PackageVersionID],
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns the newest PackageGraph of each root package version when
+    it includes a package link to or from any of the package versions.
+
+    Finds graphs including the links with the
+    package_graph_links_link_id_idx index and skips graphs replaced by
+    a newer graph of the same root.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_latest_graphs_including_package_versions_query([932, 933]))
+    ...
+    'SELECT package_graphs.id AS package_graphs_id, package_graphs.root_package_version_id AS package_graphs_root_package_version_id \\nFROM package_graphs \\nWHERE package_graphs.id IN (SELECT DISTINCT ON (package_graphs.root_package_version_id) package_graphs.id \\nFROM package_graphs \\nWHERE package_graphs.root_package_version_id IN (SELECT package_graphs.root_package_version_id \\nFROM package_graphs \\nWHERE package_graphs.id IN (SELECT package_graph_links.graph_id \\nFROM package_graph_links \\nWHERE package_graph_links.link_id IN (SELECT package_links.id \\nFROM package_links \\nWHERE package_links.child_package_id IN (%(child_package_id_1)s, %(child_package_id_2)s) OR package_links.parent_package_id IN (%(parent_package_id_1)s, %(parent_package_id_2)s)))) ORDER BY package_graphs.root_package_version_id, package_graphs.inserted_at DESC) AND package_graphs.id IN (SELECT package_graph_links.graph_id \\nFROM package_graph_links \\nWHERE package_graph_links.link_id IN (SELECT package_links.id \\nFROM package_links \\nWHERE package_links.child_package_id IN (%(child_package_id_1)s, %(child_package_id_2)s) OR package_links.parent_package_id IN (%(parent_package_id_1)s, %(parent_package_id_2)s))) ORDER BY package_graphs.id'
+    """
+    package_version_ids = list(package_version_ids)
+    link_ids = db.session.query(PackageLink.id).filter(
+        sqlalchemy.or_(
+            PackageLink.child_package_id.in_(package_version_ids),
+            PackageLink.parent_package_id.in_(package_version_ids),
+        )
+    )
+    including_graph_ids = db.session.query(PackageGraphLink.graph_id).filter(
+        PackageGraphLink.link_id.in_(link_ids.subquery())
+    )
+    latest_graph_ids = (
+        db.session.query(PackageGraph.id)
+        .filter(
+            PackageGraph.root_package_version_id.in_(
+                db.session.query(PackageGraph.root_package_version_id)
+                .filter(PackageGraph.id.in_(including_graph_ids.subquery()))
+                .subquery()
+            )
+        )
+        .distinct(PackageGraph.root_package_version_id)
+        .order_by(PackageGraph.root_package_version_id, PackageGraph.inserted_at.desc())
+    )
+    return (
+        db.session.query(PackageGraph)
+        .filter(
+            PackageGraph.id.in_(latest_graph_ids.subquery()),
+            PackageGraph.id.in_(including_graph_ids.subquery()),
+        )
+        .order_by(PackageGraph.id)
+    )
+
+
+def get_latest_graphs_including_package_versions(
+    package_version_ids: Iterable[PackageVersionID],
+) -> List[PackageGraph]:
+    "Returns get_latest_graphs_including_package_versions_query results"
+    return get_latest_graphs_including_package_versions_query(package_version_ids).all()
+
+
+def get_latest_scored_package_reports_query(
+    package_names_and_versions: Iterable[Tuple[str, str]]
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns the most recently scored scanned PackageReport for each
+    (package name, version) pair.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_latest_scored_package_reports_query([("lodash", "4.17.15")]))
+    ...
+    'SELECT DISTINCT ON (reports.package, reports.version) reports.package AS reports_package, reports.version AS reports_version, reports.status AS reports_status, reports.release_date AS reports_release_date, reports.scoring_date AS reports_scoring_date, reports.top_score AS reports_top_score, reports.npmsio_score AS reports_npmsio_score, reports.npmsio_scored_package_version AS reports_npmsio_scored_package_version, reports."directVulnsCritical_score" AS "reports_directVulnsCritical_score", reports."directVulnsHigh_score" AS "reports_directVulnsHigh_score", reports."directVulnsMedium_score" AS "reports_directVulnsMedium_score", reports."directVulnsLow_score" AS "reports_directVulnsLow_score", reports."indirectVulnsCritical_score" AS "reports_indirectVulnsCritical_score", reports."indirectVulnsHigh_score" AS "reports_indirectVulnsHigh_score", reports."indirectVulnsMedium_score" AS "reports_indirectVulnsMedium_score", reports."indirectVulnsLow_score" AS "reports_indirectVulnsLow_score", reports.authors AS reports_authors, reports.contributors AS reports_contributors, reports.immediate_deps AS reports_immediate_deps, reports.all_deps AS reports_all_deps, reports.task_id AS reports_task_id, reports.id AS reports_id, reports.version_major AS reports_version_major, reports.version_minor AS reports_version_minor, reports.version_patch AS reports_version_patch, reports.version_prerelease_key AS reports_version_prerelease_key \\nFROM reports \\nWHERE (reports.package, reports.version) IN ((%(param_1)s, %(param_2)s)) AND reports.status = %(status_1)s AND reports.scoring_date IS NOT NULL ORDER BY reports.package, reports.version, reports.scoring_date DESC'
+    """
+    return (
+        db.session.query(PackageReport)
+        .filter(
+            tuple_(PackageReport.package, PackageReport.version).in_(
+                list(package_names_and_versions)
+            ),
+            PackageReport.status == "scanned",
+            PackageReport.scoring_date != None,
+        )
+        .distinct(PackageReport.package, PackageReport.version)
+        .order_by(
+            PackageReport.package,
+            PackageReport.version,
+            PackageReport.scoring_date.desc(),
+        )
+    )
+
+
+def get_graph_scored_package_reports_by_package_version_id(
+    db_graph: PackageGraph,
+) -> Dict[PackageVersionID, PackageReport]:
+    """
+    Returns a dict of PackageVersion ID to report from the last scoring
+    of a package graph i.e. the report tree of the graph root's most
+    recently scored report.
+
+    Returns an empty dict when the root hasn't been scored or its report
+    tree has different dependencies than the graph (e.g. it was scored
+    from an older graph of the root).
+    """
+    root = db_graph.distinct_package_versions_by_id.get(
+        db_graph.root_package_version_id, None
+    )
+    if root is None:
+        return {}
+    root_report: Optional[PackageReport] = get_latest_scored_package_reports_query(
+        [(root.name, root.version)]
+    ).one_or_none()
+    if root_report is None:
+        return {}
+
+    dep_report_ids_by_report_id: Dict[int, Set[int]] = defaultdict(set)
+    for from_id, to_id in get_report_tree_edges_query(
+        root_report.id, None, "dependencies"
+    ):
+        dep_report_ids_by_report_id[from_id].add(to_id)
+    report_ids = set(dep_report_ids_by_report_id.keys()).union(
+        *dep_report_ids_by_report_id.values()
+    ) - {root_report.id}
+    reports = [root_report]
+    if report_ids:
+        reports.extend(PackageReport.query.filter(PackageReport.id.in_(report_ids)))
+
+    package_version_ids_by_name_and_version: Dict[Tuple[str, str], PackageVersionID] = {
+        (package_version.name, package_version.version): package_version.id
+        for package_version in db_graph.distinct_package_versions_by_id.values()
+    }
+    reports_by_package_version_id: Dict[PackageVersionID, PackageReport] = {}
+    package_version_ids_by_report_id: Dict[int, PackageVersionID] = {}
+    for report in reports:
+        package_version_id = package_version_ids_by_name_and_version.get(
+            (report.package, report.version), None
+        )
+        if package_version_id is None or package_version_id in (
+            reports_by_package_version_id
+        ):
+            return {}
+        reports_by_package_version_id[package_version_id] = report
+        package_version_ids_by_report_id[report.id] = package_version_id
+
+    dep_ids_by_package_version_id: Dict[PackageVersionID, Set[PackageVersionID]] = (
+        defaultdict(set)
+    )
+    for parent_id, child_id in db_graph.package_links_by_id.values():
+        dep_ids_by_package_version_id[parent_id].add(child_id)
+    for report in reports:
+        if {
+            package_version_ids_by_report_id[dep_report_id]
+            for dep_report_id in dep_report_ids_by_report_id[report.id]
+        } != dep_ids_by_package_version_id[package_version_ids_by_report_id[report.id]]:
+            return {}
+    return reports_by_package_version_id
+
+
+def get_report_tree_edges_query(
+    report_id: int, depth: Optional[int], relation: str
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns distinct (from report ID, to report ID) package_dependencies
+    edges reachable from the report within depth links (or any number
+    of links when depth is None) following the "dependencies" or
+    "parents" report relationship.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_report_tree_edges_query(5, 2, "parents"))
+    ...
+    'WITH RECURSIVE report_tree_edges(from_id, to_id, depth) AS \\n(SELECT package_dependencies.used_by_id AS from_id, package_dependencies.depends_on_id AS to_id, 1 AS depth \\nFROM package_dependencies \\nWHERE package_dependencies.used_by_id = %(used_by_id_1)s UNION SELECT package_dependencies.used_by_id AS package_dependencies_used_by_id, package_dependencies.depends_on_id AS package_dependencies_depends_on_id, report_tree_edges.depth + %(depth_1)s AS anon_1 \\nFROM package_dependencies JOIN report_tree_edges ON package_dependencies.used_by_id = report_tree_edges.to_id \\nWHERE report_tree_edges.depth < %(depth_2)s)\\n SELECT DISTINCT report_tree_edges.from_id AS report_tree_edges_from_id, report_tree_edges.to_id AS report_tree_edges_to_id \\nFROM report_tree_edges'
+    """
+    if relation == "dependencies":
+        from_id, to_id = Dependency.depends_on_id, Dependency.used_by_id
+    elif relation == "parents":
+        from_id, to_id = Dependency.used_by_id, Dependency.depends_on_id
+    else:
+        raise ValueError(f"unsupported report relation {relation!r}")
+
+    if depth is None:
+        # without a depth column UNION stops at cycles after visiting each edge
+        edges = (
+            db.session.query(from_id.label("from_id"), to_id.label("to_id"))
+            .filter(from_id == report_id)
+            .cte("report_tree_edges", recursive=True)
+        )
+        edges = edges.union(
+            db.session.query(from_id, to_id).join(edges, from_id == edges.c.to_id)
+        )
+        return db.session.query(edges.c.from_id, edges.c.to_id)
+
+    edges = (
+        db.session.query(
+            from_id.label("from_id"),
+            to_id.label("to_id"),
+            sqlalchemy.literal_column("1", Integer).label("depth"),
+        )
+        .filter(from_id == report_id)
+        .cte("report_tree_edges", recursive=True)
+    )
+    edges = edges.union(
+        db.session.query(from_id, to_id, edges.c.depth + 1)
+        .join(edges, from_id == edges.c.to_id)
+        .filter(edges.c.depth < depth)
+    )
+    return db.session.query(edges.c.from_id, edges.c.to_id).distinct()
+
+
+ReportModel = Union[PackageReport, PackageScoreReport]
+
+
+def get_related_reports_by_report_id(
+    report: ReportModel, depth: int, relation: str
+) -> Dict[int, List[ReportModel]]:
+    """
+    Returns a dict of report ID to "dependencies" or "parents" related
+    reports for reports within depth links of a saved report.
+
+    Loads the tree in one edge query and one report query instead of
+    lazy loading the relationship for each report.
+    """
+    to_ids_by_from_id: Dict[int, List[int]] = defaultdict(list)
+    if depth > 0:
+        for from_id, to_id in get_report_tree_edges_query(report.id, depth, relation):
+            to_ids_by_from_id[from_id].append(to_id)
+
+    model = type(report)
+    reports_by_id = {report.id: report}
+    report_ids = {
+        to_id for to_ids in to_ids_by_from_id.values() for to_id in to_ids
+    } - {report.id}
+    if report_ids:
+        reports_by_id.update(
+            (tree_report.id, tree_report)
+            for tree_report in model.query.filter(model.id.in_(report_ids))
+        )
+    return {
+        from_id: [
+            reports_by_id[to_id] for to_id in sorted(to_ids) if to_id in reports_by_id
+        ]
+        for from_id, to_ids in to_ids_by_from_id.items()
+    }
+
+
+def get_report_tree_json(report: ReportModel, depth: int, relation: str) -> Dict:
+    """
+    Returns report JSON with reports for the "dependencies" or
+    "parents" relation nested depth levels deep.
+
+    Loads saved report trees with get_related_reports_by_report_id and
+    walks the in-memory relationship for unsaved reports (e.g. from
+    scoring). Looks up task statuses in a batch.
+    """
+    related_by_key: Dict[int, List[ReportModel]] = {}
+    if sqlalchemy.inspect(report).persistent:
+        related_by_report_id = get_related_reports_by_report_id(report, depth, relation)
+        tree_reports = [report] + [
+            tree_report
+            for related in related_by_report_id.values()
+            for tree_report in related
+        ]
+        related_by_key = {
+            id(tree_report): related_by_report_id.get(tree_report.id, [])
+            for tree_report in tree_reports
+        }
+    else:
+        level, tree_reports = [report], [report]
+        for _ in range(depth):
+            next_level = []
+            for tree_report in level:
+                if id(tree_report) not in related_by_key:
+                    related_by_key[id(tree_report)] = list(
+                        getattr(tree_report, relation)
+                    )
+                    next_level.extend(related_by_key[id(tree_report)])
+            tree_reports.extend(next_level)
+            level = next_level
+
+    task_statuses = get_task_statuses(
+        tree_report.task_id for tree_report in tree_reports
+    )
+
+    def node_json(tree_report: ReportModel, node_depth: int) -> Dict:
+        return {
+            relation: [
+                node_json(related_report, node_depth - 1)
+                for related_report in related_by_key.get(id(tree_report), [])
+            ]
+            if node_depth > 0
+            else [],
+            **tree_report.report_json_with_task_status(
+                task_statuses.get(tree_report.task_id)
+            ),
+        }
+
+    return node_json(report, depth)
+
+
+def get_transitive_dependents_query(
+    package_version_id: PackageVersionID, max_depth: int, roots_only: bool = False
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns (PackageVersion ID, name, version, depth) for package
+    versions that depend on the given package version directly (depth
+    1) or transitively through package_links up to max_depth links
+    away, ordered by their shortest depth.
+
+    Only follows links in the latest package graph of each root that
+    includes the package version (see
+    get_latest_graphs_including_package_versions_query), so
+    dependencies of older or replaced graphs aren't reported. Each
+    path stays within one graph.
+
+    Walks links from child to parent with a recursive CTE that uses the
+    package_links_unique_idx (child_package_id, parent_package_id)
+    and package_graph_links primary key indexes. Dedupes dependents by
+    graph and depth at each step, so the max_depth bounds the work and
+    terminates dependency cycles.
+
+    When roots_only is true, only returns dependents that are the root
+    of a scanned package graph.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_transitive_dependents_query(932, 3, roots_only=True))
+    ...
+    'WITH RECURSIVE dependents(graph_id, package_version_id, depth) AS \\n(SELECT package_graph_links.graph_id AS graph_id, package_links.parent_package_id AS package_version_id, 1 AS depth \\nFROM package_graph_links JOIN package_links ON package_links.id = package_graph_links.link_id \\nWHERE package_graph_links.graph_id IN (SELECT package_graphs.id \\nFROM package_graphs \\nWHERE package_graphs.id IN (SELECT DISTINCT ON (package_graphs.root_package_version_id) package_graphs.id \\nFROM package_graphs \\nWHERE package_graphs.root_package_version_id IN (SELECT package_graphs.root_package_version_id \\nFROM package_graphs \\nWHERE package_graphs.id IN (SELECT package_graph_links.graph_id \\nFROM package_graph_links \\nWHERE package_graph_links.link_id IN (SELECT package_links.id \\nFROM package_links \\nWHERE package_links.child_package_id IN (%(child_package_id_1)s) OR package_links.parent_package_id IN (%(parent_package_id_1)s)))) ORDER BY package_graphs.root_package_version_id, package_graphs.inserted_at DESC) AND package_graphs.id IN (SELECT package_graph_links.graph_id \\nFROM package_graph_links \\nWHERE package_graph_links.link_id IN (SELECT package_links.id \\nFROM package_links \\nWHERE package_links.child_package_id IN (%(child_package_id_1)s) OR package_links.parent_package_id IN (%(parent_package_id_1)s)))) AND package_links.child_package_id = %(child_package_id_2)s AND package_links.parent_package_id != package_links.child_package_id UNION SELECT parent_graph_links.graph_id AS parent_graph_links_graph_id, parent_links.parent_package_id AS parent_links_parent_package_id, dependents.depth + %(depth_1)s AS anon_1 \\nFROM package_links AS parent_links JOIN dependents ON parent_links.child_package_id = dependents.package_version_id JOIN package_graph_links AS parent_graph_links ON parent_graph_links.graph_id = dependents.graph_id AND parent_graph_links.link_id = parent_links.id \\nWHERE dependents.depth < %(depth_2)s AND parent_links.parent_package_id != parent_links.child_package_id)\\n SELECT package_versions.id AS package_versions_id, package_versions.name AS package_versions_name, package_versions.version AS package_versions_version, min(dependents.depth) AS depth \\nFROM package_versions JOIN dependents ON dependents.package_version_id = package_versions.id \\nWHERE package_versions.id != %(id_1)s AND (EXISTS (SELECT 1 \\nFROM package_graphs \\nWHERE package_graphs.root_package_version_id = package_versions.id)) GROUP BY package_versions.id, package_versions.name, package_versions.version ORDER BY depth, package_versions.name, package_versions.version'
+    """
+    latest_graph_ids = (
+        get_latest_graphs_including_package_versions_query([package_version_id])
+        .with_entities(PackageGraph.id)
+        .order_by(None)
+    )
+    dependents = (
+        db.session.query(
+            PackageGraphLink.graph_id.label("graph_id"),
+            PackageLink.parent_package_id.label("package_version_id"),
+            sqlalchemy.literal_column("1", Integer).label("depth"),
+        )
+        .join(PackageLink, PackageLink.id == PackageGraphLink.link_id)
+        .filter(
+            PackageGraphLink.graph_id.in_(latest_graph_ids.subquery()),
+            PackageLink.child_package_id == package_version_id,
+            PackageLink.parent_package_id != PackageLink.child_package_id,
+        )
+        .cte("dependents", recursive=True)
+    )
+    parent_links = sqlalchemy.orm.aliased(PackageLink, name="parent_links")
+    parent_graph_links = sqlalchemy.orm.aliased(
+        PackageGraphLink, name="parent_graph_links"
+    )
+    dependents = dependents.union(
+        db.session.query(
+            parent_graph_links.graph_id,
+            parent_links.parent_package_id,
+            dependents.c.depth + 1,
+        )
+        .join(
+            dependents,
+            parent_links.child_package_id == dependents.c.package_version_id,
+        )
+        .join(
+            parent_graph_links,
+            sqlalchemy.and_(
+                parent_graph_links.graph_id == dependents.c.graph_id,
+                parent_graph_links.link_id == parent_links.id,
+            ),
+        )
+        .filter(
+            dependents.c.depth < max_depth,
+            parent_links.parent_package_id != parent_links.child_package_id,
+        )
+    )
+
+    min_depth = func.min(dependents.c.depth).label("depth")
+    query = (
+        db.session.query(
+            PackageVersion.id, PackageVersion.name, PackageVersion.version, min_depth
+        )
+        .join(dependents, dependents.c.package_version_id == PackageVersion.id)
+        .filter(PackageVersion.id != package_version_id)
+        .group_by(PackageVersion.id, PackageVersion.name, PackageVersion.version)
+        .order_by(min_depth, PackageVersion.name, PackageVersion.version)
+    )
+    if roots_only:
+        query = query.filter(
+            db.session.query(PackageGraph.id)
+            .filter(PackageGraph.root_package_version_id == PackageVersion.id)
+            .exists()
+        )
+    return query
+
+
+def get_transitive_dependents(
+    package_version_id: PackageVersionID,
+    max_depth: int,
+    roots_only: bool = False,
+    page: int = 1,
+    per_page: int = 100,
+) -> List[Tuple[PackageVersionID, str, str, int]]:
+    "Returns a page of get_transitive_dependents_query results"
+    return (
+        get_transitive_dependents_query(package_version_id, max_depth, roots_only)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+
+
 def get_package_from_name_and_version(
     name: str, version: str
 ) -> Optional[PackageVersion]:
@@ -901,6 +1447,33 @@ def get_npms_io_score(
     return query
 
 
+def get_latest_npms_io_scores_for_package_names(
+    package_names: Iterable[str],
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns the most recently analyzed npms.io score for each scored
+    version of the given package names.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_latest_npms_io_scores_for_package_names(["package_foo"]))
+    ...
+    'SELECT DISTINCT ON (npmsio_scores.package_name, npmsio_scores.package_version) npmsio_scores.package_name AS npmsio_scores_package_name, npmsio_scores.package_version AS npmsio_scores_package_version, npmsio_scores.score AS npmsio_scores_score \\nFROM npmsio_scores \\nWHERE npmsio_scores.package_name IN (%(package_name_1)s) ORDER BY npmsio_scores.package_name, npmsio_scores.package_version, npmsio_scores.analyzed_at DESC'
+    """
+    return (
+        db.session.query(
+            NPMSIOScore.package_name, NPMSIOScore.package_version, NPMSIOScore.score
+        )
+        .filter(NPMSIOScore.package_name.in_(list(package_names)))
+        .distinct(NPMSIOScore.package_name, NPMSIOScore.package_version)
+        .order_by(
+            NPMSIOScore.package_name,
+            NPMSIOScore.package_version,
+            NPMSIOScore.analyzed_at.desc(),
+        )
+    )
+
+
 def get_package_names_with_missing_npms_io_scores() -> sqlalchemy.orm.query.Query:
     """
     Returns PackageVersion names not in npmsio_scores.
@@ -938,6 +1511,30 @@ def get_npm_registry_entries_to_scan(
     return query
 
 
+def get_latest_npm_registry_entries(
+    package: str, limit: Optional[int] = None
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns NPMRegistryEntry models for the given package name ordered
+    by highest semver first and optionally limited to the first limit
+    entries.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_latest_npm_registry_entries("package_foo", 5).with_entities(NPMRegistryEntry.package_version))
+    ...
+    'SELECT npm_registry_entries.package_version AS npm_registry_entries_package_version \\nFROM npm_registry_entries \\nWHERE npm_registry_entries.package_name = %(package_name_1)s ORDER BY npm_registry_entries.version_major DESC NULLS LAST, npm_registry_entries.version_minor DESC NULLS LAST, npm_registry_entries.version_patch DESC NULLS LAST, npm_registry_entries.version_prerelease_key DESC NULLS LAST \\n LIMIT %(param_1)s'
+    """
+    query = (
+        db.session.query(NPMRegistryEntry)
+        .filter_by(package_name=package)
+        .order_by(*NPMRegistryEntry.semver_desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
 def get_NPMRegistryEntry(
     package: str, version: Optional[str] = None,
 ) -> sqlalchemy.orm.query.Query:
@@ -951,10 +1548,10 @@ def get_NPMRegistryEntry(
     ...     name_and_version_query = str(get_NPMRegistryEntry("package_foo", "version_1"))
 
     >>> just_name_query
-    'SELECT npm_registry_entries.id AS npm_registry_entries_id, npm_registry_entries.package_name AS npm_registry_entries_package_name, npm_registry_entries.package_version AS npm_registry_entries_package_version, npm_registry_entries.shasum AS npm_registry_entries_shasum, npm_registry_entries.tarball AS npm_registry_entries_tarball, npm_registry_entries.has_shrinkwrap AS npm_registry_entries_has_shrinkwrap, npm_registry_entries.published_at AS npm_registry_entries_published_at, npm_registry_entries.package_modified_at AS npm_registry_entries_package_modified_at, npm_registry_entries.source_url AS npm_registry_entries_source_url \\nFROM npm_registry_entries \\nWHERE npm_registry_entries.package_name = %(package_name_1)s ORDER BY npm_registry_entries.inserted_at DESC'
+    'SELECT npm_registry_entries.id AS npm_registry_entries_id, npm_registry_entries.package_name AS npm_registry_entries_package_name, npm_registry_entries.package_version AS npm_registry_entries_package_version, npm_registry_entries.shasum AS npm_registry_entries_shasum, npm_registry_entries.tarball AS npm_registry_entries_tarball, npm_registry_entries.has_shrinkwrap AS npm_registry_entries_has_shrinkwrap, npm_registry_entries.published_at AS npm_registry_entries_published_at, npm_registry_entries.package_modified_at AS npm_registry_entries_package_modified_at, npm_registry_entries.source_url AS npm_registry_entries_source_url, npm_registry_entries.version_major AS npm_registry_entries_version_major, npm_registry_entries.version_minor AS npm_registry_entries_version_minor, npm_registry_entries.version_patch AS npm_registry_entries_version_patch, npm_registry_entries.version_prerelease_key AS npm_registry_entries_version_prerelease_key \\nFROM npm_registry_entries \\nWHERE npm_registry_entries.package_name = %(package_name_1)s ORDER BY npm_registry_entries.inserted_at DESC'
 
     >>> name_and_version_query
-    'SELECT npm_registry_entries.id AS npm_registry_entries_id, npm_registry_entries.package_name AS npm_registry_entries_package_name, npm_registry_entries.package_version AS npm_registry_entries_package_version, npm_registry_entries.shasum AS npm_registry_entries_shasum, npm_registry_entries.tarball AS npm_registry_entries_tarball, npm_registry_entries.has_shrinkwrap AS npm_registry_entries_has_shrinkwrap, npm_registry_entries.published_at AS npm_registry_entries_published_at, npm_registry_entries.package_modified_at AS npm_registry_entries_package_modified_at, npm_registry_entries.source_url AS npm_registry_entries_source_url \\nFROM npm_registry_entries \\nWHERE npm_registry_entries.package_name = %(package_name_1)s AND npm_registry_entries.package_version = %(package_version_1)s ORDER BY npm_registry_entries.inserted_at DESC'
+    'SELECT npm_registry_entries.id AS npm_registry_entries_id, npm_registry_entries.package_name AS npm_registry_entries_package_name, npm_registry_entries.package_version AS npm_registry_entries_package_version, npm_registry_entries.shasum AS npm_registry_entries_shasum, npm_registry_entries.tarball AS npm_registry_entries_tarball, npm_registry_entries.has_shrinkwrap AS npm_registry_entries_has_shrinkwrap, npm_registry_entries.published_at AS npm_registry_entries_published_at, npm_registry_entries.package_modified_at AS npm_registry_entries_package_modified_at, npm_registry_entries.source_url AS npm_registry_entries_source_url, npm_registry_entries.version_major AS npm_registry_entries_version_major, npm_registry_entries.version_minor AS npm_registry_entries_version_minor, npm_registry_entries.version_patch AS npm_registry_entries_version_patch, npm_registry_entries.version_prerelease_key AS npm_registry_entries_version_prerelease_key \\nFROM npm_registry_entries \\nWHERE npm_registry_entries.package_name = %(package_name_1)s AND npm_registry_entries.package_version = %(package_version_1)s ORDER BY npm_registry_entries.inserted_at DESC'
 
     """
     query = db.session.query(NPMRegistryEntry).order_by(
@@ -1017,6 +1614,45 @@ def get_npm_registry_data(package: str, version: str) -> sqlalchemy.orm.query.Qu
     )
 
 
+def get_latest_npm_registry_data_for_package_versions(
+    package_versions: Iterable[PackageVersion],
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns the package name, version, and get_npm_registry_data fields
+    of the most recently inserted registry entry for each of the
+    given package versions.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_latest_npm_registry_data_for_package_versions([PackageVersion(name="package_foo", version="version_1")]))
+    ...
+    'SELECT DISTINCT ON (npm_registry_entries.package_name, npm_registry_entries.package_version) npm_registry_entries.package_name AS npm_registry_entries_package_name, npm_registry_entries.package_version AS npm_registry_entries_package_version, npm_registry_entries.published_at AS npm_registry_entries_published_at, npm_registry_entries.maintainers AS npm_registry_entries_maintainers, npm_registry_entries.contributors AS npm_registry_entries_contributors \\nFROM npm_registry_entries \\nWHERE (npm_registry_entries.package_name, npm_registry_entries.package_version) IN ((%(param_1)s, %(param_2)s)) ORDER BY npm_registry_entries.package_name, npm_registry_entries.package_version, npm_registry_entries.inserted_at DESC'
+    """
+    return (
+        db.session.query(
+            NPMRegistryEntry.package_name,
+            NPMRegistryEntry.package_version,
+            NPMRegistryEntry.published_at,
+            NPMRegistryEntry.maintainers,
+            NPMRegistryEntry.contributors,
+        )
+        .filter(
+            tuple_(NPMRegistryEntry.package_name, NPMRegistryEntry.package_version).in_(
+                [
+                    (package_version.name, package_version.version)
+                    for package_version in package_versions
+                ]
+            )
+        )
+        .distinct(NPMRegistryEntry.package_name, NPMRegistryEntry.package_version)
+        .order_by(
+            NPMRegistryEntry.package_name,
+            NPMRegistryEntry.package_version,
+            NPMRegistryEntry.inserted_at.desc(),
+        )
+    )
+
+
 def get_vulnerability_counts(package: str, version: str) -> sqlalchemy.orm.query.Query:
     return (
         db.session.query(
@@ -1062,6 +1698,37 @@ def get_statistics() -> Dict[str, int]:
     )
 
 
+def get_estimated_statistics() -> Dict[str, int]:
+    """
+    Returns get_statistics counts estimated from the query planner's
+    table row counts without scanning the tables.
+
+    Falls back to exact counts when a table hasn't been vacuumed or
+    analyzed yet (reltuples is -1, or 0 before Postgres 14). Estimates
+    package_versions from its row count, since (name, version) pairs
+    are unique within a language.
+    """
+    table_names = dict(
+        package_versions=PackageVersion.__tablename__,
+        advisories=Advisory.__tablename__,
+        reports=PackageReport.__tablename__,
+    )
+    estimates = dict(
+        db.session.execute(
+            sqlalchemy.text(
+                # resolve names with the search_path like unqualified queries do
+                "SELECT table_name, reltuples::bigint"
+                " FROM unnest(CAST(:table_names AS TEXT[])) AS table_name"
+                " JOIN pg_class ON pg_class.oid = to_regclass(table_name)"
+            ),
+            dict(table_names=list(table_names.values())),
+        ).fetchall()
+    )
+    if any(estimates.get(table_name, 0) <= 0 for table_name in table_names.values()):
+        return get_statistics()
+    return {key: int(estimates[table_name]) for key, table_name in table_names.items()}
+
+
 def insert_package_report_placeholder_or_update_task_id(
     package_name: str, package_version: str, task_id: str
 ) -> PackageReport:
@@ -1085,11 +1752,123 @@ def insert_package_report_placeholder_or_update_task_id(
 def store_package_report(pr: PackageReport) -> None:
     db.session.add(pr)
     db.session.commit()
+    if score_views_are_materialized():
+        refresh_report_scores([pr.id])
 
 
 def store_package_reports(prs: List[PackageReport]) -> None:
     db.session.add_all(prs)
     db.session.commit()
+    if score_views_are_materialized():
+        refresh_report_scores([pr.id for pr in prs])
+
+
+def get_package_reports_by_fingerprint(
+    fingerprints: Iterable[str],
+) -> Dict[str, PackageReport]:
+    "Returns a dict of fingerprint to saved PackageReport for the fingerprints found"
+    fingerprints = list(fingerprints)
+    if not fingerprints:
+        return dict()
+    return {
+        fingerprint: report
+        for (fingerprint, report) in db.session.query(
+            ReportFingerprint.fingerprint, PackageReport
+        )
+        .join(PackageReport, PackageReport.id == ReportFingerprint.report_id)
+        .filter(ReportFingerprint.fingerprint.in_(fingerprints))
+    }
+
+
+def save_report_fingerprints(report_ids_by_fingerprint: Dict[str, int]) -> None:
+    "Saves report fingerprints with one INSERT skipping saved fingerprints"
+    rows = [
+        dict(fingerprint=fingerprint, report_id=report_id)
+        for fingerprint, report_id in report_ids_by_fingerprint.items()
+    ]
+    if not rows:
+        return
+    db.session.execute(
+        insert(ReportFingerprint.__table__).values(rows).on_conflict_do_nothing()
+    )
+    db.session.commit()
+
+
+def get_package_dependency_rows(prs: Iterable[PackageReport],) -> List[Dict[str, int]]:
+    """
+    Returns package_dependencies rows for the dependencies
+    relationships of reports with IDs
+
+    >>> dep = PackageReport(id=2)
+    >>> get_package_dependency_rows([PackageReport(id=1, dependencies=[dep]), dep])
+    [{'depends_on_id': 1, 'used_by_id': 2}]
+    """
+    rows: List[Dict[str, int]] = []
+    for pr in prs:
+        for dep in pr.dependencies:
+            if pr.id is None or dep.id is None:
+                raise ValueError(
+                    f"cannot save dependency of report {pr.id} on unsaved report"
+                )
+            rows.append(dict(depends_on_id=pr.id, used_by_id=dep.id))
+    return rows
+
+
+def bulk_store_package_reports(prs: List[PackageReport], chunk_size: int = 500) -> None:
+    """
+    Saves new (i.e. without an ID) PackageReports and their
+    dependencies relationships to new or saved reports without
+    flushing each report and relationship through the ORM session.
+
+    Reserves IDs for the new reports from the reports ID sequence with
+    one query, inserts chunk_size reports per INSERT, inserts
+    package_dependencies rows in chunks, and commits once. Sets the IDs
+    of the new reports, which stay out of the session.
+    """
+    new_prs = [pr for pr in prs if pr.id is None]
+    if not new_prs:
+        return
+
+    for pr in new_prs:
+        # relationships to saved reports add new reports to the session
+        if pr in db.session:
+            db.session.expunge(pr)
+        for dep in pr.dependencies:
+            if sqlalchemy.inspect(dep).persistent:
+                db.session.expire(dep, ["parents"])
+
+    report_ids = [
+        report_id
+        for (report_id,) in db.session.execute(
+            sqlalchemy.text(
+                """
+                SELECT nextval(pg_get_serial_sequence('reports', 'id'))
+                FROM generate_series(1, :count)
+                """
+            ),
+            dict(count=len(new_prs)),
+        )
+    ]
+    for pr, report_id in zip(new_prs, report_ids):
+        pr.id = report_id
+
+    for chunk in grouper(new_prs, chunk_size):
+        db.session.execute(
+            insert(PackageReport.__table__).values(
+                [get_insert_row(pr) for pr in chunk if pr is not None]
+            )
+        )
+    dependency_rows = get_package_dependency_rows(new_prs)
+    for rows_chunk in grouper(dependency_rows, chunk_size):
+        db.session.execute(
+            insert(Dependency.__table__)
+            .values([row for row in rows_chunk if row is not None])
+            .on_conflict_do_nothing()
+        )
+    db.session.commit()
+    log.info(f"saved {len(new_prs)} reports with {len(dependency_rows)} dependencies")
+    if score_views_are_materialized():
+        refresh_report_scores(report_ids)
 
 
 def insert_npmsio_scores(npmsio_scores: Iterable[NPMSIOScore]) -> None:
@@ -1142,6 +1921,134 @@ def insert_npm_registry_entries(entries: Iterable[NPMRegistryEntry]) -> None:
             )
 
 
+def get_insert_row(model: db.Model, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Returns a dict of column name to value for a transient model
+    instance to pass to a Core insert. Omits the excluded columns and
+    columns with server defaults, so rows for the same model have the
+    same keys in multi-row inserts.
+
+    Like an ORM flush, saves unset JSON columns as SQL NULL instead of
+    JSON null and computes unset SemverColumnsMixin columns from the
+    version like their insert defaults.
+    """
+    row = {
+        column.name: sqlalchemy.null()
+        if column.type.should_evaluate_none and getattr(model, column.key) is None
+        else getattr(model, column.key)
+        for column in model.__table__.columns
+        if column.name not in exclude and column.server_default is None
+    }
+    if isinstance(model, SemverColumnsMixin):
+        semver_columns = get_semver_columns(
+            getattr(model, model.semver_version_column_name)
+        )
+        for column_name, value in semver_columns.items():
+            if column_name in row and row[column_name] is None:
+                row[column_name] = value
+    return row
+
+
+def bulk_insert_ignoring_conflicts(
+    models: Iterable[db.Model],
+    index_elements: List[str],
+    chunk_size: int,
+    returning: str = "id",
+) -> Tuple[List[Any], int]:
+    """
+    Inserts models of the same type in chunks of chunk_size rows with
+    one INSERT ... ON CONFLICT DO NOTHING statement and commit per
+    chunk.
+
+    Uses the model ID sequence and skips rows that conflict on the
+    unique index columns index_elements.
+
+    Returns the values of the returning column for each inserted row
+    and the number of skipped rows.
+    """
+    inserted: List[Any] = []
+    skipped = 0
+    for chunk in grouper(models, chunk_size):
+        rows = [get_insert_row(model, exclude=["id"]) for model in chunk if model]
+        if not rows:
+            continue
+        table = chunk[0].__table__
+        for row in rows:
+            row["id"] = table.c.id.default.next_value()
+
+        chunk_inserted = [
+            value
+            for (value,) in db.session.execute(
+                insert(table)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=index_elements)
+                .returning(table.c[returning])
+            )
+        ]
+        db.session.commit()
+        log.debug(
+            f"inserted {len(chunk_inserted)} and skipped"
+            f" {len(rows) - len(chunk_inserted)} {table.name} rows"
+        )
+        inserted.extend(chunk_inserted)
+        skipped += len(rows) - len(chunk_inserted)
+    return inserted, skipped
+
+
+def bulk_insert_npmsio_scores(
+    npmsio_scores: Iterable[NPMSIOScore],
+    chunk_size: int = 500,
+    inserted_package_names: Optional[Set[str]] = None,
+) -> Tuple[int, int]:
+    """
+    Inserts new npms.io scores in chunks skipping scores already saved
+    for the package name, version, and analyzed at time.
+
+    Returns the number of inserted and skipped scores and adds the
+    package names of inserted scores to inserted_package_names when
+    provided.
+    """
+    package_names, skipped = bulk_insert_ignoring_conflicts(
+        npmsio_scores,
+        ["package_name", "package_version", "analyzed_at"],
+        chunk_size,
+        returning="package_name",
+    )
+    if inserted_package_names is not None:
+        inserted_package_names.update(package_names)
+    return len(package_names), skipped
+
+
+def bulk_insert_npm_registry_entries(
+    entries: Iterable[NPMRegistryEntry], chunk_size: int = 500
+) -> Tuple[int, int]:
+    """
+    Inserts new npm registry entries in chunks skipping entries already
+    saved for the package name, version, shasum, and tarball.
+
+    Returns the number of inserted and skipped entries.
+    """
+    inserted_ids, skipped = bulk_insert_ignoring_conflicts(
+        entries, ["package_name", "package_version", "shasum", "tarball"], chunk_size,
+    )
+    return len(inserted_ids), skipped
+
+
+SCORE_CODE_CASE = """
+        CASE
+        WHEN score_view.score >= 80 THEN 'A'
+        WHEN score_view.score >= 60 THEN 'B'
+        WHEN score_view.score >= 40 THEN 'C'
+        WHEN score_view.score >= 20 THEN 'D'
+        ELSE 'E'
+        END"""
+
+# reports columns by name in model order, so columns added to reports
+# (e.g. by add_semver_columns) can't shift report_score_view columns
+REPORT_SCORE_VIEW_REPORT_COLUMNS = ", ".join(
+    f'reports."{column.name}"' for column in PackageReport.__table__.columns
+)
+
 VIEWS: Dict[str, str] = {
     "score_view": """
         CREATE OR REPLACE VIEW score_view AS
@@ -1163,25 +2070,93 @@ VIEWS: Dict[str, str] = {
         from reports
         WHERE status = 'scanned'
         """,
-    "report_score_view": """
+    "report_score_view": f"""
         CREATE OR REPLACE VIEW report_score_view AS
-        SELECT reports.*, score_view.score AS score,
-        CASE
-        WHEN score_view.score >= 80 THEN 'A'
-        WHEN score_view.score >= 60 THEN 'B'
-        WHEN score_view.score >= 40 THEN 'C'
-        WHEN score_view.score >= 20 THEN 'D'
-        ELSE 'E'
-        END as score_code
+        SELECT {REPORT_SCORE_VIEW_REPORT_COLUMNS}, score_view.score AS score,
+        {SCORE_CODE_CASE} as score_code
         from reports inner join score_view on reports.id = score_view.id
         """,
 }
 
+# reads scores from the report_scores table instead of computing them.
+# Keeps the column names, types, and order of the report_score_view in
+# VIEWS so either can replace the other.
+#
+# Left joins so reports stored without refreshing report_scores stay
+# in the view (with null scores until refreshed) like the plain view.
+MATERIALIZED_VIEWS: Dict[str, str] = {
+    "report_score_view": f"""
+        CREATE OR REPLACE VIEW report_score_view AS
+        SELECT {REPORT_SCORE_VIEW_REPORT_COLUMNS},
+        report_scores.score AS score,
+        report_scores.score_code AS score_code
+        from reports left join report_scores on reports.id = report_scores.id
+        WHERE reports.status = 'scanned'
+        """,
+}
+
+
+def score_views_are_materialized() -> bool:
+    return bool(flask.current_app.config.get("MATERIALIZE_SCORE_VIEWS", False))
+
+
+def refresh_report_scores(report_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Recomputes report_scores rows for the given report IDs from
+    score_view, or for all reports when report_ids is None.
+    """
+    ids_filter, params = "", {}
+    if report_ids is not None:
+        params["report_ids"] = [report_id for report_id in report_ids]
+        if not params["report_ids"]:
+            return
+        ids_filter = "WHERE id = ANY(CAST(:report_ids AS INTEGER[]))"
+
+    # reports might no longer be scanned, so delete before inserting
+    db.session.execute(
+        sqlalchemy.text(f"DELETE FROM report_scores {ids_filter}"), params
+    )
+    db.session.execute(
+        sqlalchemy.text(
+            f"""
+            INSERT INTO report_scores (id, score, score_code)
+            SELECT id, score, {SCORE_CODE_CASE}
+            FROM score_view
+            {ids_filter}
+            """
+        ),
+        params,
+    )
+    db.session.commit()
+
+
+def refresh_missing_report_scores() -> None:
+    """
+    Adds report_scores rows for scanned reports without one e.g.
+    reports stored while MATERIALIZE_SCORE_VIEWS was off.
+    """
+    db.session.execute(
+        sqlalchemy.text(
+            f"""
+            INSERT INTO report_scores (id, score, score_code)
+            SELECT score_view.id, score_view.score, {SCORE_CODE_CASE}
+            FROM score_view
+            LEFT JOIN report_scores ON report_scores.id = score_view.id
+            WHERE report_scores.id IS NULL
+            """
+        )
+    )
+    db.session.commit()
 
-def create_views(engine: sqlalchemy.engine.Engine) -> None:
+
+def create_views(engine: sqlalchemy.engine.Engine, materialized: bool = False) -> None:
     connection = engine.connect()
-    log.info(f"creating views if they don't exist: {list(VIEWS.keys())}")
-    for view_command in VIEWS.values():
+    views = {**VIEWS, **MATERIALIZED_VIEWS} if materialized else VIEWS
+    log.info(
+        f"creating views if they don't exist: {list(views.keys())}"
+        f" {'backed by report_scores' if materialized else ''}"
+    )
+    for view_command in views.values():
         _ = connection.execute(view_command)
     connection.close()
 
@@ -1202,7 +2177,14 @@ def create_tables_and_views(app: flask.app.Flask) -> None:
                 for table_name in non_view_table_names
             ],
         )
-        create_views(db.engine)
+        add_semver_columns()
+        create_missing_indexes(PackageReport.__table__)
+        backfill_package_graph_links()
+        materialized = score_views_are_materialized()
+        create_views(db.engine, materialized)
+        if materialized:
+            log.info("populating report_scores for reports without scores")
+            refresh_missing_report_scores()
 
 
 def get_advisories_by_package_versions(
@@ -1224,6 +2206,42 @@ def get_advisories_by_package_versions(
     )
 
 
+def get_advisories_by_package_version_ids(
+    package_version_ids: Iterable[PackageVersionID],
+) -> sqlalchemy.orm.query.Query:
+    """
+    Returns (PackageVersion ID, Advisory) pairs for all advisories
+    that directly impact the provided PackageVersion IDs.
+
+    >>> from depobs.website.do import create_app
+    >>> with create_app(dict(INIT_DB=False)).app_context():
+    ...     str(get_advisories_by_package_version_ids([932]))
+    ...
+    'SELECT anon_1.package_version_id AS anon_1_package_version_id, advisories.id AS advisories_id, advisories.language AS advisories_language, advisories.package_name AS advisories_package_name, advisories.npm_advisory_id AS advisories_npm_advisory_id, advisories.url AS advisories_url, advisories.severity AS advisories_severity, advisories.cwe AS advisories_cwe, advisories.exploitability AS advisories_exploitability, advisories.title AS advisories_title \\nFROM advisories JOIN (SELECT advisories.id AS advisory_id, unnest(advisories.vulnerable_package_version_ids) AS package_version_id \\nFROM advisories \\nWHERE advisories.vulnerable_package_version_ids && %(vulnerable_package_version_ids_1)s) AS anon_1 ON advisories.id = anon_1.advisory_id \\nWHERE anon_1.package_version_id IN (%(package_version_id_1)s)'
+    """
+    package_version_ids = list(package_version_ids)
+    advisory_package_version_ids = (
+        db.session.query(
+            Advisory.id.label("advisory_id"),
+            func.unnest(Advisory.vulnerable_package_version_ids).label(
+                "package_version_id"
+            ),
+        )
+        .filter(Advisory.vulnerable_package_version_ids.overlap(package_version_ids))
+        .subquery()
+    )
+    return (
+        db.session.query(advisory_package_version_ids.c.package_version_id, Advisory)
+        .join(
+            advisory_package_version_ids,
+            Advisory.id == advisory_package_version_ids.c.advisory_id,
+        )
+        .filter(
+            advisory_package_version_ids.c.package_version_id.in_(package_version_ids)
+        )
+    )
+
+
 def add_new_package_version(pkg: Dict) -> None:
     get_package_version_id_query(pkg).one_or_none() or db.session.add(
         PackageVersion(
@@ -1286,19 +2304,327 @@ def insert_package_graph(task_data: Dict) -> None:
                 ).first()
             link_ids.append(link_id)
 
-    db.session.add(
-        PackageGraph(
-            root_package_version_id=get_package_version_id_query(
-                task_data["root"]
-            ).first()
-            if task_data["root"]
-            else None,
-            link_ids=link_ids,
-            package_manager="yarn" if "yarn" in task_data["command"] else "npm",
-            package_manager_version=None,
+    db_graph = PackageGraph(
+        root_package_version_id=get_package_version_id_query(task_data["root"]).first()
+        if task_data["root"]
+        else None,
+        link_ids=link_ids,
+        package_manager="yarn" if "yarn" in task_data["command"] else "npm",
+        package_manager_version=None,
+    )
+    db.session.add(db_graph)
+    db.session.flush()
+    insert_package_graph_links(db_graph.id, (link_id for (link_id,) in link_ids))
+    db.session.commit()
+
+
+def insert_package_graph_links(
+    graph_id: int, link_ids: Iterable[PackageLinkID]
+) -> None:
+    "Adds package links to a package graph with one INSERT without committing"
+    rows = [
+        dict(graph_id=graph_id, link_id=link_id) for link_id in dict.fromkeys(link_ids)
+    ]
+    if rows:
+        db.session.execute(
+            insert(PackageGraphLink.__table__).values(rows).on_conflict_do_nothing()
+        )
+
+
+def backfill_package_graph_links() -> None:
+    """
+    Copies PackageGraph.link_ids into package_graph_links for graphs
+    without any package_graph_links rows.
+
+    Handles flat and nested link ID arrays, since unnest returns every
+    element of a multidimensional array.
+    """
+    result = db.session.execute(
+        """
+        INSERT INTO package_graph_links (graph_id, link_id)
+        SELECT DISTINCT package_graphs.id, unnest(package_graphs.link_ids)
+        FROM package_graphs
+        WHERE package_graphs.link_ids IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM package_graph_links
+            WHERE package_graph_links.graph_id = package_graphs.id
         )
+        ON CONFLICT DO NOTHING
+        """
     )
     db.session.commit()
+    log.info(f"backfilled {result.rowcount} package graph links")
+
+
+def add_semver_columns(chunk_size: int = 1000) -> None:
+    """
+    Adds and backfills SemverColumnsMixin columns and indexes for
+    tables created without them.
+
+    Drops the score views first when adding columns to reports, since
+    score_view selects reports.* and create_views recreates them with
+    the new columns.
+    """
+    inspector = sqlalchemy.inspect(db.engine)
+    for model in (PackageVersion, NPMRegistryEntry, PackageReport):
+        table = model.__table__
+        saved_column_names = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        missing_columns = [
+            table.c[column_name]
+            for column_name in SEMVER_COLUMN_NAMES
+            if column_name not in saved_column_names
+        ]
+        if missing_columns:
+            log.info(f"adding semver columns to {table.name}")
+            if model is PackageReport:
+                for view_name in reversed(list(VIEWS.keys())):
+                    db.session.execute(f"DROP VIEW IF EXISTS {view_name}")
+            for column in missing_columns:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                )
+            db.session.commit()
+            backfill_semver_columns(model, chunk_size)
+
+        # also creates indexes missing from tables with the columns
+        create_missing_indexes(table, [f"{table.name}_semver_idx"])
+
+
+def create_missing_indexes(
+    table: Table, index_names: Optional[List[str]] = None
+) -> None:
+    """
+    Creates indexes (all or only index_names) of a table created
+    without them
+    """
+    saved_index_names = {
+        index["name"] for index in sqlalchemy.inspect(db.engine).get_indexes(table.name)
+    }
+    for index in table.indexes:
+        if index.name in saved_index_names:
+            continue
+        if index_names is not None and index.name not in index_names:
+            continue
+        log.info(f"creating index {index.name}")
+        index.create(bind=db.engine)
+
+
+def backfill_semver_columns(
+    model: Type[SemverColumnsMixin], chunk_size: int = 1000
+) -> None:
+    """
+    Sets the semver columns for saved rows of a SemverColumnsMixin
+    model with valid versions and null semver columns.
+
+    Parses each distinct version once and updates chunk_size versions
+    per statement.
+    """
+    table_name = model.__tablename__  # type: ignore
+    version_column = getattr(model, model.semver_version_column_name)
+    versions = [
+        version
+        for (version,) in db.session.query(version_column)
+        .filter(model.version_major == None)
+        .distinct()
+    ]
+    parsed_versions = (
+        (version, parsed)
+        for version, parsed in (
+            (version, parse_semver(version)) for version in versions
+        )
+        if parsed is not None
+    )
+    updated = 0
+    for chunk in grouper(parsed_versions, chunk_size):
+        chunk = [
+            version_and_parsed for version_and_parsed in chunk if version_and_parsed
+        ]
+        result = db.session.execute(
+            sqlalchemy.text(
+                f"""
+                UPDATE {table_name}
+                SET version_major = parsed.major,
+                version_minor = parsed.minor,
+                version_patch = parsed.patch,
+                version_prerelease_key = parsed.prerelease_key
+                FROM unnest(
+                    CAST(:versions AS TEXT[]),
+                    CAST(:majors AS BIGINT[]),
+                    CAST(:minors AS BIGINT[]),
+                    CAST(:patches AS BIGINT[]),
+                    CAST(:prerelease_keys AS TEXT[])
+                ) AS parsed(version, major, minor, patch, prerelease_key)
+                WHERE {table_name}.{version_column.name} = parsed.version
+                """
+            ),
+            dict(
+                versions=[version for version, _ in chunk],
+                majors=[parsed.major for _, parsed in chunk],
+                minors=[parsed.minor for _, parsed in chunk],
+                patches=[parsed.patch for _, parsed in chunk],
+                prerelease_keys=[parsed.prerelease_key for _, parsed in chunk],
+            ),
+        )
+        db.session.commit()
+        updated += result.rowcount
+    log.info(f"backfilled semver columns for {updated} {table_name} rows")
+
+
+def get_package_version_ids_by_name_and_version(
+    names_and_versions: Iterable[Tuple[str, str]]
+) -> Dict[Tuple[str, str], PackageVersionID]:
+    """
+    Returns a dict of (name, version) to node PackageVersion ID for the
+    given names and versions found in the DB using one query.
+    """
+    names_and_versions = list(names_and_versions)
+    if not names_and_versions:
+        return dict()
+    return {
+        (name, version): package_version_id
+        for (package_version_id, name, version) in db.session.query(
+            PackageVersion.id, PackageVersion.name, PackageVersion.version
+        ).filter(
+            PackageVersion.language == "node",
+            tuple_(PackageVersion.name, PackageVersion.version).in_(names_and_versions),
+        )
+    }
+
+
+def get_package_version_ids_by_names(names: Iterable[str],) -> Set[PackageVersionID]:
+    "Returns the node PackageVersion IDs for all versions of the given package names"
+    names = list(set(names))
+    if not names:
+        return set()
+    return set(
+        package_version_id
+        for (package_version_id,) in db.session.query(PackageVersion.id).filter(
+            PackageVersion.language == "node", PackageVersion.name.in_(names)
+        )
+    )
+
+
+def get_package_link_ids_by_parent_and_child_id(
+    links: Iterable[Tuple[PackageVersionID, PackageVersionID]]
+) -> Dict[Tuple[PackageVersionID, PackageVersionID], PackageLinkID]:
+    """
+    Returns a dict of (parent_package_id, child_package_id) to
+    PackageLink ID for the given links found in the DB using one query.
+    """
+    links = list(links)
+    if not links:
+        return dict()
+    return {
+        (parent_package_id, child_package_id): link_id
+        for (link_id, parent_package_id, child_package_id) in db.session.query(
+            PackageLink.id, PackageLink.parent_package_id, PackageLink.child_package_id
+        ).filter(
+            tuple_(PackageLink.parent_package_id, PackageLink.child_package_id).in_(
+                links
+            )
+        )
+    }
+
+
+def bulk_insert_package_graph(task_data: Dict) -> PackageGraph:
+    """
+    Saves the PackageVersions, PackageLinks, and PackageGraph from a
+    serialized list_metadata task in one transaction.
+
+    Unlike insert_package_graph, uses a fixed number of queries
+    regardless of the number of dependencies: inserts all new package
+    versions and links with INSERT ... ON CONFLICT DO NOTHING and then
+    selects their IDs.
+    """
+    task_deps: List[Dict] = task_data.get("dependencies", [])
+
+    package_version_rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for task_dep in task_deps:
+        package_version_rows.setdefault(
+            (task_dep["name"], task_dep["version"]),
+            dict(
+                # render nextval() for every row of the multi-row insert
+                # (SQLAlchemy only does it for the first row)
+                id=PackageVersion.__table__.c.id.default.next_value(),
+                name=task_dep["name"],
+                version=task_dep["version"],
+                language="node",
+                # is null for the root for npm list and yarn list output
+                url=task_dep.get("resolved", None),
+                # Core inserts don't run the defaults for every row
+                **get_semver_columns(task_dep["version"]),
+            ),
+        )
+    if package_version_rows:
+        db.session.execute(
+            insert(PackageVersion.__table__)
+            .values(list(package_version_rows.values()))
+            .on_conflict_do_nothing(index_elements=["name", "version", "language"])
+        )
+    package_version_ids = get_package_version_ids_by_name_and_version(
+        package_version_rows.keys()
+    )
+
+    # (parent_package_id, child_package_id) in task output order
+    links: Dict[Tuple[PackageVersionID, PackageVersionID], None] = {}
+    for task_dep in task_deps:
+        parent_package_id = package_version_ids[(task_dep["name"], task_dep["version"])]
+        for dep in task_dep.get("dependencies", []):
+            # is fully qualified semver for npm (or file: or github: url), semver for yarn
+            name, version = dep.rsplit("@", 1)
+            child_package_id = package_version_ids.get((name, version), None)
+            if child_package_id is None:
+                log.warning(
+                    f"skipping link from {task_dep['name']}@{task_dep['version']}"
+                    f" to {dep} missing from list output"
+                )
+                continue
+            links[(parent_package_id, child_package_id)] = None
+    if links:
+        db.session.execute(
+            insert(PackageLink.__table__)
+            .values(
+                [
+                    dict(
+                        id=PackageLink.__table__.c.id.default.next_value(),
+                        parent_package_id=parent_package_id,
+                        child_package_id=child_package_id,
+                    )
+                    for (parent_package_id, child_package_id) in links.keys()
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=["child_package_id", "parent_package_id"]
+            )
+        )
+    link_ids_by_parent_and_child_id = get_package_link_ids_by_parent_and_child_id(
+        links.keys()
+    )
+
+    root = task_data["root"]
+    db_graph = PackageGraph(
+        root_package_version_id=package_version_ids.get(
+            (root["name"], root["version"]), None
+        )
+        if root
+        else None,
+        package_manager="yarn" if "yarn" in task_data["command"] else "npm",
+        package_manager_version=None,
+    )
+    db.session.add(db_graph)
+    db.session.flush()
+    insert_package_graph_links(
+        db_graph.id, (link_ids_by_parent_and_child_id[link] for link in links.keys())
+    )
+    db.session.commit()
+    log.info(
+        f"saved graph with {len(package_version_rows)} package versions"
+        f" and {len(links)} links"
+    )
+    return db_graph
 
 
 def insert_advisories(advisories: Iterable[Advisory]) -> None:
@@ -1311,22 +2637,11 @@ def insert_advisories(advisories: Iterable[Advisory]) -> None:
 def update_advisory_vulnerable_package_versions(
     advisory: Advisory, impacted_versions: Set[str]
 ) -> None:
-    # make sure the advisory we want to update is already in the db
-    db_advisory = (
-        db.session.query(Advisory.id, Advisory.vulnerable_package_version_ids)
-        .filter_by(language="node", url=advisory.url)
-        .first()
-    )
     # look up PackageVersions for known impacted versions
     impacted_version_package_ids = list(
-        vid
-        for result in db.session.query(PackageVersion.id)
-        .filter(
-            PackageVersion.name == advisory.package_name,
-            PackageVersion.version.in_(impacted_versions),
-        )
-        .all()
-        for vid in result
+        get_package_version_ids_by_name_and_version(
+            (advisory.package_name, version) for version in impacted_versions
+        ).values()
     )
     if len(impacted_versions) != len(impacted_version_package_ids):
         log.warning(
@@ -1335,25 +2650,153 @@ def update_advisory_vulnerable_package_versions(
             f" {impacted_versions} {impacted_version_package_ids}"
         )
 
-    # handle null Advisory.vulnerable_package_version_ids
-    if db_advisory.vulnerable_package_version_ids is None:
-        db.session.query(Advisory.id).filter_by(id=db_advisory.id).update(
-            dict(vulnerable_package_version_ids=list())
+    merge_advisory_vulnerable_package_version_ids(
+        {advisory.url: set(impacted_version_package_ids)}
+    )
+    db.session.commit()
+
+
+def merge_advisory_vulnerable_package_version_ids(
+    package_version_ids_by_advisory_url: Dict[str, Set[PackageVersionID]]
+) -> Set[PackageVersionID]:
+    """
+    Adds package version IDs to the vulnerable_package_version_ids of
+    the node advisories with the given URLs using one UPDATE.
+
+    The union is computed from the row being updated, so concurrent
+    updates to the same advisory don't lose IDs.
+
+    Returns the package version IDs that weren't already linked to the
+    advisories they were added to.
+    """
+    urls, package_version_ids = [], []
+    for url, url_package_version_ids in package_version_ids_by_advisory_url.items():
+        for package_version_id in url_package_version_ids:
+            urls.append(url)
+            package_version_ids.append(package_version_id)
+    if not urls:
+        return set()
+
+    # in RETURNING advisories has the updated row and old_advisories
+    # the row before the update
+    newly_linked_rows = db.session.execute(
+        sqlalchemy.text(
+            """
+            UPDATE advisories
+            SET vulnerable_package_version_ids = ARRAY(
+                SELECT DISTINCT unnest(
+                    COALESCE(advisories.vulnerable_package_version_ids, '{}')
+                    || impacted.package_version_ids
+                )
+                ORDER BY 1
+            )
+            FROM (
+                SELECT url, array_agg(package_version_id) AS package_version_ids
+                FROM unnest(
+                    CAST(:urls AS VARCHAR[]), CAST(:package_version_ids AS INTEGER[])
+                ) AS impacted_rows(url, package_version_id)
+                GROUP BY url
+            ) AS impacted, advisories AS old_advisories
+            WHERE advisories.language = 'node' AND advisories.url = impacted.url
+            AND old_advisories.id = advisories.id
+            RETURNING ARRAY(
+                SELECT unnest(impacted.package_version_ids)
+                EXCEPT
+                SELECT unnest(old_advisories.vulnerable_package_version_ids)
+            )
+            """
+        ),
+        dict(urls=urls, package_version_ids=package_version_ids),
+    ).fetchall()
+    return set(
+        package_version_id
+        for (newly_linked_ids,) in newly_linked_rows
+        for package_version_id in newly_linked_ids
+    )
+
+
+def bulk_insert_advisories_and_link_package_versions(
+    advisories_and_impacted_versions: Iterable[Tuple[Advisory, AbstractSet[str]]]
+) -> Set[PackageVersionID]:
+    """
+    Saves new node advisories and adds their impacted versions to
+    their vulnerable_package_version_ids in one transaction.
+
+    Takes (advisory, impacted versions) pairs (e.g. from npm audit
+    output) and uses a fixed number of queries per batch: one each to
+    lock the advisory URLs, find saved advisories, resolve package
+    version IDs, insert new advisories, and update the vulnerable
+    package version IDs.
+
+    Returns the IDs of the impacted package versions newly linked to
+    an advisory to rescore. Package versions already linked to the
+    advisory (e.g. from a previous scan) aren't returned.
+    """
+    advisories_by_url: Dict[str, Advisory] = {}
+    impacted_versions_by_url: Dict[str, Set[str]] = {}
+    for advisory, impacted_versions in advisories_and_impacted_versions:
+        advisories_by_url.setdefault(advisory.url, advisory)
+        impacted_versions_by_url.setdefault(advisory.url, set()).update(
+            impacted_versions
         )
+    if not advisories_by_url:
+        return set()
+
+    # serialize inserting the same advisories from concurrent workers
+    # until the transaction commits; sort to lock in a consistent order
+    db.session.execute(
+        sqlalchemy.text(
+            """
+            SELECT pg_advisory_xact_lock(hashtext(url))
+            FROM (SELECT unnest(CAST(:urls AS VARCHAR[])) AS url ORDER BY url) AS urls
+            """
+        ),
+        dict(urls=sorted(advisories_by_url.keys())),
+    )
+    saved_urls: Set[str] = set(
+        url
+        for (url,) in db.session.query(Advisory.url).filter(
+            Advisory.language == "node", Advisory.url.in_(advisories_by_url.keys())
+        )
+    )
+    # TODO: update advisory fields if the advisory to insert is newer
+    db.session.add_all(
+        advisory
+        for (url, advisory) in advisories_by_url.items()
+        if url not in saved_urls
+    )
+    db.session.flush()
 
-    # TODO: lock the row?
-    vpvids = set(
-        list(
-            db.session.query(Advisory)
-            .filter_by(id=db_advisory.id)
-            .first()
-            .vulnerable_package_version_ids
+    package_version_ids_by_name_and_version = get_package_version_ids_by_name_and_version(
+        set(
+            (advisories_by_url[url].package_name, version)
+            for (url, impacted_versions) in impacted_versions_by_url.items()
+            for version in impacted_versions
         )
     )
-    vpvids.update(set(impacted_version_package_ids))
+    package_version_ids_by_advisory_url: Dict[str, Set[PackageVersionID]] = {}
+    for url, impacted_versions in impacted_versions_by_url.items():
+        package_name = advisories_by_url[url].package_name
+        package_version_ids_by_advisory_url[url] = set(
+            package_version_ids_by_name_and_version[(package_name, version)]
+            for version in impacted_versions
+            if (package_name, version) in package_version_ids_by_name_and_version
+        )
+        if len(impacted_versions) != len(package_version_ids_by_advisory_url[url]):
+            log.warning(
+                f"missing package versions for {package_name!r}"
+                f" in the db or misparsed audit output version:"
+                f" {impacted_versions} {package_version_ids_by_advisory_url[url]}"
+            )
 
-    # update the vulnerable_package_version_ids for the advisory
-    db.session.query(Advisory.id).filter_by(id=db_advisory.id).update(
-        dict(vulnerable_package_version_ids=sorted(vpvids))
+    newly_linked_package_version_ids = merge_advisory_vulnerable_package_version_ids(
+        package_version_ids_by_advisory_url
     )
     db.session.commit()
+    log.info(
+        f"saved {len(advisories_by_url) - len(saved_urls)} new advisories and"
+        f" linked {sum(len(ids) for ids in package_version_ids_by_advisory_url.values())}"
+        f" package versions ({len(newly_linked_package_version_ids)} new) to"
+        f" {len(advisories_by_url)} advisories"
+    )
+    return newly_linked_package_version_ids
@@ -1,4 +1,5 @@
 import asyncio
+import collections
 import contextlib
 import functools
 import sys
@@ -70,6 +71,13 @@ class Exec:
         self.exec_id: str = exec_id
         self.container: aiodocker.docker.DockerContainer = container
         self.start_result: Optional[bytes] = None
+        # decoded output when started with start_spooled
+        self.output: Optional[docker_log_reader.DockerLogSpool] = None
+        # set when the attached output stream ended i.e. the process exited
+        self.output_ended: bool = False
+        self.last_inspect: Optional[DockerExecInspectResult] = None
+        # number of docker API calls by endpoint for debugging
+        self.api_call_counts: Dict[str, int] = collections.Counter()
 
     @classmethod
     async def create(
@@ -81,7 +89,9 @@ class Exec:
         data = await container.docker._query_json(
             f"containers/{container._id}/exec", method="POST", data=kwargs
         )
-        return cls(data["Id"], container)
+        exec_ = cls(data["Id"], container)
+        exec_.api_call_counts["create"] += 1
+        return exec_
 
     async def start(self: "Exec", timeout: int = None, **kwargs) -> bytes:
         """
@@ -99,10 +109,65 @@ class Exec:
             data=json.dumps(kwargs),
             timeout=timeout,
         )
+        self.api_call_counts["start"] += 1
         async with response_cm as response:
             result = await response.read()
             response.release()
-            return result
+        self.output_ended = not kwargs.get("Detach", False)
+        return result
+
+    async def iter_start(
+        self: "Exec", timeout: Optional[int] = None, **kwargs
+    ) -> AsyncGenerator[
+        Tuple[docker_log_reader.DockerLogStream, docker_log_reader.DockerLogMessage],
+        None,
+    ]:
+        """
+        Start executing a process
+
+        yields decoded (stream, content) output messages as they arrive.
+        """
+        response_cm = self.container.docker._query(
+            f"exec/{self.exec_id}/start",
+            method="POST",
+            headers={"content-type": "application/json"},
+            data=json.dumps(kwargs),
+            timeout=timeout,
+        )
+        # output isn't multiplexed with a tty
+        tty = kwargs.get("Tty", False)
+        decoder = docker_log_reader.DockerLogDecoder()
+        self.api_call_counts["start"] += 1
+        async with response_cm as response:
+            async for chunk in response.content.iter_any():
+                if tty:
+                    yield docker_log_reader.DockerLogStream.STDOUT, chunk
+                    continue
+                for msg in decoder.feed(chunk):
+                    yield msg
+        decoder.close()
+        self.output_ended = not kwargs.get("Detach", False)
+
+    async def start_spooled(
+        self: "Exec",
+        spool_max_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        **kwargs,
+    ) -> docker_log_reader.DockerLogSpool:
+        """
+        Start executing a process
+
+        returns its decoded output spooled to temp files once larger than
+        spool_max_size bytes.
+        """
+        output = docker_log_reader.DockerLogSpool(spool_max_size)
+        try:
+            async for stream, content in self.iter_start(timeout=timeout, **kwargs):
+                output.write(stream, content)
+        except BaseException:
+            output.close()
+            raise
+        return output
 
     async def resize(self: "Exec", **kwargs) -> None:
         await self.container.docker._query(
@@ -110,24 +175,52 @@ class Exec:
         )
 
     async def inspect(self: "Exec") -> DockerExecInspectResult:
+        self.api_call_counts["inspect"] += 1
         data = await self.container.docker._query_json(
             f"exec/{self.exec_id}/json", method="GET"
         )
+        self.last_inspect = data
         return data
 
-    async def wait(self: "Exec") -> None:
+    async def wait(
+        self: "Exec", min_delay: float = 0.01, max_delay: float = 1.0
+    ) -> DockerExecInspectResult:
+        """
+        Waits for the process to exit and returns its last inspect result
+
+        An attached exec has exited once its output stream ends, so
+        inspects it for its exit code and only retries every min_delay
+        seconds while docker still reports it running. Otherwise polls
+        inspect with exponential backoff from min_delay to max_delay
+        seconds.
+        """
+        if self.output_ended:
+            resp = await self.inspect()
+            while resp["Running"] is not False:
+                log.debug(f"exec {self.exec_id} output ended but still running")
+                await asyncio.sleep(min_delay)
+                resp = await self.inspect()
+            return resp
+
+        log.debug(f"exec {self.exec_id} is detached; polling for it to exit")
+        delay = min_delay
         while True:
             resp = await self.inspect()
-            log.debug("Exec wait resp:", resp)
+            log.debug(f"Exec wait resp: {resp}")
             if resp["Running"] is False:
-                break
-            else:
-                await asyncio.sleep(0.1)
+                return resp
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
 
     @property
     def decoded_start_result_stdout_and_stderr_line_iters(
         self: "Exec",
     ) -> Tuple[Generator[str, None, None], Generator[str, None, None]]:
+        if self.output is not None:
+            return (
+                self.output.iter_lines(docker_log_reader.DockerLogStream.STDOUT),
+                self.output.iter_lines(docker_log_reader.DockerLogStream.STDERR),
+            )
         assert self.start_result is not None
         return docker_log_reader.stdout_stderr_line_iters(
             docker_log_reader.iter_messages(self.start_result)
@@ -135,6 +228,10 @@ class Exec:
 
     @property
     def decoded_start_result_stdout(self: "Exec") -> List[str]:
+        if self.output is not None:
+            return list(
+                self.output.iter_lines(docker_log_reader.DockerLogStream.STDOUT)
+            )
         assert self.start_result is not None
         return list(
             docker_log_reader.iter_lines(
@@ -164,9 +261,15 @@ async def _run(
     # fpr specific args
     wait: bool = True,
     check: bool = True,
+    stream_output: bool = False,
+    spool_max_size: Optional[int] = None,
     **kwargs,
 ) -> Exec:
     """Create and run an instance of exec (Instance of Exec). Optionally wait for it to finish and check its exit code
+
+    With stream_output decodes output as it arrives into exec_.output
+    (spooling it to disk once larger than spool_max_size bytes) instead
+    of reading it into exec_.start_result.
     """
     config = dict(
         Cmd=shlex.split(cmd),
@@ -179,12 +282,18 @@ async def _run(
     container_log_name = self["Name"] if "Name" in self._container else self["Id"]
     log.debug(f"container {container_log_name} in {working_dir} running {cmd!r}")
     exec_ = await self.exec_create(**config)
-    exec_.start_result = await exec_.start(Detach=detach, Tty=tty)
+    if stream_output:
+        exec_.output = await exec_.start_spooled(spool_max_size, Detach=detach, Tty=tty)
+    else:
+        exec_.start_result = await exec_.start(Detach=detach, Tty=tty)
 
     if wait:
         await exec_.wait()
     if check:
-        last_inspect = await exec_.inspect()
+        # reuse the inspect result from waiting for the process to exit
+        last_inspect = exec_.last_inspect if wait else None
+        if last_inspect is None:
+            last_inspect = await exec_.inspect()
         if last_inspect["ExitCode"] != 0:
             stdout, stderr = [
                 "\n".join(line_iter)
@@ -202,6 +311,39 @@ async def _run(
 aiodocker.containers.DockerContainer.run = _run
 
 
+async def start(
+    client: aiodocker.docker.Docker,
+    repository_tag: str,
+    name: str,
+    cmd: Optional[str] = None,
+    entrypoint: Optional[str] = None,
+    working_dir: Optional[str] = None,
+) -> aiodocker.docker.DockerContainer:
+    "Starts and returns a container with its info"
+    config: Dict[str, Any] = dict(
+        Cmd=cmd,
+        Image=repository_tag,
+        LogConfig={"Type": "json-file"},
+        AttachStdout=True,
+        AttachStderr=True,
+        Tty=True,
+        HostConfig={
+            # "ContainerIDFile": "./"
+            "Mounts": []
+        },
+    )
+    if entrypoint:
+        config["Entrypoint"] = entrypoint
+    if working_dir:
+        config["WorkingDir"] = working_dir
+    log.info(f"starting image {repository_tag} as {name}")
+    log.debug(f"container {name} starting {cmd} with config {config}")
+    container = await client.containers.run(config=config, name=name)
+    # fetch container info so we can include container name in logs
+    await container.show()
+    return container
+
+
 @contextlib.asynccontextmanager
 async def run(
     repository_tag: str,
@@ -211,27 +353,14 @@ async def run(
     working_dir: Optional[str] = None,
 ) -> AsyncGenerator[aiodocker.docker.DockerContainer, None]:
     async with aiodocker_client() as client:
-        config: Dict[str, Any] = dict(
-            Cmd=cmd,
-            Image=repository_tag,
-            LogConfig={"Type": "json-file"},
-            AttachStdout=True,
-            AttachStderr=True,
-            Tty=True,
-            HostConfig={
-                # "ContainerIDFile": "./"
-                "Mounts": []
-            },
+        container = await start(
+            client,
+            repository_tag,
+            name,
+            cmd=cmd,
+            entrypoint=entrypoint,
+            working_dir=working_dir,
         )
-        if entrypoint:
-            config["Entrypoint"] = entrypoint
-        if working_dir:
-            config["WorkingDir"] = working_dir
-        log.info(f"starting image {repository_tag} as {name}")
-        log.debug(f"container {name} starting {cmd} with config {config}")
-        container = await client.containers.run(config=config, name=name)
-        # fetch container info so we can include container name in logs
-        await container.show()
         try:
             yield container
         except DockerRunException as e:
@@ -303,7 +432,9 @@ async def ensure_repo(
     test_repo_exec: Exec = await container.run(
         f"test -d repo", wait=True, check=False, working_dir=working_dir
     )
-    test_repo_exec_inspect_result = await test_repo_exec.inspect()
+    test_repo_exec_inspect_result = (
+        test_repo_exec.last_inspect or await test_repo_exec.inspect()
+    )
     log.debug(f"test repo result: {test_repo_exec_inspect_result}")
     if test_repo_exec_inspect_result["ExitCode"] == 0:
         log.debug(
@@ -3,14 +3,18 @@ import logging
 import struct
 import sys
 import itertools
+import tempfile
 from io import BytesIO
 from typing import (
     BinaryIO,
     Callable,
+    Dict,
     Generator,
     IO,
     Iterable,
     Iterator,
+    List,
+    Optional,
     Sequence,
     Tuple,
     TypeVar,
@@ -81,23 +85,86 @@ def read_message(msg_bytes: bytes) -> Tuple[DockerLogStream, bytes, bytes]:
     )
 
 
+def _raise_incomplete_message(msg_bytes: Union[bytes, bytearray], offset: int) -> None:
+    remaining = len(msg_bytes) - offset
+    if remaining < HEADER_LENGTH:
+        raise DockerLogReadError(
+            f"Too few bytes in {bytes(msg_bytes[offset:])!r}. Need at least {HEADER_LENGTH}."
+        )
+    _, msg_length_from_header = struct.unpack_from(LOG_HEADER_FORMAT, msg_bytes, offset)
+    raise DockerLogReadError(
+        f"message header wants {msg_length_from_header} bytes but message only has {remaining - HEADER_LENGTH} left"
+    )
+
+
+def _iter_complete_messages(
+    msg_bytes: Union[bytes, bytearray], offset: int = 0
+) -> Generator[Tuple[DockerLogStream, DockerLogMessage, int], None, None]:
+    """
+    Yields the stream, content, and end offset of each complete message
+    in msg_bytes from offset
+
+    Reads headers and slices content at offsets into a memoryview so
+    only message contents are copied.
+    """
+    with memoryview(msg_bytes) as view:
+        end_offset = len(view)
+        while end_offset - offset >= HEADER_LENGTH:
+            stream_no, msg_length_from_header = struct.unpack_from(
+                LOG_HEADER_FORMAT, view, offset
+            )
+            stream = stream_no_to_DockerLogStream(stream_no)
+            content_start = offset + HEADER_LENGTH
+            content_end = content_start + msg_length_from_header
+            if content_end > end_offset:
+                break
+            yield stream, bytes(view[content_start:content_end]), content_end
+            offset = content_end
+
+
 def iter_messages(
     msg_bytes: bytes,
 ) -> Generator[Tuple[DockerLogStream, DockerLogMessage], None, None]:
-    msg_bytes_remaining = msg_bytes
     log.debug(f"itering through {len(msg_bytes)} msg bytes")
-    while True:
-        if not msg_bytes_remaining:
-            log.debug(f"nothing to read from {msg_bytes_remaining!r}")
-            break
-
-        stream, content, msg_bytes_remaining = read_message(msg_bytes_remaining)
-        log.debug(
-            f"read msg {stream!r} ({len(content)} bytes, {len(msg_bytes_remaining)} left) {content!r}"
-        )
+    offset = 0
+    for stream, content, offset in _iter_complete_messages(msg_bytes):
         yield stream, content
-        if not msg_bytes_remaining:
-            break
+    if offset < len(msg_bytes):
+        _raise_incomplete_message(msg_bytes, offset)
+
+
+class DockerLogDecoder:
+    """
+    Incrementally decodes docker log messages from chunks of bytes as
+    they arrive e.g. from an attached exec response
+
+    Buffers at most one partial message between chunks.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> List[Tuple[DockerLogStream, DockerLogMessage]]:
+        "Returns the messages completed by chunk"
+        msg_bytes: Union[bytes, bytearray] = chunk
+        if self._buf:
+            self._buf += chunk
+            msg_bytes = self._buf
+
+        msgs, offset = [], 0
+        for stream, content, offset in _iter_complete_messages(msg_bytes):
+            msgs.append((stream, content))
+
+        if msg_bytes is self._buf:
+            del self._buf[:offset]
+        elif offset < len(chunk):
+            self._buf += memoryview(chunk)[offset:]
+        return msgs
+
+    def close(self) -> None:
+        "Raises a DockerLogReadError if a partial message is left"
+        if self._buf:
+            _raise_incomplete_message(self._buf, 0)
 
 
 def partition(
@@ -127,27 +194,105 @@ def split_streams(
     )
 
 
+class LineAssembler:
+    """
+    Incrementally splits message contents into '\n' delimited lines
+    decoded as utf8
+
+    Buffers partial lines in a bytearray so lines split across many
+    messages are decoded once.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, msg_bytes: DockerLogMessage) -> List[str]:
+        "Returns lines completed by msg_bytes"
+        lines = []
+        start = 0
+        with memoryview(msg_bytes) as view:
+            while True:
+                newline_index = msg_bytes.find(b"\n", start)
+                if newline_index == -1:
+                    self._buf += view[start:]
+                    break
+                if self._buf:
+                    self._buf += view[start:newline_index]
+                    lines.append(self._buf.decode("utf-8"))
+                    self._buf.clear()
+                else:
+                    lines.append(str(view[start:newline_index], encoding="utf-8"))
+                start = newline_index + 1
+        return lines
+
+    def close(self) -> List[str]:
+        "Returns the final line without a trailing newline if any"
+        if not self._buf:
+            return []
+        line = self._buf.decode("utf-8")
+        self._buf.clear()
+        return [line]
+
+
 def iter_newlines(
     msg_bytes_iter: Iterable[DockerLogMessage],
 ) -> Generator[str, None, None]:
     """
     Returns content of '\n' delimited lines decoded as utf8 for an iterator over bytes
     """
-    buf = bytes()
+    assembler = LineAssembler()
     for msg_bytes in msg_bytes_iter:
-        before = msg_bytes
+        yield from assembler.feed(msg_bytes)
+    yield from assembler.close()
+
+
+class DockerLogSpool:
+    """
+    Decoded docker log message contents by stream in temporary files
+    that roll over to disk once larger than max_size bytes (or never
+    roll over when max_size is None)
+
+    Write all messages before reading them back.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        # SpooledTemporaryFile keeps files with a max_size of 0 in memory
+        self._files: Dict[DockerLogStream, IO[bytes]] = {
+            stream: tempfile.SpooledTemporaryFile(max_size=max_size or 0)
+            for stream in DockerLogStream
+        }
+        self.sizes: Dict[DockerLogStream, int] = {
+            stream: 0 for stream in DockerLogStream
+        }
+
+    def write(self, stream: DockerLogStream, content: DockerLogMessage) -> None:
+        self._files[stream].write(content)
+        self.sizes[stream] += len(content)
+
+    def iter_chunks(
+        self, stream: DockerLogStream, chunk_size: int = STARTING_BUF_CONTENTS_LEN
+    ) -> Generator[bytes, None, None]:
+        f = self._files[stream]
+        f.seek(0)
         while True:
-            before, newline, after = before.partition(b"\n")
-            if newline:
-                yield str(buf + before, encoding="utf-8")
-                buf = bytes()
-                before = after
-            else:
-                buf += before
+            chunk = f.read(chunk_size)
+            if not chunk:
                 break
+            yield chunk
+
+    def iter_lines(self, stream: DockerLogStream) -> Generator[str, None, None]:
+        return iter_newlines(self.iter_chunks(stream))
+
+    def read_text(self, stream: DockerLogStream) -> str:
+        "Returns stream contents decoded as utf8 without a final newline"
+        f = self._files[stream]
+        f.seek(0)
+        text = f.read().decode("utf-8")
+        return text[:-1] if text.endswith("\n") else text
 
-    if len(buf):
-        yield buf.decode("utf-8")
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
 
 
 def iter_lines(
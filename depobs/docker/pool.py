@@ -0,0 +1,193 @@
+import contextlib
+from dataclasses import dataclass
+import logging
+from random import randrange
+from typing import AsyncGenerator, Dict, List, Optional
+
+import aiodocker
+
+from depobs.docker.client import aiodocker_client
+import depobs.docker.containers as containers
+from depobs.scanner.models.docker_image import DockerImage
+
+log = logging.getLogger(__name__)
+
+__doc__ = """Pools of warm containers leased with isolated working directories"""
+
+
+@dataclass
+class PooledContainer:
+    id: str
+    name: str
+
+    # number of times the container was leased
+    uses: int = 0
+
+
+@dataclass
+class ContainerLease:
+    container: aiodocker.containers.DockerContainer
+    container_name: str
+
+    # directory to run commands in
+    working_dir: str
+
+    # set to recycle the container instead of returning it to the pool
+    failed: bool = False
+
+
+class ContainerPool:
+    """
+    Keeps up to size warm containers running an image and leases each
+    one with a fresh working directory under scans_dir that's wiped
+    when the lease ends.
+
+    Recycles (deletes) containers after max_uses leases, on failed
+    leases (including ones that raise), and when returning one would
+    keep more than size idle.
+
+    Only the working dir is wiped between leases, so leased containers
+    must not run untrusted code e.g. npm install scripts.
+
+    Stores container IDs instead of aiodocker containers so the pool
+    can outlive event loops e.g. across asyncio.run calls in a celery
+    worker process. Not thread safe.
+    """
+
+    def __init__(
+        self,
+        repository_tag: str,
+        size: int,
+        max_uses: int,
+        name_prefix: str,
+        cmd: str = "/bin/bash",
+        scans_dir: str = "/scans",
+    ):
+        self.repository_tag = repository_tag
+        self.size = size
+        self.max_uses = max_uses
+        self.name_prefix = name_prefix
+        self.cmd = cmd
+        self.scans_dir = scans_dir
+        self.idle: List[PooledContainer] = []
+        self.leased: Dict[str, PooledContainer] = {}
+        self.stats: Dict[str, int] = dict(started=0, leased=0, reused=0, recycled=0)
+
+    async def _start(self, client: aiodocker.docker.Docker) -> PooledContainer:
+        name = f"{self.name_prefix}-{hex(randrange(1 << 32))[2:]}"
+        container = await containers.start(
+            client, self.repository_tag, name, cmd=self.cmd
+        )
+        self.stats["started"] += 1
+        return PooledContainer(id=container["Id"], name=name)
+
+    async def _recycle(
+        self, client: aiodocker.docker.Docker, pooled: PooledContainer
+    ) -> None:
+        log.info(f"recycling container {pooled.name} after {pooled.uses} uses")
+        self.stats["recycled"] += 1
+        try:
+            await client.containers.container(pooled.id).delete(force=True)
+        except aiodocker.exceptions.DockerError as e:
+            log.warning(f"error deleting container {pooled.name}: {e}")
+
+    async def _make_working_dir(
+        self, client: aiodocker.docker.Docker, pooled: PooledContainer
+    ) -> Optional[ContainerLease]:
+        "Returns a lease with a new working dir or None when the container is unusable"
+        container = client.containers.container(
+            pooled.id, Id=pooled.id, Name=pooled.name
+        )
+        working_dir = f"{self.scans_dir}/{hex(randrange(1 << 32))[2:]}"
+        try:
+            await container.run(  # type: ignore
+                f"mkdir -p {working_dir}", wait=True, check=True
+            )
+        except (containers.DockerRunException, aiodocker.exceptions.DockerError) as e:
+            log.warning(f"container {pooled.name} unusable: {e}")
+            await self._recycle(client, pooled)
+            return None
+        return ContainerLease(container, pooled.name, working_dir)
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncGenerator[ContainerLease, None]:
+        async with aiodocker_client() as client:
+            lease: Optional[ContainerLease] = None
+            # try warm containers then start one
+            while lease is None and self.idle:
+                pooled = self.idle.pop()
+                lease = await self._make_working_dir(client, pooled)
+                if lease is not None:
+                    self.stats["reused"] += 1
+            if lease is None:
+                pooled = await self._start(client)
+                lease = await self._make_working_dir(client, pooled)
+                if lease is None:
+                    raise containers.DockerRunException(
+                        f"could not create a working dir in new container {pooled.name}"
+                    )
+
+            pooled.uses += 1
+            self.stats["leased"] += 1
+            self.leased[pooled.id] = pooled
+            log.debug(
+                f"leased container {pooled.name} use {pooled.uses} in"
+                f" {lease.working_dir} pool stats: {self.stats}"
+            )
+            try:
+                yield lease
+            except BaseException:
+                lease.failed = True
+                raise
+            finally:
+                del self.leased[pooled.id]
+                recycle = (
+                    lease.failed
+                    or pooled.uses >= self.max_uses
+                    or len(self.idle) >= self.size
+                )
+                if not recycle:
+                    try:
+                        await lease.container.run(  # type: ignore
+                            f"rm -rf {lease.working_dir}", wait=True, check=True
+                        )
+                    except (
+                        containers.DockerRunException,
+                        aiodocker.exceptions.DockerError,
+                    ) as e:
+                        log.warning(
+                            f"error wiping {lease.working_dir} in {pooled.name}: {e}"
+                        )
+                        recycle = True
+                if recycle:
+                    await self._recycle(client, pooled)
+                else:
+                    self.idle.append(pooled)
+
+    async def close(self) -> None:
+        "Deletes idle containers"
+        async with aiodocker_client() as client:
+            while self.idle:
+                await self._recycle(client, self.idle.pop())
+
+
+# container pools by local image repo name and tag
+container_pools: Dict[str, ContainerPool] = {}
+
+
+def get_container_pool(image: DockerImage, size: int, max_uses: int) -> ContainerPool:
+    "Returns the container pool for an image creating it if necessary"
+    key = image.local.repo_name_tag
+    if key not in container_pools:
+        container_pools[key] = ContainerPool(
+            key,
+            size,
+            max_uses,
+            name_prefix=f"dependency-observatory-pool-{image.local.name}",
+        )
+    return container_pools[key]
+
+
+async def close_container_pools() -> None:
+    for pool in container_pools.values():
+        await pool.close()
@@ -0,0 +1,405 @@
+from array import array
+import logging
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import networkx as nx
+
+# type alias to not confuse ints as node IDs with dense node indexes
+CSRGraphNodeID = int
+
+log = logging.getLogger(__name__)
+
+
+class CSRNodeAttrs:
+    """
+    A read-only dict-like view of one node's attributes in a
+    CSRPackageGraph's columnar attribute storage
+
+    Supports the subset of dict methods ScoreComponents use on networkx
+    node data.
+    """
+
+    __slots__ = ("_attrs", "_index")
+
+    def __init__(self, attrs: Dict[str, List[Any]], index: int):
+        self._attrs = attrs
+        self._index = index
+
+    def __getitem__(self, attr_name: str) -> Any:
+        value = self._attrs[attr_name][self._index]
+        if value is _MISSING:
+            raise KeyError(attr_name)
+        return value
+
+    def __contains__(self, attr_name: object) -> bool:
+        return (
+            attr_name in self._attrs
+            and self._attrs[attr_name][self._index] is not _MISSING  # type: ignore
+        )
+
+    def get(self, attr_name: str, default: Any = None) -> Any:
+        try:
+            return self[attr_name]
+        except KeyError:
+            return default
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return (
+            (attr_name, values[self._index])
+            for attr_name, values in self._attrs.items()
+            if values[self._index] is not _MISSING
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return (attr_name for attr_name, _ in self.items())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class CSRNodeView:
+    "A read-only mapping of node ID to CSRNodeAttrs like networkx.DiGraph.nodes"
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph: "CSRPackageGraph"):
+        self._graph = graph
+
+    def __getitem__(self, node_id: CSRGraphNodeID) -> CSRNodeAttrs:
+        return CSRNodeAttrs(
+            self._graph.node_attrs, self._graph.index_by_node_id[node_id]
+        )
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._graph.index_by_node_id
+
+    def __iter__(self) -> Iterator[CSRGraphNodeID]:
+        return iter(self._graph.node_ids)
+
+    def __len__(self) -> int:
+        return len(self._graph.node_ids)
+
+
+class CSREdgeView:
+    "A read-only collection of (source node ID, target node ID) edges"
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph: "CSRPackageGraph"):
+        self._graph = graph
+
+    def __iter__(self) -> Iterator[Tuple[CSRGraphNodeID, CSRGraphNodeID]]:
+        node_ids, offsets, targets = (
+            self._graph.node_ids,
+            self._graph.offsets,
+            self._graph.targets,
+        )
+        for index, node_id in enumerate(node_ids):
+            for offset in range(offsets[index], offsets[index + 1]):
+                yield node_id, node_ids[targets[offset]]
+
+    def __len__(self) -> int:
+        return len(self._graph.targets)
+
+
+# marks unset attributes in columnar attribute lists
+_MISSING = object()
+
+
+class CSRPackageGraph:
+    """
+    A compact directed graph of package versions.
+
+    Interns node IDs (PackageVersion IDs) to dense indexes, stores
+    successors and predecessors as compressed sparse row (CSR) offsets
+    and targets arrays, and stores node attributes in one list per
+    attribute name indexed by dense index.
+
+    Mirrors the read-only parts of the networkx.DiGraph API that
+    scoring uses (.nodes, .edges, .successors, .predecessors). Use
+    to_networkx to render it.
+    """
+
+    def __init__(
+        self,
+        node_ids: Iterable[CSRGraphNodeID],
+        edges: Iterable[Tuple[CSRGraphNodeID, CSRGraphNodeID]],
+        graph_id: Optional[int] = None,
+    ):
+        self.graph_id = graph_id
+        self.index_by_node_id: Dict[CSRGraphNodeID, int] = {}
+        self.node_ids: array = array("q")
+        for node_id in node_ids:
+            self._intern(node_id)
+
+        edge_indexes: Set[Tuple[int, int]] = set()
+        for source_id, target_id in edges:
+            edge_indexes.add((self._intern(source_id), self._intern(target_id)))
+
+        self.offsets, self.targets = _to_csr(len(self.node_ids), edge_indexes)
+        self.reverse_offsets, self.reverse_targets = _to_csr(
+            len(self.node_ids), ((target, source) for source, target in edge_indexes)
+        )
+        self.node_attrs: Dict[str, List[Any]] = {}
+        self._component_indexes: Optional[List[int]] = None
+
+    def _intern(self, node_id: CSRGraphNodeID) -> int:
+        index = self.index_by_node_id.get(node_id, None)
+        if index is None:
+            index = self.index_by_node_id[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+        return index
+
+    @property
+    def nodes(self) -> CSRNodeView:
+        return CSRNodeView(self)
+
+    @property
+    def edges(self) -> CSREdgeView:
+        return CSREdgeView(self)
+
+    def component_indexes(self) -> List[int]:
+        "Returns strongly_connected_component_indexes finding them on first use"
+        if self._component_indexes is None:
+            self._component_indexes = strongly_connected_component_indexes(self)
+        return self._component_indexes
+
+    def successor_indexes(self, index: int) -> array:
+        return self.targets[self.offsets[index] : self.offsets[index + 1]]
+
+    def predecessor_indexes(self, index: int) -> array:
+        return self.reverse_targets[
+            self.reverse_offsets[index] : self.reverse_offsets[index + 1]
+        ]
+
+    def successors(self, node_id: CSRGraphNodeID) -> Iterator[CSRGraphNodeID]:
+        return (
+            self.node_ids[index]
+            for index in self.successor_indexes(self.index_by_node_id[node_id])
+        )
+
+    def predecessors(self, node_id: CSRGraphNodeID) -> Iterator[CSRGraphNodeID]:
+        return (
+            self.node_ids[index]
+            for index in self.predecessor_indexes(self.index_by_node_id[node_id])
+        )
+
+    def update_node_attrs(
+        self, **updates_by_node_id: Dict[CSRGraphNodeID, Any]
+    ) -> "CSRPackageGraph":
+        """
+        Updates or replaces node attributes like
+        graph_util.update_node_attrs. Ignores IDs for nodes not in the
+        graph.
+
+        >>> CSRPackageGraph([0, 1], [(0, 1)]).update_node_attrs(label={0: 'node 0'}).nodes[0]['label']
+        'node 0'
+        >>> CSRPackageGraph([0, 1], [(0, 1)]).update_node_attrs(label={0: 'node 0'}).nodes[1].get('label')
+        """
+        for attr_name, values_by_node_id in updates_by_node_id.items():
+            values = self.node_attrs.setdefault(
+                attr_name, [_MISSING] * len(self.node_ids)
+            )
+            for node_id, value in values_by_node_id.items():
+                index = self.index_by_node_id.get(node_id, None)
+                if index is not None:
+                    values[index] = value
+        return self
+
+    def to_networkx(self) -> nx.DiGraph:
+        "Returns a networkx.DiGraph with the same nodes, edges, and node attributes"
+        g = nx.DiGraph(incoming_graph_data=None, id=self.graph_id)
+        for node_id in self.node_ids:
+            g.add_node(node_id, **dict(self.nodes[node_id].items()))
+        g.add_edges_from(self.edges)
+        return g
+
+
+def _to_csr(node_count: int, edges: Iterable[Tuple[int, int]]) -> Tuple[array, array]:
+    "Returns CSR offsets and targets arrays for (source index, target index) edges"
+    targets_by_source: List[List[int]] = [[] for _ in range(node_count)]
+    for source, target in edges:
+        targets_by_source[source].append(target)
+
+    offsets, targets = array("q", [0]), array("q")
+    for source_targets in targets_by_source:
+        targets.extend(sorted(source_targets))
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def strongly_connected_component_indexes(g: CSRPackageGraph) -> List[int]:
+    """
+    Returns the strongly connected component index for each dense node
+    index using an iterative Tarjan's algorithm.
+
+    Numbers components in reverse topological order i.e. a component
+    only points to components with lower indexes.
+
+    >>> strongly_connected_component_indexes(CSRPackageGraph([], [(0, 1), (1, 0), (1, 2)]))
+    [1, 1, 0]
+    """
+    node_count = len(g.node_ids)
+    offsets, targets = g.offsets, g.targets
+    visit_indexes, lowlinks = [-1] * node_count, [0] * node_count
+    component_indexes = [-1] * node_count
+    on_stack = [False] * node_count
+    stack: List[int] = []
+    visit_count, component_count = 0, 0
+
+    for root in range(node_count):
+        if visit_indexes[root] != -1:
+            continue
+        # (node index, next target offset) frames
+        frames = [(root, offsets[root])]
+        visit_indexes[root] = lowlinks[root] = visit_count
+        visit_count += 1
+        stack.append(root)
+        on_stack[root] = True
+        while frames:
+            node, offset = frames[-1]
+            if offset < offsets[node + 1]:
+                frames[-1] = (node, offset + 1)
+                target = targets[offset]
+                if visit_indexes[target] == -1:
+                    visit_indexes[target] = lowlinks[target] = visit_count
+                    visit_count += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    frames.append((target, offsets[target]))
+                elif on_stack[target]:
+                    lowlinks[node] = min(lowlinks[node], visit_indexes[target])
+                continue
+
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+            if lowlinks[node] == visit_indexes[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component_indexes[member] = component_count
+                    if member == node:
+                        break
+                component_count += 1
+    return component_indexes
+
+
+def strongly_connected_components(g: CSRPackageGraph) -> List[List[CSRGraphNodeID]]:
+    """
+    Returns the member node IDs of each strongly connected component in
+    reverse topological order i.e. a component only points to itself
+    and earlier components.
+
+    >>> strongly_connected_components(CSRPackageGraph([], [(0, 1), (1, 0), (1, 2)]))
+    [[2], [0, 1]]
+    """
+    component_indexes = g.component_indexes()
+    members: List[List[CSRGraphNodeID]] = [
+        [] for _ in range(max(component_indexes, default=-1) + 1)
+    ]
+    for index, component in enumerate(component_indexes):
+        members[component].append(g.node_ids[index])
+    return members
+
+
+def csr_node_dep_ids_iter(
+    g: CSRPackageGraph, c: Optional[nx.DiGraph] = None
+) -> Generator[
+    Tuple[CSRGraphNodeID, Set[CSRGraphNodeID], Set[CSRGraphNodeID]], None, None
+]:
+    """
+    For a CSRPackageGraph yields each node ID with its sets of direct
+    and indirect dependency IDs in the same order and with the same
+    values as graph_traversal.node_dep_ids_bitset_iter.
+
+    Finds strongly connected components on the CSR arrays, layers them
+    outer to inner by counting unvisited successor components, and ORs
+    int bitsets of dense node indexes to find reachable nodes. Ignores
+    the condensed graph c, which is only accepted to match the
+    node_dep_ids_iter signature.
+    """
+    node_count = len(g.node_ids)
+    if node_count == 0:
+        return
+
+    component_indexes = g.component_indexes()
+    component_count = max(component_indexes) + 1
+    members: List[List[int]] = [[] for _ in range(component_count)]
+    member_bits = [0] * component_count
+    for index, component in enumerate(component_indexes):
+        members[component].append(index)
+        member_bits[component] |= 1 << index
+
+    successor_components: List[Set[int]] = [set() for _ in range(component_count)]
+    predecessor_components: List[Set[int]] = [set() for _ in range(component_count)]
+    for index, component in enumerate(component_indexes):
+        for target in g.successor_indexes(index):
+            target_component = component_indexes[target]
+            if target_component != component:
+                successor_components[component].add(target_component)
+                predecessor_components[target_component].add(component)
+
+    # nodes reachable from a component excluding its members
+    descendant_bits = [0] * component_count
+    unvisited_successor_counts = [
+        len(successors) for successors in successor_components
+    ]
+    layer = [
+        component
+        for component, count in enumerate(unvisited_successor_counts)
+        if count == 0
+    ]
+    while layer:
+        for component in layer:
+            for successor in successor_components[component]:
+                descendant_bits[component] |= (
+                    member_bits[successor] | descendant_bits[successor]
+                )
+
+        for index in sorted(
+            (index for component in layer for index in members[component]),
+            key=lambda index: g.node_ids[index],
+            reverse=True,
+        ):
+            component = component_indexes[index]
+            direct_dep_indexes = set(g.successor_indexes(index))
+            excluded_bits = 1 << index
+            for dep_index in direct_dep_indexes:
+                excluded_bits |= 1 << dep_index
+            indirect_bits = (
+                member_bits[component] | descendant_bits[component]
+            ) & ~excluded_bits
+            yield g.node_ids[index], {
+                g.node_ids[dep_index] for dep_index in direct_dep_indexes
+            }, {g.node_ids[dep_index] for dep_index in _bit_indexes(indirect_bits)}
+
+        next_layer = []
+        for component in layer:
+            for predecessor in predecessor_components[component]:
+                unvisited_successor_counts[predecessor] -= 1
+                if unvisited_successor_counts[predecessor] == 0:
+                    next_layer.append(predecessor)
+        layer = next_layer
+
+
+def _bit_indexes(bits: int) -> Iterator[int]:
+    "Yields the indexes of set bits in an int"
+    while bits:
+        lowest_bit = bits & -bits
+        yield lowest_bit.bit_length() - 1
+        bits ^= lowest_bit
@@ -1,9 +1,12 @@
 from typing import (
+    Callable,
+    Dict,
     Generator,
     Iterable,
     Optional,
     Set,
     Tuple,
+    Union,
 )
 
 import networkx as nx
@@ -11,6 +14,8 @@ from networkx.algorithms.components import condensation
 from networkx.algorithms.dag import descendants, is_directed_acyclic_graph
 from networkx.algorithms.shortest_paths.generic import has_path
 
+from depobs.scanner.csr_graph import CSRPackageGraph, csr_node_dep_ids_iter
+
 # type alias to not confuse ints as nxGraphNodeIDs with other ints
 nxGraphNodeID = int
 
@@ -30,7 +35,7 @@ def outer_in_graph_iter(
     nodes or other nodes within their set
     """
     if len(g.nodes) == 0:
-        raise StopIteration("graph has no nodes")
+        return
 
     # > C – The condensation graph C of G. The node labels are integers
     # > corresponding to the index of the component in the list of strongly
@@ -59,32 +64,49 @@ def outer_in_dag_iter(g: nx.DiGraph) -> Generator[Set[nxGraphNodeID], None, None
 
     Yields each node ID once and visits them such that successive node ID sets
     only depend on/point to previously visited nodes.
+
+    Groups nodes by their longest path to a leaf by counting each node's
+    unvisited successors (i.e. Kahn's algorithm on the reversed graph),
+    so it visits each node and edge once. Yields nothing for a graph
+    with no nodes.
     """
     if len(g.nodes) == 0:
-        raise StopIteration("graph has no nodes")
-    if len(g.nodes) > 1 and not is_directed_acyclic_graph(g):
-        raise Exception("graph has more than one node and is not a DAG")
+        return
+    if not is_directed_acyclic_graph(g):
+        raise Exception("graph is not a DAG")
 
-    visited: Set[nxGraphNodeID] = set()
-    leaf_nodes: Set[nxGraphNodeID] = set(
-        [node for node in g.nodes() if g.out_degree(node) == 0]
+    unvisited_successor_counts: Dict[nxGraphNodeID, int] = {
+        node: out_degree for (node, out_degree) in g.out_degree()
+    }
+    nodes: Set[nxGraphNodeID] = set(
+        node for node, count in unvisited_successor_counts.items() if count == 0
     )
-    yield leaf_nodes
-    visited.update(leaf_nodes)
-
-    while True:
-        points_to_visited = set(src for (src, _) in g.in_edges(visited))
-        only_points_to_visited = set(
-            node
-            for node in points_to_visited
-            if all(dst in visited for (_, dst) in g.out_edges(node))
-        )
-        new_only_points_to_visited = only_points_to_visited - visited
-        if not bool(new_only_points_to_visited):  # visited nothing new
-            assert len(visited) == len(g.nodes)
-            break
-        yield new_only_points_to_visited
-        visited.update(only_points_to_visited)
+    while nodes:
+        yield nodes
+        next_nodes: Set[nxGraphNodeID] = set()
+        for node in nodes:
+            for predecessor in g.predecessors(node):
+                unvisited_successor_counts[predecessor] -= 1
+                if unvisited_successor_counts[predecessor] == 0:
+                    next_nodes.add(predecessor)
+        nodes = next_nodes
+
+
+def condensation_members_iter(
+    c: nx.DiGraph,
+) -> Generator[Set[nxGraphNodeID], None, None]:
+    """
+    For a condensed DAG from networkx condensation yields the member
+    node IDs of each strongly connected component from outer to inner
+    components i.e. a component only points to itself and previously
+    yielded components.
+
+    >>> list(condensation_members_iter(condensation(nx.DiGraph([(0, 1), (1, 0), (1, 2)]))))
+    [{2}, {0, 1}]
+    """
+    for scc_ids in outer_in_dag_iter(c):
+        for scc_id in sorted(scc_ids):
+            yield c.nodes[scc_id]["members"]
 
 
 def scc_ids_to_graph_node_ids(
@@ -135,3 +157,112 @@ def node_dep_ids_iter(
             ) - direct_dep_ids - set([node_id])
 
             yield node_id, direct_dep_ids, indirect_dep_ids
+
+
+def bitset_to_node_ids(
+    bits: int, node_ids_by_bit_index: Dict[int, nxGraphNodeID]
+) -> Set[nxGraphNodeID]:
+    "Returns the node IDs for the set bits of an int bitset"
+    node_ids: Set[nxGraphNodeID] = set()
+    while bits:
+        lowest_bit = bits & -bits
+        node_ids.add(node_ids_by_bit_index[lowest_bit.bit_length() - 1])
+        bits ^= lowest_bit
+    return node_ids
+
+
+def node_dep_ids_bitset_iter(
+    g: nx.DiGraph, c: Optional[nx.DiGraph] = None
+) -> Generator[
+    Tuple[nxGraphNodeID, Set[nxGraphNodeID], Set[nxGraphNodeID]], None, None
+]:
+    """For a directed graph with unique node IDs with type int and
+    optional precomputed condensed DAG of g, yields the same node IDs in
+    the same order as node_dep_ids_iter with their direct and indirect
+    dependency IDs.
+
+    Computes the nodes reachable from each strongly connected component
+    in one pass over the condensed DAG from outer to inner components
+    by OR-ing the int bitsets of its successor components. Every member
+    of a component with more than one node reaches every other member.
+
+    Unlike node_dep_ids_iter indirect dependencies only include nodes
+    reachable from the node (and not nodes reachable from other
+    components visited in the same batch).
+    """
+    if not c:
+        c = condensation(g)
+
+    bit_indexes_by_node_id: Dict[nxGraphNodeID, int] = {
+        node_id: bit_index for bit_index, node_id in enumerate(g.nodes)
+    }
+    node_ids_by_bit_index: Dict[int, nxGraphNodeID] = {
+        bit_index: node_id for node_id, bit_index in bit_indexes_by_node_id.items()
+    }
+
+    def node_ids_to_bitset(node_ids: Iterable[nxGraphNodeID]) -> int:
+        bits = 0
+        for node_id in node_ids:
+            bits |= 1 << bit_indexes_by_node_id[node_id]
+        return bits
+
+    member_bits_by_scc_id: Dict[int, int] = {
+        scc_id: node_ids_to_bitset(c.nodes[scc_id]["members"]) for scc_id in c.nodes
+    }
+    # nodes reachable from an SCC excluding its members
+    descendant_bits_by_scc_id: Dict[int, int] = {}
+    for scc_ids in outer_in_dag_iter(c):
+        for scc_id in scc_ids:
+            descendant_bits = 0
+            for successor_scc_id in c.successors(scc_id):
+                descendant_bits |= (
+                    member_bits_by_scc_id[successor_scc_id]
+                    | descendant_bits_by_scc_id[successor_scc_id]
+                )
+            descendant_bits_by_scc_id[scc_id] = descendant_bits
+
+        for node_id in sorted(scc_ids_to_graph_node_ids(c, scc_ids), reverse=True):
+            scc_id = c.graph["mapping"][node_id]
+            direct_dep_ids: Set[int] = set(g.successors(node_id))
+            indirect_bits = (
+                member_bits_by_scc_id[scc_id] | descendant_bits_by_scc_id[scc_id]
+            ) & ~node_ids_to_bitset(direct_dep_ids | {node_id})
+            yield node_id, direct_dep_ids, bitset_to_node_ids(
+                indirect_bits, node_ids_by_bit_index
+            )
+
+
+def node_and_dependent_ids(
+    g: Union[nx.DiGraph, CSRPackageGraph], node_ids: Iterable[nxGraphNodeID]
+) -> Set[nxGraphNodeID]:
+    """For a networkx.DiGraph or csr_graph.CSRPackageGraph returns
+    the IDs of the given nodes in the graph and the nodes that depend
+    on them directly or transitively (i.e. the nodes with scores that
+    change when the given nodes' scores change). Ignores IDs for nodes
+    not in the graph.
+
+    >>> sorted(node_and_dependent_ids(nx.DiGraph([(0, 1), (1, 2), (3, 2), (4, 0)]), [1, 5]))
+    [0, 1, 4]
+    """
+    stack = [node_id for node_id in set(node_ids) if node_id in g.nodes]
+    visited: Set[nxGraphNodeID] = set(stack)
+    while stack:
+        for dependent_id in g.predecessors(stack.pop()):
+            if dependent_id not in visited:
+                visited.add(dependent_id)
+                stack.append(dependent_id)
+    return visited
+
+
+NodeDepIDsIter = Callable[
+    [Union[nx.DiGraph, CSRPackageGraph], Optional[nx.DiGraph]],
+    Generator[Tuple[nxGraphNodeID, Set[nxGraphNodeID], Set[nxGraphNodeID]], None, None],
+]
+
+# traversal engines for scoring by name
+node_dep_ids_iters: Dict[str, NodeDepIDsIter] = {
+    "networkx": node_dep_ids_iter,
+    "bitset": node_dep_ids_bitset_iter,
+    # takes a csr_graph.CSRPackageGraph instead of a networkx.DiGraph
+    "csr": csr_node_dep_ids_iter,
+}
@@ -16,6 +16,7 @@ import graphviz
 import networkx as nx
 
 from depobs.database import models
+from depobs.scanner.csr_graph import CSRPackageGraph
 from depobs.scanner.models.nodejs import NPMPackage
 from depobs.scanner.models.rust import RustCrate, RustPackageID, RustPackage
 
@@ -182,11 +183,30 @@ def package_graph_to_networkx_graph(db_graph: models.PackageGraph) -> nx.DiGraph
     return g
 
 
+def package_graph_to_csr_graph(db_graph: models.PackageGraph) -> CSRPackageGraph:
+    """
+    Converts a DB PackageGraph model into a CSRPackageGraph with the
+    same nodes and edges as package_graph_to_networkx_graph
+    """
+    edges: List[Tuple[int, int]] = []
+    for (
+        link_id,
+        (parent_package_id, child_package_id),
+    ) in db_graph.package_links_by_id.items():
+        if parent_package_id == child_package_id:
+            log.warning(f"skipping self loop for package version ID {child_package_id}")
+            continue
+        edges.append((parent_package_id, child_package_id))
+    return CSRPackageGraph(db_graph.distinct_package_ids, edges, graph_id=db_graph.id)
+
+
 def update_node_attrs(
-    g: nx.DiGraph, **updates_by_package_version_id: Dict[int, Any]
-) -> None:
+    g: Union[nx.DiGraph, CSRPackageGraph],
+    **updates_by_package_version_id: Dict[int, Any],
+) -> Union[nx.DiGraph, CSRPackageGraph]:
     """
-    Updates or replaces node attributes for nodes in a nx.DiGraph.
+    Updates or replaces node attributes for nodes in a nx.DiGraph or
+    CSRPackageGraph in-place and returns the graph.
 
     Takes a dict of updates
     using the node id.
@@ -198,9 +218,12 @@ def update_node_attrs(
     >>> update_node_attrs(nx.DiGraph([(0, 1)]), label={0: 'node 0'}, foo={0: 'bar'}).nodes[0]
     {'label': 'node 0', 'foo': 'bar'}
     """
-    for attr_name, node_id_to_value in updates_by_package_version_id.items():
-        for node_id, attr_value in node_id_to_value.items():
-            g.nodes[node_id][attr_name] = attr_value
+    if isinstance(g, CSRPackageGraph):
+        g.update_node_attrs(**updates_by_package_version_id)
+    else:
+        for attr_name, node_id_to_value in updates_by_package_version_id.items():
+            for node_id, attr_value in node_id_to_value.items():
+                g.nodes[node_id][attr_name] = attr_value
 
     return g
 
@@ -3,13 +3,26 @@ import itertools
 import logging
 from dataclasses import asdict, dataclass, field
 import enum
-from typing import Dict, Tuple, Sequence, List, Optional, Generator, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Tuple,
+    Sequence,
+    List,
+    Optional,
+    Generator,
+    Union,
+)
 
 from depobs.util.serialize_util import (
+    build_json_value,
     extract_fields,
     get_in,
+    JSONEvent,
     JSONPath,
     JSONPathElement,
+    skip_json_value,
 )
 
 log = logging.getLogger(__name__)
@@ -195,3 +208,95 @@ def flatten_deps(
         yield pkg
         pkgs.append(pkg)
         paths.append(path)
+
+
+# npm list output node fields NPMPackages read
+NPM_LIST_NODE_FIELDS = {"name", "version", "from", "resolved"}
+
+
+@dataclass
+class _NPMListNode:
+    "An open npm list output node while flattening events"
+
+    # the key in its parent's .dependencies or None for the root
+    key: Optional[str]
+    fields: Dict[str, Any] = field(default_factory=dict)
+    has_dependencies_field: bool = False
+    in_dependencies: bool = False
+    # sorted package IDs of valid direct child deps
+    dependencies: List[NPMPackageID] = field(default_factory=list)
+
+    def to_package(self) -> Optional[NPMPackage]:
+        "Returns an NPMPackage when the node is valid like in visit_deps"
+        if self.key is None:
+            if not (
+                self.has_dependencies_field
+                and "name" in self.fields
+                and "version" in self.fields
+            ):
+                return None
+        elif not all(key in self.fields for key in ["version", "from", "resolved"]):
+            return None
+        pkg = _get_pkg(self.fields, self.key)
+        pkg.dependencies = self.dependencies
+        return pkg
+
+
+def flatten_deps_from_json_events(
+    events: Iterable[JSONEvent], top_level_fields: Optional[Dict[str, Any]] = None,
+) -> Generator[NPMPackage, None, None]:
+    """returns the same NPMPackages as flatten_deps from
+    serialize_util.iter_json_events events for npm list JSON output
+
+    Visits nodes in one pass keeping a stack of open parent nodes
+    instead of loading the output and matching paths. Only builds
+    values for NPMPackage fields and, when top_level_fields is
+    provided, updates it with the root's fields other than
+    .dependencies (e.g. .problems).
+    """
+    events = iter(events)
+    event, _ = next(events, (None, None))
+    if event != "start_map":
+        # no deps in non-object output but check it's valid JSON
+        for _ in events:
+            pass
+        return
+
+    root = _NPMListNode(key=None)
+    stack: List[_NPMListNode] = [root]
+    for event, value in events:
+        node = stack[-1]
+        if event == "end_map":
+            if node.in_dependencies:
+                node.in_dependencies = False
+                continue
+            stack.pop()
+            pkg = node.to_package()
+            if pkg is None:
+                continue
+            if stack:
+                bisect.insort(stack[-1].dependencies, pkg.package_id)
+            yield pkg
+            continue
+
+        assert event == "map_key"
+        child_event, child_value = next(events)
+        if node.in_dependencies:
+            if child_event == "start_map":
+                stack.append(_NPMListNode(key=value))
+            else:
+                skip_json_value(child_event, events)
+        elif value == "dependencies":
+            node.has_dependencies_field = True
+            if child_event == "start_map":
+                node.in_dependencies = True
+            else:
+                skip_json_value(child_event, events)
+        elif value in NPM_LIST_NODE_FIELDS or (
+            node is root and top_level_fields is not None
+        ):
+            node.fields[value] = build_json_value(child_event, child_value, events)
+            if node is root and top_level_fields is not None:
+                top_level_fields[value] = node.fields[value]
+        else:
+            skip_json_value(child_event, events)
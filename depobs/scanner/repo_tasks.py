@@ -11,6 +11,7 @@ from typing import (
     Generator,
     Iterable,
     List,
+    Optional,
     Tuple,
     TypedDict,
     Union,
@@ -63,15 +64,32 @@ class RunRepoTasksConfig(TypedDict):
     # provided. Defaults to none of them
     repo_tasks: List[str]
 
+    # Spool each task's output to disk once it's larger than this many
+    # bytes. Keeps output in memory when None.
+    exec_output_spool_max_size: Optional[int]
+
+    # Number of warm containers to keep per docker image and lease to
+    # tasks. Runs a new container for each task run when 0.
+    container_pool_size: int
+
+    # Number of leases before deleting a pooled container
+    container_pool_max_uses: int
+
 
 async def run_repo_task(
     c: aiodocker.containers.DockerContainer,
     task: ContainerTask,
     working_dir: str,
     container_name: str,
+    spool_max_size: Optional[int] = None,
 ) -> Union[Dict[str, Any], Exception]:
+    """
+    Runs a container task and returns its result with its decoded
+    stdout and stderr in a DockerLogSpool as "output"
+
+    Callers should close the output spool when done with it.
+    """
     last_inspect = dict(ExitCode=None)
-    stdout = "dummy-stdout"
 
     log.info(
         f"task {task.name} running {task.command} in {working_dir} of {container_name}"
@@ -85,29 +103,36 @@ async def run_repo_task(
             attach_stdout=task.attach_stdout,
             attach_stderr=task.attach_stderr,
             tty=task.tty,
+            stream_output=True,
+            spool_max_size=spool_max_size,
         )
-        last_inspect = await job_run.inspect()
+        # run waited for the process to exit and inspected it
+        last_inspect = job_run.last_inspect or await job_run.inspect()
     except containers.DockerRunException as e:
         log.error(
             f"{container_name} in {working_dir} for task {task.name} error running {task.command}: {e}"
         )
         return e
 
-    stdout, stderr = [
-        "\n".join(line_iter)
-        for line_iter in job_run.decoded_start_result_stdout_and_stderr_line_iters
-    ]
-    c_stdout, c_stderr = await asyncio.gather(c.log(stdout=True), c.log(stderr=True))
-    log.debug(f"{container_name} stdout: {c_stdout}")
-    log.debug(f"{container_name} stderr: {c_stderr}")
+    assert job_run.output is not None
+    log.debug(
+        f"{container_name} task {task.name} output sizes: {job_run.output.sizes}"
+        f" docker API calls: {dict(job_run.api_call_counts)}"
+    )
+    if log.isEnabledFor(logging.DEBUG):
+        c_stdout, c_stderr = await asyncio.gather(
+            c.log(stdout=True), c.log(stderr=True)
+        )
+        log.debug(f"{container_name} stdout: {c_stdout}")
+        log.debug(f"{container_name} stderr: {c_stderr}")
     return {
         "name": task.name,
         "command": task.command,
         "container_name": container_name,
         "working_dir": working_dir,
         "exit_code": last_inspect["ExitCode"],
-        "stdout": stdout,
-        "stderr": stderr,
+        "output": job_run.output,
+        "docker_api_call_counts": dict(job_run.api_call_counts),
     }
 
 
@@ -0,0 +1,154 @@
+import bisect
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# https://semver.org/#backusnaur-form-grammar-for-valid-semver-versions
+# allowing a leading = or v like node-semver
+SEMVER_RE = re.compile(
+    r"""^[=v]*
+(?P<major>[0-9]+)\.(?P<minor>[0-9]+)\.(?P<patch>[0-9]+)
+(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?
+(?:\+[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*)?$""",
+    re.VERBOSE,
+)
+
+# fits a postgres BIGINT
+MAX_VERSION_COMPONENT = 2 ** 63 - 1
+
+# sorts after every prerelease key
+RELEASE_KEY = "~"
+
+
+class ParsedSemver(NamedTuple):
+    major: int
+    minor: int
+    patch: int
+    # compares bytewise (e.g. with the postgres "C" collation) in semver
+    # precedence order
+    prerelease_key: str
+
+
+def prerelease_key(prerelease: Optional[str]) -> str:
+    """
+    Returns a str that sorts bytewise in semver precedence order for a
+    dot separated prerelease version or None for a release.
+
+    Numeric identifiers sort by length then digits (i.e. numerically)
+    and before alphanumeric identifiers. A prefix of identifiers sorts
+    first and releases sort after all prereleases.
+
+    >>> prerelease_key(None)
+    '~'
+    >>> prerelease_key("alpha.10.beta")
+    '1alpha 00210 1beta'
+    >>> sorted(["rc.1", "alpha", "alpha.1", "alpha.beta", "beta.11", "beta.2", "beta", None], key=prerelease_key)
+    ['alpha', 'alpha.1', 'alpha.beta', 'beta', 'beta.2', 'beta.11', 'rc.1', None]
+    """
+    if prerelease is None:
+        return RELEASE_KEY
+    return " ".join(
+        f"0{len(identifier.lstrip('0') or '0'):02d}{identifier.lstrip('0') or '0'}"
+        if identifier.isdigit()
+        else f"1{identifier}"
+        for identifier in prerelease.split(".")
+    )
+
+
+def parse_semver(version: Optional[str]) -> Optional[ParsedSemver]:
+    """
+    Returns the major, minor, patch, and prerelease key for a semver
+    version or None for a missing or invalid version or one with a
+    component too large to store.
+
+    >>> parse_semver("v1.10.0-rc.1+build.5")
+    ParsedSemver(major=1, minor=10, patch=0, prerelease_key='1rc 0011')
+    >>> parse_semver("1.1") is None
+    True
+    """
+    if version is None:
+        return None
+    match = SEMVER_RE.match(version.strip())
+    if match is None:
+        return None
+    major, minor, patch = (
+        int(match.group(component)) for component in ("major", "minor", "patch")
+    )
+    if max(major, minor, patch) > MAX_VERSION_COMPONENT:
+        return None
+    return ParsedSemver(major, minor, patch, prerelease_key(match.group("prerelease")))
+
+
+def semver_distance(version: ParsedSemver, other: ParsedSemver) -> Tuple[int, int]:
+    """
+    Returns a key that sorts closer versions first: the negated number
+    of equal leading major, minor, and patch components and the
+    difference of the first unequal component.
+
+    >>> semver_distance(parse_semver("1.1.0"), parse_semver("1.10.0"))
+    (-1, 9)
+    >>> semver_distance(parse_semver("1.1.0"), parse_semver("1.0.0"))
+    (-1, 1)
+    """
+    for equal_count, (component, other_component) in enumerate(
+        zip(version[:3], other[:3])
+    ):
+        if component != other_component:
+            return (-equal_count, abs(component - other_component))
+    return (-3, 0)
+
+
+class SemverIndex:
+    """
+    Valid semver versions sorted in precedence order to find the
+    closest version to another version with bisect.
+
+    >>> SemverIndex(["1.10.0", "1.0.0", "not-semver"]).closest("1.1.0")
+    '1.0.0'
+    >>> SemverIndex(["2.0.0", "1.0.0"]).closest("1.9.0")
+    '1.0.0'
+    >>> SemverIndex(["1.0.0"]).closest("not-semver") is None
+    True
+    """
+
+    def __init__(self, versions: Iterable[str]):
+        parsed_versions = sorted(
+            (parsed, version)
+            for parsed, version in (
+                (parse_semver(version), version) for version in versions
+            )
+            if parsed is not None
+        )
+        self.keys: List[ParsedSemver] = [parsed for parsed, _ in parsed_versions]
+        self.versions: List[str] = [version for _, version in parsed_versions]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def closest(self, version: str) -> Optional[str]:
+        """
+        Returns the indexed version with the most equal leading major,
+        minor, and patch components then the smallest difference in
+        the first unequal component preferring older versions for
+        ties. Returns None for an invalid version or empty index.
+        """
+        parsed = parse_semver(version)
+        if parsed is None or not self.keys:
+            return None
+        index = bisect.bisect_left(self.keys, parsed)
+        if index < len(self.keys) and self.keys[index] == parsed:
+            return self.versions[index]
+        # the closest versions surround the insertion point, since
+        # versions with the same leading components are contiguous
+        return self.versions[
+            min(
+                (
+                    neighbor_index
+                    for neighbor_index in (index - 1, index)
+                    if 0 <= neighbor_index < len(self.keys)
+                ),
+                key=lambda neighbor_index: (
+                    semver_distance(parsed, self.keys[neighbor_index]),  # type: ignore
+                    neighbor_index,
+                ),
+            )
+        ]
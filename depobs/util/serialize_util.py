@@ -1,10 +1,28 @@
+import codecs
 import itertools
 import json
-from typing import Any, Dict, Iterable, Set, Sequence, List, Union, Generator
+import re
+from typing import (
+    Any,
+    AnyStr,
+    Dict,
+    Iterable,
+    Iterator,
+    Set,
+    Sequence,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    Generator,
+)
 
 JSONPathElement = Union[int, str]
 JSONPath = Sequence[JSONPathElement]
 
+# an (event name, value) tuple e.g. ("map_key", "name") or ("start_array", None)
+JSONEvent = Tuple[str, Any]
+
 
 def get_in(d: Dict, path: Iterable[JSONPathElement], default: Any = None):
     sentinel = object()
@@ -45,6 +63,212 @@ def iter_jsonlines(
         yield json.loads(line)
 
 
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?")
+_JSON_NUMBER_CHARS = re.compile(r"[-+.eE0-9]*")
+_JSON_CONSTANTS = [
+    ("true", "boolean", True),
+    ("false", "boolean", False),
+    ("null", "null", None),
+]
+
+# what iter_json_events expects to parse next
+_EXPECT_VALUE, _EXPECT_VALUE_OR_END, _EXPECT_KEY, _EXPECT_KEY_OR_END = range(4)
+_EXPECT_COLON, _EXPECT_COMMA_OR_END, _EXPECT_DONE = range(4, 7)
+
+
+def iter_json_events(chunks: Iterable[AnyStr]) -> Generator[JSONEvent, None, None]:
+    """
+    Incrementally parses one JSON document from str or UTF-8 encoded
+    bytes chunks and yields ijson-style (event, value) tuples without
+    building the document in memory.
+
+    Raises json.JSONDecodeError for invalid or truncated JSON.
+
+    >>> list(iter_json_events(['{"a": [1, tr', 'ue], "b": null}']))
+    [('start_map', None), ('map_key', 'a'), ('start_array', None), ('number', 1), ('boolean', True), ('end_array', None), ('map_key', 'b'), ('null', None), ('end_map', None)]
+    """
+    chunk_iter = iter(chunks)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+
+    def read_chunk() -> None:
+        nonlocal buf, pos, eof
+        chunk = next(chunk_iter, None)
+        if chunk is None:
+            eof = True
+            text = decoder.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            text = decoder.decode(chunk)
+        else:
+            text = chunk
+        buf, pos = buf[pos:] + text, 0
+
+    # "{" or "[" for each open container
+    stack: List[str] = []
+    expect = _EXPECT_VALUE
+    while True:
+        whitespace = _JSON_WHITESPACE.match(buf, pos)
+        assert whitespace is not None  # matches the empty string
+        pos = whitespace.end()
+        if pos == len(buf):
+            if not eof:
+                read_chunk()
+                continue
+            if expect == _EXPECT_DONE:
+                return
+            raise json.JSONDecodeError("Unexpected end of JSON input", buf, pos)
+
+        char = buf[pos]
+        if expect == _EXPECT_DONE:
+            raise json.JSONDecodeError("Extra data", buf, pos)
+        elif expect == _EXPECT_COLON:
+            if char != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", buf, pos)
+            pos += 1
+            expect = _EXPECT_VALUE
+            continue
+        elif expect == _EXPECT_COMMA_OR_END:
+            if char == ",":
+                pos += 1
+                expect = _EXPECT_KEY if stack[-1] == "{" else _EXPECT_VALUE
+                continue
+            elif (char == "}" and stack[-1] == "{") or (
+                char == "]" and stack[-1] == "["
+            ):
+                pos += 1
+                yield ("end_map" if stack.pop() == "{" else "end_array", None)
+                expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_DONE
+                continue
+            raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+        elif expect in {_EXPECT_KEY, _EXPECT_KEY_OR_END}:
+            if char == "}" and expect == _EXPECT_KEY_OR_END:
+                pos += 1
+                stack.pop()
+                yield ("end_map", None)
+                expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_DONE
+                continue
+            if char != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes", buf, pos
+                )
+        elif char == "]" and expect == _EXPECT_VALUE_OR_END:
+            pos += 1
+            stack.pop()
+            yield ("end_array", None)
+            expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_DONE
+            continue
+
+        # parse a key or value
+        if char == "{" or char == "[":
+            pos += 1
+            stack.append(char)
+            yield ("start_map" if char == "{" else "start_array", None)
+            expect = _EXPECT_KEY_OR_END if char == "{" else _EXPECT_VALUE_OR_END
+            continue
+        elif char == '"':
+            try:
+                value, end = json.decoder.scanstring(buf, pos + 1)  # type: ignore
+            except json.JSONDecodeError:
+                # the string might continue in the next chunk
+                if eof:
+                    raise
+                read_chunk()
+                continue
+            pos = end
+            if expect in {_EXPECT_KEY, _EXPECT_KEY_OR_END}:
+                yield ("map_key", value)
+                expect = _EXPECT_COLON
+                continue
+            yield ("string", value)
+        elif char == "-" or "0" <= char <= "9":
+            number_chars = _JSON_NUMBER_CHARS.match(buf, pos)
+            assert number_chars is not None  # matches the empty string
+            token_end = number_chars.end()
+            if token_end == len(buf) and not eof:
+                # the number might continue in the next chunk
+                read_chunk()
+                continue
+            match = _JSON_NUMBER.fullmatch(buf, pos, token_end)
+            if match is None:
+                raise json.JSONDecodeError("Invalid number", buf, pos)
+            pos = match.end()
+            yield (
+                "number",
+                float(match.group())
+                if match.group(1) or match.group(2)
+                else int(match.group()),
+            )
+        else:
+            if len(buf) - pos < 5 and not eof:
+                read_chunk()
+                continue
+            for literal, event, value in _JSON_CONSTANTS:
+                if buf.startswith(literal, pos):
+                    pos += len(literal)
+                    yield (event, value)
+                    break
+            else:
+                raise json.JSONDecodeError("Expecting value", buf, pos)
+        expect = _EXPECT_COMMA_OR_END if stack else _EXPECT_DONE
+
+
+def build_json_value(
+    event: str, value: Any, events: Iterator[JSONEvent]
+) -> Union[Dict, List, int, float, str, bool, None]:
+    """
+    Returns the JSON value starting with the (event, value) from
+    iter_json_events and consumes its remaining events from events.
+
+    >>> events = iter_json_events(['[{"a": [1]}, 2]'])
+    >>> build_json_value(*next(events), events)
+    [{'a': [1]}, 2]
+    """
+    # open containers and their keys in their parent containers
+    containers: List[Union[Dict, List]] = []
+    keys: List[Optional[str]] = []
+    key: Optional[str] = None
+    while True:
+        if event == "map_key":
+            key = value
+        elif event == "start_map" or event == "start_array":
+            containers.append({} if event == "start_map" else [])
+            keys.append(key)
+        else:
+            if event == "end_map" or event == "end_array":
+                value, key = containers.pop(), keys.pop()
+            if not containers:
+                return value
+            container = containers[-1]
+            if isinstance(container, dict):
+                container[key] = value
+            else:
+                container.append(value)
+        event, value = next(events)
+
+
+def skip_json_value(event: str, events: Iterator[JSONEvent]) -> None:
+    """
+    Consumes the remaining events for a JSON value starting with event
+    from iter_json_events.
+    """
+    depth = 0
+    while True:
+        if event == "start_map" or event == "start_array":
+            depth += 1
+        elif event == "end_map" or event == "end_array":
+            depth -= 1
+        if depth == 0:
+            return
+        event, _ = next(events)
+
+
+def iter_chunks(s: AnyStr, chunk_size: int) -> Generator[AnyStr, None, None]:
+    "Generator over chunk_size slices of a str or bytes"
+    for start in range(0, len(s), chunk_size):
+        yield s[start : start + chunk_size]
+
+
 def grouper(iterable: Iterable[Any], n: int, fillvalue: Any = None):
     "Collect data into fixed-length chunks or blocks"
     # grouper('ABCDEFG', 3, 'x') --> ABC DEF Gxx"
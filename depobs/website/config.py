@@ -52,6 +52,48 @@ SQLALCHEMY_TRACK_MODIFICATIONS = bool(
 # try to create tables and views for depobs
 INIT_DB = bool(os.environ.get("INIT_DB", False) == "1")
 
+# back report_score_view with the report_scores table refreshed for
+# reports as they're stored instead of computing scores on read
+MATERIALIZE_SCORE_VIEWS = bool(os.environ.get("MATERIALIZE_SCORE_VIEWS", False) == "1")
+
+# number of rows to insert with each statement and commit for bulk inserts
+BULK_INSERT_CHUNK_SIZE = int(os.environ.get("BULK_INSERT_CHUNK_SIZE", "500"))
+
+# graph traversal engine to find dependencies when scoring package graphs
+# "networkx", "bitset" (faster for graphs with large dependency cycles),
+# or "csr" (bitset traversal of a compact array-backed graph). "bitset"
+# and "csr" only count reachable nodes as indirect dependencies, so they
+# can lower all_deps and indirect vulnerability counts from "networkx"
+SCORING_TRAVERSAL_ENGINE = os.environ.get("SCORING_TRAVERSAL_ENGINE", "networkx")
+
+# save fingerprints of scored reports to reuse reports for the same
+# dependency subtrees and scoring data in other package graphs (ignored
+# by the "networkx" traversal engine)
+PERSIST_REPORT_FINGERPRINTS = bool(
+    os.environ.get("PERSIST_REPORT_FINGERPRINTS", "1") == "1"
+)
+
+# package graph ID to profile scoring with cProfile and log the stats for
+SCORING_PROFILE_GRAPH_ID = (
+    int(os.environ["SCORING_PROFILE_GRAPH_ID"])
+    if os.environ.get("SCORING_PROFILE_GRAPH_ID", None)
+    else None
+)
+
+# seconds to cache /statistics counts and to wait between refreshing
+# them from exact counts instead of query planner estimates
+STATISTICS_CACHE_SECONDS = int(os.environ.get("STATISTICS_CACHE_SECONDS", "60"))
+STATISTICS_EXACT_REFRESH_SECONDS = int(
+    os.environ.get("STATISTICS_EXACT_REFRESH_SECONDS", "3600")
+)
+
+# max depth of nested reports returned by /package and /parents
+REPORT_TREE_MAX_DEPTH = int(os.environ.get("REPORT_TREE_MAX_DEPTH", "5"))
+
+# max number of links to walk and page size for /dependents lookups
+DEPENDENTS_MAX_DEPTH = int(os.environ.get("DEPENDENTS_MAX_DEPTH", "20"))
+DEPENDENTS_MAX_PER_PAGE = int(os.environ.get("DEPENDENTS_MAX_PER_PAGE", "500"))
+
 # Task names the web/flask app can register and run
 WEB_TASK_NAMES = [
     "add",
@@ -186,5 +228,18 @@ SCAN_NPM_TARBALL_ARGS = {
         languages=["nodejs"],
         package_managers=["npm"],
         repo_tasks=["install", "list_metadata", "audit"],
+        # spool task output to disk once larger than this many bytes
+        exec_output_spool_max_size=int(
+            os.environ.get("SCAN_EXEC_OUTPUT_SPOOL_MAX_SIZE", "8388608")
+        ),
+        # number of warm containers to keep and lease to scans with
+        # their own working dir (0 runs a new container per scan). Pooled
+        # scans install with --ignore-scripts, since scripts could change
+        # the container outside the working dir for later scans
+        container_pool_size=int(os.environ.get("SCAN_CONTAINER_POOL_SIZE", "0")),
+        # number of scans to run in a pooled container before replacing it
+        container_pool_max_uses=int(
+            os.environ.get("SCAN_CONTAINER_POOL_MAX_USES", "25")
+        ),
     ),
 }
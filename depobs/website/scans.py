@@ -31,6 +31,30 @@ def validate_scored_after_ts_query_param() -> datetime:
     )
 
 
+def validate_int_query_param(
+    param_name: str, default: int, min_value: int, max_value: int
+) -> int:
+    """
+    Returns the value of an optional integer query param, the default
+    when it is missing, or raises BadRequest for other values outside
+    [min_value, max_value].
+    """
+    param_values = request.args.getlist(param_name, str)
+    if len(param_values) > 1:
+        raise BadRequest(description=f"only one {param_name} param supported")
+    if not len(param_values):
+        return default
+    try:
+        param_value = int(param_values[0])
+    except ValueError:
+        raise BadRequest(description=f"{param_name} must be an integer")
+    if not (min_value <= param_value <= max_value):
+        raise BadRequest(
+            description=f"{param_name} must be between {min_value} and {max_value}"
+        )
+    return param_value
+
+
 def validate_npm_package_version_query_params() -> Tuple[str, str, str]:
     package_names = request.args.getlist("package_name", str)
     package_versions = request.args.getlist("package_version", str)
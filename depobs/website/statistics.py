@@ -0,0 +1,54 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import current_app
+
+from depobs.database import models
+
+log = logging.getLogger(__name__)
+
+
+class StatisticsCache:
+    """
+    Caches /statistics counts in-process.
+
+    Serves cached counts for cache_seconds. On expiry refreshes from
+    exact counts when they are more than exact_refresh_seconds old and
+    from cheap planner estimates otherwise.
+    """
+
+    def __init__(self, cache_seconds: float, exact_refresh_seconds: float):
+        self.cache_seconds = cache_seconds
+        self.exact_refresh_seconds = exact_refresh_seconds
+        self.statistics: Optional[Dict[str, int]] = None
+        self.fetched_at: float = float("-inf")
+        self.exact_fetched_at: float = float("-inf")
+        self.lock = threading.Lock()
+
+    def get(self) -> Dict[str, int]:
+        with self.lock:
+            now = time.monotonic()
+            if self.statistics is None or now - self.fetched_at >= self.cache_seconds:
+                if now - self.exact_fetched_at >= self.exact_refresh_seconds:
+                    log.info("refreshing exact statistics")
+                    self.statistics = models.get_statistics()
+                    self.exact_fetched_at = now
+                else:
+                    self.statistics = models.get_estimated_statistics()
+                self.fetched_at = now
+            return dict(self.statistics)
+
+
+def get_statistics_cache() -> StatisticsCache:
+    """Returns the statistics cache for the Flask app.
+
+    Call it in a flask application context.
+    """
+    if not hasattr(current_app, "statistics_cache"):
+        current_app.statistics_cache = StatisticsCache(  # type: ignore
+            current_app.config["STATISTICS_CACHE_SECONDS"],
+            current_app.config["STATISTICS_EXACT_REFRESH_SECONDS"],
+        )
+    return current_app.statistics_cache  # type: ignore
@@ -5,6 +5,7 @@ from typing import Dict, List, Optional
 from flask import (
     abort,
     Blueprint,
+    current_app,
     Response,
     redirect,
     request,
@@ -15,10 +16,12 @@ from werkzeug.exceptions import BadRequest, NotFound
 
 from depobs.database import models
 from depobs.website.scans import (
+    validate_int_query_param,
     validate_npm_package_version_query_params,
     validate_scored_after_ts_query_param,
 )
 from depobs.website.celery_tasks import get_celery_tasks
+from depobs.website.statistics import get_statistics_cache
 
 log = logging.getLogger(__name__)
 
@@ -202,7 +205,7 @@ def handle_package_report_not_found(e):
             models.insert_package_report_placeholder_or_update_task_id(
                 package_name, entry.package_version, scan_task.id
             )
-            for entry in models.get_NPMRegistryEntry(package_name)
+            for entry in models.get_latest_npm_registry_entries(package_name)
         ]
         log.info(
             f"inserted placeholder PackageReports for {package_name} at versions {[(pr.id, pr.version) for pr in package_reports]}"
@@ -216,22 +219,33 @@ def handle_package_report_not_found(e):
                 ),
                 404,
             )
-        # return the report for the alphabetically highest version number (likely most recently published package)
-        package_report = package_reports[-1]
+        # return the report for the highest semver version
+        package_report = package_reports[0]
 
     return package_report.report_json, 202
 
 
+def validate_report_tree_depth_query_param() -> int:
+    return validate_int_query_param(
+        "depth",
+        default=1,
+        min_value=0,
+        max_value=current_app.config["REPORT_TREE_MAX_DEPTH"],
+    )
+
+
 @api.route("/package", methods=["GET"])
 def show_package_by_name_and_version_if_available() -> Dict:
     scored_after = validate_scored_after_ts_query_param()
     package_name, package_version, _ = validate_npm_package_version_query_params()
     # TODO: fetch all package versions
 
+    depth = validate_report_tree_depth_query_param()
+
     package_report = get_most_recently_scored_package_report_or_raise(
         package_name, package_version, scored_after
     )
-    return package_report.json_with_dependencies()
+    return package_report.json_with_dependencies(depth)
 
 
 @api.route("/parents", methods=["GET"])
@@ -240,10 +254,60 @@ def get_parents_by_name_and_version() -> Dict:
     package_name, package_version, _ = validate_npm_package_version_query_params()
     # TODO: fetch all package versions
 
+    depth = validate_report_tree_depth_query_param()
+
     package_report = get_most_recently_scored_package_report_or_raise(
         package_name, package_version, scored_after
     )
-    return package_report.json_with_parents()
+    return package_report.json_with_parents(depth)
+
+
+@api.route("/dependents", methods=["GET"])
+def get_transitive_dependents_by_name_and_version() -> Dict:
+    """
+    Returns a page of package versions that depend on the package
+    version directly or transitively up to the depth query param links
+    away. With roots_only=1 only returns the roots of scanned packages.
+    """
+    package_name, package_version, _ = validate_npm_package_version_query_params()
+    if package_version is None:
+        raise BadRequest(description="package_version is required")
+    max_depth = validate_int_query_param(
+        "depth",
+        default=current_app.config["DEPENDENTS_MAX_DEPTH"],
+        min_value=1,
+        max_value=current_app.config["DEPENDENTS_MAX_DEPTH"],
+    )
+    page = validate_int_query_param("page", default=1, min_value=1, max_value=10000)
+    per_page = validate_int_query_param(
+        "per_page",
+        default=100,
+        min_value=1,
+        max_value=current_app.config["DEPENDENTS_MAX_PER_PAGE"],
+    )
+    roots_only = request.args.get("roots_only", "0") == "1"
+
+    package = models.get_most_recently_inserted_package_from_name_and_version(
+        package_name, package_version
+    )
+    if package is None:
+        raise NotFound(
+            description=f"Unable to find scanned package {package_name}@{package_version}."
+        )
+    return dict(
+        package=package_name,
+        version=package_version,
+        depth=max_depth,
+        page=page,
+        per_page=per_page,
+        roots_only=roots_only,
+        dependents=[
+            dict(package=name, version=version, depth=depth)
+            for (_, name, version, depth) in models.get_transitive_dependents(
+                package.id, max_depth, roots_only, page, per_page
+            )
+        ],
+    )
 
 
 @api.route("/vulnerabilities", methods=["GET"])
@@ -259,7 +323,7 @@ def get_graph(graph_id):
 
 @api.route("/statistics", methods=["GET"])
 def get_statistics() -> Dict:
-    return models.get_statistics()
+    return get_statistics_cache().get()
 
 
 @api.after_request
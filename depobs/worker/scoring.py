@@ -1,10 +1,30 @@
 from datetime import datetime
 from collections import ChainMap, Counter
+import contextlib
+import cProfile
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 import enum
+import hashlib
+import io
+import json
 import logging
+import pstats
+import time
 from os.path import commonprefix
-from typing import Any, Dict, List, Optional, Set, Type, Tuple, Union, Iterable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Type,
+    Tuple,
+    Union,
+    Iterable,
+)
 
 import networkx as nx
 
@@ -14,9 +34,18 @@ from depobs.database.models import (
     PackageGraph,
     PackageReport,
     PackageVersion,
+    get_graph_scored_package_reports_by_package_version_id,
+    get_package_reports_by_fingerprint,
+    save_report_fingerprints,
+)
+from depobs.scanner.csr_graph import CSRPackageGraph, strongly_connected_components
+from depobs.scanner.graph_traversal import (
+    condensation_members_iter,
+    node_and_dependent_ids,
+    node_dep_ids_iters,
 )
-from depobs.scanner.graph_traversal import node_dep_ids_iter
 import depobs.scanner.graph_util as graph_util
+from depobs.util.semver_util import SemverIndex
 
 
 log = logging.getLogger(__name__)
@@ -42,6 +71,16 @@ def zeroed_severity_counter() -> Counter:
     return counter
 
 
+def advisory_dedupe_key(advisory: Advisory) -> Any:
+    "Returns the Advisory ID or object identity for unsaved advisories"
+    return advisory.id if advisory.id is not None else ("unsaved", id(advisory))
+
+
+def popcount(bits: int) -> int:
+    "Returns the number of set bits in a non-negative int"
+    return bin(bits).count("1")
+
+
 def count_advisories_by_severity(advisories: List[Advisory]) -> Counter:
     """Given a list of advisories returns a collections.Counter with
     counts for non-zero severities.
@@ -58,6 +97,26 @@ def count_advisories_by_severity(advisories: List[Advisory]) -> Counter:
     return counter
 
 
+def closest_version_by_common_prefix(
+    package_version: str, scored_versions: Iterable[str]
+) -> str:
+    """
+    Returns the scored version with the longest common prefix with the
+    package version for versions that aren't valid semver
+
+    >>> closest_version_by_common_prefix("1.1.0-foo", ["1.0.0", "1.1.0-bar"])
+    '1.1.0-bar'
+    """
+    sorted_scored_versions = sorted(scored_versions)
+    closest_version = sorted_scored_versions[0]
+    for scored_version in sorted_scored_versions:
+        if len(commonprefix([package_version, scored_version])) > len(
+            commonprefix([package_version, closest_version])
+        ):
+            closest_version = scored_version
+    return closest_version
+
+
 class ScoreComponent:
     # a name to save the loaded data in the nx.DiGraph node attr
     graph_node_attr_name: Optional[str] = None
@@ -91,6 +150,40 @@ class ScoreComponent:
         """Computes fields from node with data, direct_deps, indirect_deps"""
         raise NotImplementedError()
 
+    @staticmethod
+    def get_package_report_updates_by_node_id(
+        component: Type["ScoreComponent"],
+        g: nx.DiGraph,
+        dep_ids_by_node_id: Dict[int, Tuple[Set[int], Set[int]]],
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Computes fields for every node from a dict of node ID to its
+        (direct_deps, indirect_deps). Components can override it to
+        score the whole graph at once.
+        """
+        return {
+            node_id: component.get_package_report_updates(
+                component,
+                g=g,
+                node_id=node_id,
+                direct_dep_ids=direct_dep_ids,
+                indirect_dep_ids=indirect_dep_ids,
+            )
+            for node_id, (
+                direct_dep_ids,
+                indirect_dep_ids,
+            ) in dep_ids_by_node_id.items()
+        }
+
+    @staticmethod
+    def fingerprint_node_data(data: Any) -> Any:
+        """
+        Returns a JSON serializable value of the node data from
+        data_by_package_version_id that changes when the component's
+        score for the node would change
+        """
+        return data
+
     def get_node_aggregates(self, node: Dict) -> Dict[str, Any]:
         """
         TODO: Given a node returns values for aggregation? Computes
@@ -127,6 +220,10 @@ class PackageVersionScoreComponent(ScoreComponent):
         version = getattr(node_data, "version", None) if node_data else None
         return dict(package=name, version=version,)
 
+    @staticmethod
+    def fingerprint_node_data(data: Any) -> Any:
+        return (getattr(data, "name", None), getattr(data, "version", None))
+
 
 class NPMSIOScoreComponent(ScoreComponent):
     graph_node_attr_name = "npmsio_score"
@@ -140,7 +237,34 @@ class NPMSIOScoreComponent(ScoreComponent):
     def data_by_package_version_id(
         db_graph: PackageGraph,
     ) -> Dict[PackageVersionID, Any]:
-        return db_graph.get_npmsio_scores_by_package_version_id()
+        """
+        Returns a dict of package version ID to (package version,
+        scores by scored version, SemverIndex of the scored versions)
+        building one SemverIndex per package name for versions without
+        an exact score.
+        """
+        package_versions_by_id = db_graph.distinct_package_versions_by_id
+        semver_indexes_by_package_name: Dict[str, SemverIndex] = {}
+        data: Dict[PackageVersionID, Any] = {}
+        for (
+            package_version_id,
+            (package_version, scores),
+        ) in db_graph.get_npmsio_scores_by_package_version_id().items():
+            semver_index = None
+            if scores and package_version not in scores:
+                package_name = package_versions_by_id[package_version_id].name
+                semver_index = semver_indexes_by_package_name.get(package_name, None)
+                if semver_index is None:
+                    semver_index = semver_indexes_by_package_name[
+                        package_name
+                    ] = SemverIndex(scores.keys())
+            data[package_version_id] = (package_version, scores, semver_index)
+        return data
+
+    @staticmethod
+    def fingerprint_node_data(data: Any) -> Any:
+        # the SemverIndex is derived from the scores
+        return data[:2] if isinstance(data, tuple) else data
 
     @staticmethod
     def get_package_report_updates(
@@ -151,15 +275,15 @@ class NPMSIOScoreComponent(ScoreComponent):
         indirect_dep_ids: Set[int],
     ) -> Dict[str, Union[None, float, int, str]]:
         package_version_and_scores: Optional[
-            Tuple[str, Dict[str, Union[int, float, None]]]
+            Tuple[str, Dict[str, Union[int, float, None]], Optional[SemverIndex]]
         ] = g.nodes[node_id][component.graph_node_attr_name]
         if not (
             isinstance(package_version_and_scores, tuple)
-            and len(package_version_and_scores) == 2
+            and len(package_version_and_scores) in {2, 3}
         ):
             return dict(npmsio_score=None, npmsio_scored_package_version=None,)
 
-        package_version, scores = package_version_and_scores
+        package_version, scores, *rest = package_version_and_scores
         if not scores:
             return dict(npmsio_score=None, npmsio_scored_package_version=None,)
 
@@ -168,14 +292,14 @@ class NPMSIOScoreComponent(ScoreComponent):
                 npmsio_score=scores[package_version],
                 npmsio_scored_package_version=package_version,
             )
-        # assuming semver versions find the longest common prefix
-        scored_versions = sorted(scores.keys())
-        closest_version = scored_versions[0]
-        for scored_version in scored_versions:
-            if len(commonprefix([package_version, scored_version])) > len(
-                commonprefix([package_version, closest_version])
-            ):
-                closest_version = scored_version
+        semver_index = rest[0] if rest and rest[0] is not None else None
+        if semver_index is None:
+            semver_index = SemverIndex(scores.keys())
+        closest_version = semver_index.closest(package_version)
+        if closest_version is None:
+            closest_version = closest_version_by_common_prefix(
+                package_version, scores.keys()
+            )
 
         if closest_version:
             return dict(
@@ -247,6 +371,13 @@ class AdvisoryScoreComponent(ScoreComponent):
     ) -> Dict[PackageVersionID, Any]:
         return db_graph.get_advisories_by_package_version_id()
 
+    @staticmethod
+    def fingerprint_node_data(data: Any) -> Any:
+        return sorted(
+            ((advisory.id, advisory.url, advisory.severity) for advisory in data or []),
+            key=repr,
+        )
+
     @staticmethod
     def get_package_report_updates(
         component: Type["ScoreComponent"],
@@ -257,8 +388,14 @@ class AdvisoryScoreComponent(ScoreComponent):
     ) -> Dict[str, int]:
         result = {key: 0 for key in component.package_report_fields}
 
-        node_advisories = g.nodes[node_id].get(component.graph_node_attr_name, []) or []
-        direct_vuln_counts = count_advisories_by_severity(node_advisories)
+        node_advisories_by_key: Dict[Any, Advisory] = {
+            advisory_dedupe_key(advisory): advisory
+            for advisory in g.nodes[node_id].get(component.graph_node_attr_name, [])
+            or []
+        }
+        direct_vuln_counts = count_advisories_by_severity(
+            list(node_advisories_by_key.values())
+        )
         result.update(
             {
                 f"directVulns{severity.name.capitalize()}_score": count
@@ -266,17 +403,15 @@ class AdvisoryScoreComponent(ScoreComponent):
             }
         )
 
-        # TODO: de-dup by Advisory ID
-        dep_advisory_lists: List[List[Advisory]] = [
-            g.nodes[node_id].get(component.graph_node_attr_name, []) or []
-            for node_id in (direct_dep_ids | indirect_dep_ids)
-        ]
-        dep_advisories = [
-            advisory
-            for dep_advisory_list in dep_advisory_lists
-            for advisory in dep_advisory_list
-        ]
-        indirect_vuln_counts = count_advisories_by_severity(dep_advisories)
+        dep_advisories_by_key: Dict[Any, Advisory] = {
+            advisory_dedupe_key(advisory): advisory
+            for dep_id in (direct_dep_ids | indirect_dep_ids)
+            for advisory in g.nodes[dep_id].get(component.graph_node_attr_name, [])
+            or []
+        }
+        indirect_vuln_counts = count_advisories_by_severity(
+            list(dep_advisories_by_key.values())
+        )
         result.update(
             {
                 f"indirectVulns{severity.name.capitalize()}_score": count
@@ -285,6 +420,66 @@ class AdvisoryScoreComponent(ScoreComponent):
         )
         return result
 
+    @staticmethod
+    def get_package_report_updates_by_node_id(
+        component: Type["ScoreComponent"],
+        g: nx.DiGraph,
+        dep_ids_by_node_id: Dict[int, Tuple[Set[int], Set[int]]],
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Counts advisories for every node at once using int bitsets as
+        rows of a sparse matrix with one column per unique advisory.
+
+        ORs node advisory rows over each node's dependencies (i.e.
+        multiplies the node by advisory incidence matrix by the
+        dependency reachability matrix) and counts severities by
+        AND-ing with a column mask per severity.
+
+        Nodes to score can depend on nodes in g that aren't scored.
+        """
+        column_by_key: Dict[Any, int] = {}
+        severity_masks: Dict[AdvisorySeverity, int] = {
+            severity: 0 for severity in AdvisorySeverity
+        }
+        # include nodes without scores to count advisories of their deps
+        advisory_bits_by_node_id: Dict[int, int] = {}
+        for node_id in g.nodes:
+            bits = 0
+            for advisory in (
+                g.nodes[node_id].get(component.graph_node_attr_name, []) or []
+            ):
+                if not (
+                    isinstance(advisory.severity, str)
+                    and advisory.severity.upper() in AdvisorySeverity.__members__
+                ):
+                    continue
+                key = advisory_dedupe_key(advisory)
+                column = column_by_key.get(key, None)
+                if column is None:
+                    column = column_by_key[key] = len(column_by_key)
+                    severity_masks[AdvisorySeverity[advisory.severity.upper()]] |= (
+                        1 << column
+                    )
+                bits |= 1 << column
+            advisory_bits_by_node_id[node_id] = bits
+
+        def severity_counts(bits: int, prefix: str) -> Dict[str, int]:
+            return {
+                f"{prefix}{severity.name.capitalize()}_score": popcount(bits & mask)
+                for severity, mask in severity_masks.items()
+            }
+
+        updates_by_node_id: Dict[int, Dict[str, Any]] = {}
+        for node_id, (direct_dep_ids, indirect_dep_ids) in dep_ids_by_node_id.items():
+            dep_bits = 0
+            for dep_id in direct_dep_ids | indirect_dep_ids:
+                dep_bits |= advisory_bits_by_node_id.get(dep_id, 0)
+            updates_by_node_id[node_id] = {
+                **severity_counts(advisory_bits_by_node_id[node_id], "directVulns"),
+                **severity_counts(dep_bits, "indirectVulns"),
+            }
+        return updates_by_node_id
+
 
 class DependencyCountScoreComponent(ScoreComponent):
     graph_node_attr_name = None
@@ -323,46 +518,159 @@ all_score_components = [
 ]
 
 
+@dataclass
+class ScoringTiming:
+    "Wall time in seconds, call count, and node count for a scoring phase"
+    seconds: float = 0.0
+    calls: int = 0
+    nodes: int = 0
+
+
+@dataclass
+class ScoringStats:
+    """
+    Timings for scoring a package graph by phase (hydrate, traverse,
+    score, link, and store) and by ScoreComponent name and phase
+    (hydrate for data_by_package_version_id and score for report
+    updates)
+    """
+
+    graph_id: Optional[int] = None
+    phases: Dict[str, ScoringTiming] = field(default_factory=dict)
+    components: Dict[str, Dict[str, ScoringTiming]] = field(default_factory=dict)
+    # cProfile stats sorted by cumulative time when profiled
+    profile: Optional[str] = None
+
+    @contextlib.contextmanager
+    def timed(
+        self,
+        phase: str,
+        nodes: int = 0,
+        component: Optional[Type[ScoreComponent]] = None,
+    ) -> Iterator[None]:
+        "Adds the wall time of the with block to the phase or component phase"
+        if component is None:
+            timing = self.phases.setdefault(phase, ScoringTiming())
+        else:
+            timing = self.components.setdefault(component.__name__, {}).setdefault(
+                phase, ScoringTiming()
+            )
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing.seconds += time.perf_counter() - start
+            timing.calls += 1
+            timing.nodes += nodes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        "Returns the timings on one line for logging"
+
+        def format_timing(name: str, timing: ScoringTiming) -> str:
+            return (
+                f"{name}={timing.seconds:.3f}s/{timing.calls}calls/{timing.nodes}nodes"
+            )
+
+        return " ".join(
+            [
+                f"scoring stats for graph id={self.graph_id}:",
+                *(
+                    format_timing(phase, timing)
+                    for phase, timing in self.phases.items()
+                ),
+                *(
+                    format_timing(f"{component_name}.{phase}", timing)
+                    for component_name, timings in self.components.items()
+                    for phase, timing in timings.items()
+                ),
+            ]
+        )
+
+
 def score_package(
-    g: nx.DiGraph,
+    g: Union[nx.DiGraph, CSRPackageGraph],
     node_id: int,
     direct_dep_ids: Set[int],
     indirect_dep_ids: Set[int],
     score_components: Iterable[Type[ScoreComponent]],
+    stats: Optional[ScoringStats] = None,
 ) -> PackageReport:
     """Scores a package node on a PackageGraph using the provided components"""
+    if stats is None:
+        stats = ScoringStats()
     # get package report fields for each component
     report_kwargs = dict(scoring_date=datetime.now(), status="scanned",)
     for component in score_components:
-        updates = component.get_package_report_updates(
-            component,
-            g=g,
-            node_id=node_id,
-            direct_dep_ids=direct_dep_ids,
-            indirect_dep_ids=indirect_dep_ids,
-        )
+        with stats.timed("score", nodes=1, component=component):
+            updates = component.get_package_report_updates(
+                component,
+                g=g,
+                node_id=node_id,
+                direct_dep_ids=direct_dep_ids,
+                indirect_dep_ids=indirect_dep_ids,
+            )
 
         report_kwargs.update(updates)
     return PackageReport(**report_kwargs)
 
 
+def score_packages(
+    g: Union[nx.DiGraph, CSRPackageGraph],
+    dep_ids_by_node_id: Dict[int, Tuple[Set[int], Set[int]]],
+    score_components: Iterable[Type[ScoreComponent]],
+    stats: Optional[ScoringStats] = None,
+) -> Dict[int, PackageReport]:
+    """
+    Scores every package node on a PackageGraph with each component's
+    get_package_report_updates_by_node_id given a dict of node ID to
+    its (direct_deps, indirect_deps). Keeps the node order.
+    """
+    if stats is None:
+        stats = ScoringStats()
+    report_kwargs_by_node_id: Dict[int, Dict[str, Any]] = {
+        node_id: dict(scoring_date=datetime.now(), status="scanned",)
+        for node_id in dep_ids_by_node_id
+    }
+    for component in score_components:
+        with stats.timed("score", nodes=len(dep_ids_by_node_id), component=component):
+            updates_by_node_id = component.get_package_report_updates_by_node_id(
+                component, g, dep_ids_by_node_id
+            )
+        for node_id, updates in updates_by_node_id.items():
+            report_kwargs_by_node_id[node_id].update(updates)
+    return {
+        node_id: PackageReport(**report_kwargs)
+        for node_id, report_kwargs in report_kwargs_by_node_id.items()
+    }
+
+
 def add_scoring_component_data_to_node_attrs(
     db_graph: PackageGraph,
-    g: nx.DiGraph,
+    g: Union[nx.DiGraph, CSRPackageGraph],
     score_components: Iterable[Type[ScoreComponent]],
-) -> nx.DiGraph:
-    """Adds node attribute data for the provided scoring components to the networkx package DiGraph in-place"""
+    stats: Optional[ScoringStats] = None,
+) -> Union[nx.DiGraph, CSRPackageGraph]:
+    """Adds node attribute data for the provided scoring components to the networkx package DiGraph or CSRPackageGraph in-place"""
+    if stats is None:
+        stats = ScoringStats()
+    data_by_attr_name: Dict[str, Dict[PackageVersionID, Any]] = dict()
+    for component in score_components:
+        if (
+            component.graph_node_attr_name is None
+            or component.graph_node_attr_name == ""
+        ):
+            continue
+        with stats.timed("hydrate", nodes=len(g.nodes), component=component):
+            data_by_attr_name[
+                component.graph_node_attr_name
+            ] = component.data_by_package_version_id(db_graph)
     graph_util.update_node_attrs(
         g,
         **{
-            **{
-                component.graph_node_attr_name: component.data_by_package_version_id(
-                    db_graph
-                )
-                for component in score_components
-                if component.graph_node_attr_name is not None
-                and component.graph_node_attr_name != ""
-            },
+            **data_by_attr_name,
             "label": {
                 pv.id: f"{pv.name}@{pv.version}"
                 for pv in db_graph.distinct_package_versions_by_id.values()
@@ -372,14 +680,231 @@ def add_scoring_component_data_to_node_attrs(
     return g
 
 
+def fingerprint(value: Any) -> str:
+    "Returns the hex SHA-256 digest of a JSON serializable value"
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+
+
+def package_graph_fingerprints(
+    g: Union[nx.DiGraph, CSRPackageGraph],
+    score_components: Iterable[Type[ScoreComponent]],
+    components: Iterable[Iterable[PackageVersionID]],
+) -> Dict[PackageVersionID, str]:
+    """
+    Returns Merkle-style fingerprints for each node of a package graph
+    with scoring component data node attributes and its strongly
+    connected components' member node IDs in reverse topological order
+    (i.e. a component only points to itself and earlier components) as
+    found when traversing it.
+
+    A node's fingerprint hashes its node ID and the fingerprint of its
+    strongly connected component. Component fingerprints hash the
+    scoring component names and each member's node ID, component
+    inputs (from fingerprint_node_data), and direct dependency IDs with
+    the fingerprints of the components they depend on. So nodes in
+    different graphs have the same fingerprint when they have the same
+    reachable subgraph and scoring inputs.
+
+    >>> g = nx.DiGraph([(0, 1)])
+    >>> package_graph_fingerprints(g, [], [[1], [0]])[1] == package_graph_fingerprints(nx.DiGraph([(2, 1)]), [], [[1], [2]])[1]
+    True
+    >>> package_graph_fingerprints(g, [], [[1], [0]])[0] == package_graph_fingerprints(nx.DiGraph([(0, 2)]), [], [[2], [0]])[0]
+    False
+    """
+    score_components = list(score_components)
+    component_names = [component.__name__ for component in score_components]
+
+    def node_inputs(node_id: PackageVersionID) -> List[Any]:
+        node_data = g.nodes[node_id]
+        return [
+            component.fingerprint_node_data(
+                node_data.get(component.graph_node_attr_name, None)
+            )
+            for component in score_components
+            if component.graph_node_attr_name
+        ]
+
+    scc_indexes: Dict[PackageVersionID, int] = dict()
+    scc_fingerprints: List[str] = []
+    for scc_index, members in enumerate(components):
+        member_ids = sorted(members)
+        for node_id in member_ids:
+            scc_indexes[node_id] = scc_index
+        member_dep_ids = [sorted(g.successors(node_id)) for node_id in member_ids]
+        scc_fingerprints.append(
+            fingerprint(
+                [
+                    component_names,
+                    [
+                        [node_id, node_inputs(node_id), dep_ids]
+                        for node_id, dep_ids in zip(member_ids, member_dep_ids)
+                    ],
+                    sorted(
+                        set(
+                            scc_fingerprints[scc_indexes[dep_id]]
+                            for dep_ids in member_dep_ids
+                            for dep_id in dep_ids
+                            if scc_indexes[dep_id] != scc_index
+                        )
+                    ),
+                ]
+            )
+        )
+    return {
+        node_id: fingerprint([node_id, scc_fingerprints[scc_index]])
+        for node_id, scc_index in scc_indexes.items()
+    }
+
+
+class ScoredReportCache:
+    """
+    Caches scored PackageReports by package_graph_fingerprints
+    fingerprint in memory and, when persisted, loads and saves them
+    with the report_fingerprints table
+
+    Nodes of one graph have distinct fingerprints, so an unpersisted
+    cache only hits when it's reused to score other graphs.
+    """
+
+    def __init__(self, persisted: bool = False):
+        self.persisted = persisted
+        self.reports_by_fingerprint: Dict[str, PackageReport] = dict()
+        self.unsaved_fingerprints: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, fingerprints: Iterable[str]) -> Dict[str, PackageReport]:
+        "Returns a dict of fingerprint to cached report for the fingerprints found"
+        fingerprints = set(fingerprints)
+        missing_fingerprints = fingerprints - self.reports_by_fingerprint.keys()
+        if self.persisted and missing_fingerprints:
+            self.reports_by_fingerprint.update(
+                get_package_reports_by_fingerprint(missing_fingerprints)
+            )
+        found = {
+            fingerprint: self.reports_by_fingerprint[fingerprint]
+            for fingerprint in fingerprints
+            if fingerprint in self.reports_by_fingerprint
+        }
+        self.hits += len(found)
+        self.misses += len(fingerprints) - len(found)
+        return found
+
+    def add_many(self, reports_by_fingerprint: Dict[str, PackageReport]) -> None:
+        self.reports_by_fingerprint.update(reports_by_fingerprint)
+        self.unsaved_fingerprints.update(reports_by_fingerprint.keys())
+
+    def save(self) -> None:
+        "When persisted saves fingerprints of added reports that were stored"
+        if self.persisted:
+            save_report_fingerprints(
+                {
+                    fingerprint: self.reports_by_fingerprint[fingerprint].id
+                    for fingerprint in self.unsaved_fingerprints
+                    if self.reports_by_fingerprint[fingerprint].id is not None
+                }
+            )
+        self.unsaved_fingerprints.clear()
+
+
+def package_graph_to_scoring_graph(
+    db_graph: PackageGraph, traversal_engine: str
+) -> Union[nx.DiGraph, CSRPackageGraph]:
+    "Converts a DB PackageGraph to the graph type the traversal engine takes"
+    if traversal_engine == "csr":
+        return graph_util.package_graph_to_csr_graph(db_graph)
+    return graph_util.package_graph_to_networkx_graph(db_graph)
+
+
 def score_package_graph(
     db_graph: PackageGraph,
     score_components: Optional[Iterable[Type[ScoreComponent]]] = None,
     nx_graph: Optional[nx.DiGraph] = None,
+    traversal_engine: str = "networkx",
+    vectorized: bool = True,
+    report_cache: Optional[ScoredReportCache] = None,
+    stats: Optional[ScoringStats] = None,
+    profile: bool = False,
 ) -> Dict[PackageVersionID, PackageReport]:
     """
     Scores a database PackageGraph model with the provided components.
+
+    traversal_engine picks the graph_traversal.node_dep_ids_iters
+    function to find each node's dependencies. The "csr" engine scores
+    a compact CSRPackageGraph instead of a networkx.DiGraph and does not
+    support passing an nx_graph.
+
+    When vectorized is true, scores all nodes with each component's
+    get_package_report_updates_by_node_id instead of one node at a time.
+
+    When a report_cache is provided, reuses cached reports for nodes
+    other than the graph root with the same package_graph_fingerprints
+    fingerprint and adds new reports to it. Fingerprints only cover
+    the reachable subgraph, so the cache only works with the exact
+    "bitset" or "csr" traversal engines.
+
+    Records phase and component timings in stats or logs them when no
+    stats are provided (e.g. for callers to time storing the reports
+    before logging). When profile is true, saves cProfile stats to
+    stats.profile and logs them.
     """
+    if traversal_engine not in node_dep_ids_iters:
+        raise ValueError(
+            f"unknown traversal engine {traversal_engine!r} expected one of"
+            f" {sorted(node_dep_ids_iters)}"
+        )
+    if nx_graph is not None and traversal_engine == "csr":
+        raise ValueError(
+            "the csr traversal engine scores a CSRPackageGraph and can't take an"
+            " nx_graph; use another traversal_engine to score an nx_graph"
+        )
+    if report_cache is not None and traversal_engine == "networkx":
+        raise ValueError(
+            "the networkx traversal engine includes unreachable nodes in indirect"
+            " dependencies and can't reuse reports from a report_cache"
+        )
+    graph_stats = ScoringStats(graph_id=db_graph.id) if stats is None else stats
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        reports_by_package_version_id = _score_package_graph(
+            db_graph,
+            score_components,
+            nx_graph,
+            traversal_engine,
+            vectorized,
+            report_cache,
+            graph_stats,
+        )
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profile_output = io.StringIO()
+            pstats.Stats(profiler, stream=profile_output).sort_stats(
+                "cumulative"
+            ).print_stats(50)
+            graph_stats.profile = profile_output.getvalue()
+            log.info(f"profiled scoring graph id={db_graph.id}:\n{graph_stats.profile}")
+    if stats is None:
+        log.info(graph_stats.summary())
+    return reports_by_package_version_id
+
+
+def _score_package_graph(
+    db_graph: PackageGraph,
+    score_components: Optional[Iterable[Type[ScoreComponent]]],
+    nx_graph: Optional[nx.DiGraph],
+    traversal_engine: str,
+    vectorized: bool,
+    report_cache: Optional[ScoredReportCache],
+    stats: ScoringStats,
+) -> Dict[PackageVersionID, PackageReport]:
+    "Scores a package graph for score_package_graph recording timings in stats"
     # default to using all components if none are provided
     graph_score_components: Iterable[Type[ScoreComponent]] = []
     if score_components is None:
@@ -388,30 +913,195 @@ def score_package_graph(
         graph_score_components = score_components
     assert graph_score_components is not None
 
-    g: nx.DiGraph = add_scoring_component_data_to_node_attrs(
-        db_graph,
-        nx_graph or graph_util.package_graph_to_networkx_graph(db_graph),
-        graph_score_components,
-    )
+    g: Union[nx.DiGraph, CSRPackageGraph]
+    with stats.timed("hydrate"):
+        if nx_graph is not None:
+            g = nx_graph
+        else:
+            g = package_graph_to_scoring_graph(db_graph, traversal_engine)
+        add_scoring_component_data_to_node_attrs(
+            db_graph, g, graph_score_components, stats
+        )
+    stats.phases["hydrate"].nodes += len(g.nodes)
     log.info(
         f"scoring graph id={db_graph.id} ({len(g.edges)} edges, {len(g.nodes)} nodes) with components {graph_score_components}"
     )
-    direct_dep_ids_by_package_version_id: Dict[
-        PackageVersionID, Set[PackageVersionID]
+    dep_ids_by_package_version_id: Dict[
+        PackageVersionID, Tuple[Set[PackageVersionID], Set[PackageVersionID]]
     ] = dict()
-    reports_by_package_version_id: Dict[PackageVersionID, PackageReport] = dict()
-    for node_id, direct_dep_ids, indirect_dep_ids in node_dep_ids_iter(g):
-        direct_dep_ids_by_package_version_id[node_id] = direct_dep_ids
-        reports_by_package_version_id[node_id] = score_package(
-            g, node_id, direct_dep_ids, indirect_dep_ids, graph_score_components
+    c: Optional[nx.DiGraph] = None
+    with stats.timed("traverse", nodes=len(g.nodes)):
+        if isinstance(g, nx.DiGraph):
+            # condense once to share SCCs with the report cache
+            c = nx.algorithms.components.condensation(g)
+        for node_id, direct_dep_ids, indirect_dep_ids in node_dep_ids_iters[
+            traversal_engine
+        ](g, c):
+            dep_ids_by_package_version_id[node_id] = (direct_dep_ids, indirect_dep_ids)
+
+    fingerprints: Dict[PackageVersionID, str] = dict()
+    cached_reports_by_package_version_id: Dict[PackageVersionID, PackageReport] = dict()
+    if report_cache is not None:
+        with stats.timed("cache", nodes=len(g.nodes)):
+            # reuse the SCCs found traversing the graph
+            components: Iterable[Iterable[PackageVersionID]]
+            if c is None:
+                assert isinstance(g, CSRPackageGraph)
+                components = strongly_connected_components(g)
+            else:
+                components = condensation_members_iter(c)
+            # rescore the root so a requested scan gets a new scoring date
+            fingerprints = {
+                node_id: node_fingerprint
+                for node_id, node_fingerprint in package_graph_fingerprints(
+                    g, graph_score_components, components
+                ).items()
+                if node_id != getattr(db_graph, "root_package_version_id", None)
+            }
+            cached_reports_by_fingerprint = report_cache.get_many(fingerprints.values())
+            cached_reports_by_package_version_id = {
+                node_id: cached_reports_by_fingerprint[node_fingerprint]
+                for node_id, node_fingerprint in fingerprints.items()
+                if node_fingerprint in cached_reports_by_fingerprint
+            }
+            log.info(
+                f"reusing {len(cached_reports_by_package_version_id)} cached reports"
+                f" for graph id={db_graph.id}"
+            )
+
+    dep_ids_to_score = {
+        node_id: dep_ids
+        for node_id, dep_ids in dep_ids_by_package_version_id.items()
+        if node_id not in cached_reports_by_package_version_id
+    }
+    scored_reports_by_package_version_id: Dict[PackageVersionID, PackageReport]
+    with stats.timed("score", nodes=len(dep_ids_to_score)):
+        if vectorized:
+            scored_reports_by_package_version_id = score_packages(
+                g, dep_ids_to_score, graph_score_components, stats
+            )
+        else:
+            scored_reports_by_package_version_id = {
+                node_id: score_package(
+                    g,
+                    node_id,
+                    direct_dep_ids,
+                    indirect_dep_ids,
+                    graph_score_components,
+                    stats,
+                )
+                for node_id, (
+                    direct_dep_ids,
+                    indirect_dep_ids,
+                ) in dep_ids_to_score.items()
+            }
+    reports_by_package_version_id: Dict[PackageVersionID, PackageReport] = {
+        node_id: cached_reports_by_package_version_id.get(node_id, None)
+        or scored_reports_by_package_version_id[node_id]
+        for node_id in dep_ids_by_package_version_id
+    }
+
+    # update new report .dependencies relationship
+    with stats.timed("link", nodes=len(dep_ids_to_score)):
+        for node_id, (direct_dep_ids, _) in dep_ids_to_score.items():
+            reports_by_package_version_id[node_id].dependencies.extend(
+                reports_by_package_version_id[dep_node_id]
+                for dep_node_id in direct_dep_ids
+            )
+
+    if report_cache is not None:
+        report_cache.add_many(
+            {
+                fingerprints[node_id]: report
+                for node_id, report in scored_reports_by_package_version_id.items()
+                if node_id in fingerprints
+            }
         )
+    return reports_by_package_version_id
 
-    # update report .dependencies relationship
-    for node_id, direct_dep_ids in direct_dep_ids_by_package_version_id.items():
-        reports_by_package_version_id[node_id].dependencies.extend(
-            reports_by_package_version_id[dep_node_id] for dep_node_id in direct_dep_ids
+
+def rescore_package_graph(
+    db_graph: PackageGraph,
+    changed_package_version_ids: Iterable[PackageVersionID],
+    score_components: Optional[Iterable[Type[ScoreComponent]]] = None,
+    traversal_engine: str = "networkx",
+    get_reusable_reports: Callable[
+        [PackageGraph], Dict[PackageVersionID, PackageReport]
+    ] = get_graph_scored_package_reports_by_package_version_id,
+) -> Dict[PackageVersionID, PackageReport]:
+    """
+    Rescores the nodes of a database PackageGraph model affected by
+    changes to the data (e.g. advisories or npms.io scores) of the
+    changed package versions i.e. the changed nodes and the nodes that
+    depend on them.
+
+    Returns new reports for the affected nodes. Their dependencies
+    relationships include the new reports of affected dependencies and
+    the reports of unaffected dependencies from the graph's last
+    scoring from get_reusable_reports, so they have the same
+    dependencies as in this graph.
+
+    Returns no reports when the graph root or an unaffected dependency
+    wasn't scored with the graph, since the graph needs a full
+    score_package_graph (e.g. from a pending build_report_tree).
+    """
+    graph_score_components: Iterable[Type[ScoreComponent]] = (
+        all_score_components if score_components is None else score_components
+    )
+    g = package_graph_to_scoring_graph(db_graph, traversal_engine)
+    affected_node_ids = node_and_dependent_ids(g, changed_package_version_ids)
+    if not affected_node_ids:
+        return dict()
+
+    graph_reports_by_package_version_id = get_reusable_reports(db_graph)
+    if db_graph.root_package_version_id not in graph_reports_by_package_version_id:
+        log.info(f"not rescoring unscored graph id={db_graph.id}")
+        return dict()
+
+    add_scoring_component_data_to_node_attrs(db_graph, g, graph_score_components)
+    dep_ids_by_package_version_id: Dict[
+        PackageVersionID, Tuple[Set[PackageVersionID], Set[PackageVersionID]]
+    ] = {
+        node_id: (direct_dep_ids, indirect_dep_ids)
+        for node_id, direct_dep_ids, indirect_dep_ids in node_dep_ids_iters[
+            traversal_engine
+        ](g, None)
+        if node_id in affected_node_ids
+    }
+    reused_dep_ids: Set[PackageVersionID] = set(
+        dep_id
+        for (direct_dep_ids, _) in dep_ids_by_package_version_id.values()
+        for dep_id in direct_dep_ids
+        if dep_id not in affected_node_ids
+    )
+    reused_reports_by_package_version_id = {
+        dep_id: graph_reports_by_package_version_id[dep_id]
+        for dep_id in reused_dep_ids
+        if dep_id in graph_reports_by_package_version_id
+    }
+    unscored_dep_ids = reused_dep_ids - reused_reports_by_package_version_id.keys()
+    if unscored_dep_ids:
+        log.info(
+            f"not rescoring graph id={db_graph.id} with {len(unscored_dep_ids)}"
+            f" unscored unaffected package versions"
         )
+        return dict()
 
+    log.info(
+        f"rescoring {len(affected_node_ids)} of {len(g.nodes)} nodes in graph"
+        f" id={db_graph.id} reusing {len(reused_reports_by_package_version_id)}"
+        f" reports with components {graph_score_components}"
+    )
+    reports_by_package_version_id = score_packages(
+        g, dep_ids_by_package_version_id, graph_score_components
+    )
+    for node_id, (direct_dep_ids, _) in dep_ids_by_package_version_id.items():
+        reports_by_package_version_id[node_id].dependencies.extend(
+            reports_by_package_version_id[dep_node_id]
+            if dep_node_id in affected_node_ids
+            else reused_reports_by_package_version_id[dep_node_id]
+            for dep_node_id in direct_dep_ids
+        )
     return reports_by_package_version_id
 
 
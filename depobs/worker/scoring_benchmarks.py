@@ -0,0 +1,363 @@
+"""
+Benchmarks graph traversal and scoring on synthetic package graphs
+without a DB.
+
+Run the default suite, save results as JSON, and compare them to a
+baseline run with e.g.:
+
+python -m depobs.worker.scoring_benchmarks --output results.json --baseline baseline.json
+"""
+import argparse
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from depobs.database.models import Advisory, PackageGraph, PackageVersion
+from depobs.scanner.graph_traversal import node_dep_ids_iters
+import depobs.worker.scoring as scoring
+
+log = logging.getLogger(__name__)
+
+# bump when the results format changes
+RESULTS_VERSION = 1
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+
+@dataclass(frozen=True)
+class SyntheticGraphSpec:
+    "Parameters for generating a synthetic package graph"
+    name: str
+    # number of package versions
+    node_count: int
+    # number of layers with links from outer to inner layers
+    depth: int
+    # max number of direct dependencies of a node in an outer layer
+    fan_out: int
+    # number of dependency cycles to add and number of nodes in each
+    scc_count: int = 0
+    scc_size: int = 0
+    # fraction of package versions with an advisory
+    advisory_density: float = 0.0
+    seed: int = 0
+
+
+DEFAULT_SPECS = [
+    SyntheticGraphSpec("tree", node_count=500, depth=8, fan_out=3),
+    SyntheticGraphSpec("wide_dag", node_count=2000, depth=6, fan_out=8),
+    SyntheticGraphSpec("deep_dag", node_count=2000, depth=40, fan_out=2),
+    SyntheticGraphSpec(
+        "many_small_sccs",
+        node_count=2000,
+        depth=10,
+        fan_out=4,
+        scc_count=100,
+        scc_size=3,
+    ),
+    SyntheticGraphSpec(
+        "one_large_scc",
+        node_count=2000,
+        depth=10,
+        fan_out=4,
+        scc_count=1,
+        scc_size=200,
+    ),
+    SyntheticGraphSpec(
+        "advisory_dense", node_count=2000, depth=10, fan_out=4, advisory_density=0.25,
+    ),
+]
+
+
+def generate_links(spec: SyntheticGraphSpec) -> List[Tuple[int, int]]:
+    """
+    Returns (parent ID, child ID) links for a graph with node IDs 0 to
+    node_count - 1 and root 0.
+
+    Spreads nodes over depth layers, links each node to up to fan_out
+    nodes in inner layers (and at least one node in the next layer so
+    every node is reachable from the root), then links scc_count
+    random groups of scc_size nodes in a cycle.
+
+    >>> generate_links(SyntheticGraphSpec("path", node_count=3, depth=3, fan_out=0))
+    [(0, 1), (1, 2)]
+    """
+    rng = random.Random(spec.seed)
+    depth = max(1, min(spec.depth, spec.node_count))
+    # the root is alone in the outermost layer
+    layers: List[List[int]] = [[0]] + [[] for _ in range(depth - 1)]
+    for node_id in range(1, spec.node_count):
+        layer_index = 1 + (node_id - 1) % (depth - 1) if depth > 1 else 0
+        layers[layer_index].append(node_id)
+
+    links: Dict[Tuple[int, int], None] = {}
+    for layer_index, layer in enumerate(layers[:-1]):
+        next_layer = layers[layer_index + 1]
+        inner_node_ids = [
+            node_id
+            for inner_layer in layers[layer_index + 1 :]
+            for node_id in inner_layer
+        ]
+        for node_id in layer:
+            children = rng.sample(
+                inner_node_ids, min(len(inner_node_ids), rng.randint(0, spec.fan_out))
+            )
+            for child_id in children:
+                links[(node_id, child_id)] = None
+        # link every node in the next layer from this layer
+        for position, child_id in enumerate(next_layer):
+            links[(layer[position % len(layer)], child_id)] = None
+
+    node_ids = list(range(1, spec.node_count))
+    for _ in range(spec.scc_count):
+        members = rng.sample(node_ids, min(len(node_ids), spec.scc_size))
+        for parent_id, child_id in zip(members, members[1:] + members[:1]):
+            if parent_id != child_id:
+                links[(parent_id, child_id)] = None
+    return list(links.keys())
+
+
+def generate_package_graph(spec: SyntheticGraphSpec) -> PackageGraph:
+    """
+    Returns an unsaved PackageGraph for the spec with in-memory package
+    versions, npms.io scores, registry data, and advisories.
+    """
+    rng = random.Random(spec.seed)
+    links = generate_links(spec)
+    package_versions_by_id = {
+        node_id: PackageVersion(
+            id=node_id, name=f"pkg-{node_id // 3}", version=f"1.{node_id % 3}.0"
+        )
+        for node_id in range(spec.node_count)
+    }
+    npmsio_scores_by_id = {
+        node_id: (
+            package_version.version,
+            {"1.0.0": 0.5, "1.10.0": 0.7}
+            if node_id % 2
+            else {package_version.version: 0.6},
+        )
+        for node_id, package_version in package_versions_by_id.items()
+    }
+    registry_data_by_id: Dict[int, Optional[Tuple[Optional[datetime], Any, Any]]] = {
+        node_id: (datetime(2020, 1, 1), [{"name": "maintainer"}], [])
+        for node_id in package_versions_by_id
+    }
+    advisories_by_id: Dict[int, List[Advisory]] = {
+        node_id: [] for node_id in package_versions_by_id
+    }
+    for node_id in package_versions_by_id:
+        if rng.random() < spec.advisory_density:
+            advisories_by_id[node_id].append(
+                Advisory(
+                    id=node_id + 1,
+                    url=f"https://example.com/advisories/{node_id}",
+                    severity=rng.choice(SEVERITIES),
+                )
+            )
+    return PackageGraph(
+        id=-1,
+        root_package_version_id=0,
+        package_links_by_id={link_id: link for link_id, link in enumerate(links)},
+        distinct_package_versions_by_id=package_versions_by_id,
+        get_npmsio_scores_by_package_version_id=lambda: npmsio_scores_by_id,
+        get_npm_registry_data_by_package_version_id=lambda: registry_data_by_id,
+        get_advisories_by_package_version_id=lambda: advisories_by_id,
+    )
+
+
+def summarize_times(times: List[float]) -> Dict[str, float]:
+    return dict(min=min(times), median=statistics.median(times), max=max(times))
+
+
+def time_calls(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    "Returns the min, median, and max wall time in seconds of calling fn repeat times"
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize_times(times)
+
+
+def benchmark_graph(
+    spec: SyntheticGraphSpec, engines: Iterable[str], repeat: int
+) -> Dict[str, Any]:
+    """
+    Returns wall times for traversing and scoring a synthetic graph
+    with each traversal engine, including ScoringStats phase and
+    component times.
+    """
+    db_graph = generate_package_graph(spec)
+    timings: Dict[str, Dict[str, float]] = {}
+    for engine in engines:
+        g = scoring.package_graph_to_scoring_graph(db_graph, engine)
+        timings[f"traverse.{engine}"] = time_calls(
+            lambda: list(node_dep_ids_iters[engine](g, None)), repeat
+        )
+
+        stats_times: Dict[str, List[float]] = {}
+        score_times: List[float] = []
+        for _ in range(repeat):
+            stats = scoring.ScoringStats(graph_id=db_graph.id)
+            start = time.perf_counter()
+            scoring.score_package_graph(db_graph, traversal_engine=engine, stats=stats)
+            score_times.append(time.perf_counter() - start)
+            for phase, timing in stats.phases.items():
+                stats_times.setdefault(f"score.{engine}.{phase}", []).append(
+                    timing.seconds
+                )
+            for component_name, component_timings in stats.components.items():
+                for phase, timing in component_timings.items():
+                    stats_times.setdefault(
+                        f"score.{engine}.{component_name}.{phase}", []
+                    ).append(timing.seconds)
+        timings[f"score.{engine}"] = summarize_times(score_times)
+        timings.update(
+            {name: summarize_times(times) for name, times in stats_times.items()}
+        )
+    return dict(
+        spec=asdict(spec),
+        node_count=len(db_graph.distinct_package_ids),
+        link_count=len(db_graph.package_links_by_id),
+        timings=timings,
+    )
+
+
+def run_benchmarks(
+    specs: Iterable[SyntheticGraphSpec],
+    engines: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    "Returns JSON serializable benchmark results for each spec by name"
+    engines = list(node_dep_ids_iters.keys() if engines is None else engines)
+    results: Dict[str, Any] = dict(
+        version=RESULTS_VERSION,
+        python=platform.python_version(),
+        repeat=repeat,
+        cases={},
+    )
+    for spec in specs:
+        log.info(f"benchmarking {spec}")
+        results["cases"][spec.name] = benchmark_graph(spec, engines, repeat)
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any], results: Dict[str, Any], threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Returns the timings in both results with a min time more than
+    threshold (as a fraction) slower than the baseline min time.
+
+    >>> baseline = dict(cases=dict(tree=dict(timings={"score.csr": dict(min=1.0)})))
+    >>> compare_results(baseline, dict(cases=dict(tree=dict(timings={"score.csr": dict(min=1.5)}))))
+    [{'case': 'tree', 'timing': 'score.csr', 'baseline': 1.0, 'result': 1.5, 'ratio': 1.5}]
+    """
+    regressions = []
+    for case_name, case in results["cases"].items():
+        baseline_case = baseline["cases"].get(case_name, None)
+        if baseline_case is None:
+            continue
+        for timing_name, timing in case["timings"].items():
+            baseline_timing = baseline_case["timings"].get(timing_name, None)
+            if baseline_timing is None or baseline_timing["min"] <= 0:
+                continue
+            ratio = timing["min"] / baseline_timing["min"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    dict(
+                        case=case_name,
+                        timing=timing_name,
+                        baseline=baseline_timing["min"],
+                        result=timing["min"],
+                        ratio=round(ratio, 3),
+                    )
+                )
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--case",
+        action="append",
+        dest="cases",
+        choices=[spec.name for spec in DEFAULT_SPECS],
+        help="benchmark case to run (default: all)",
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        dest="engines",
+        choices=list(node_dep_ids_iters.keys()),
+        help="traversal engine to benchmark (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the number of nodes and cycles in each case by this",
+    )
+    parser.add_argument("--output", help="path to save JSON results to")
+    parser.add_argument("--baseline", help="path to JSON results to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fraction slower than the baseline to report as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    "Runs benchmarks and returns 1 when slower than the baseline"
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    specs = [
+        SyntheticGraphSpec(
+            **{
+                **asdict(spec),
+                "node_count": max(1, int(spec.node_count * args.scale)),
+                # keep at least one cycle for cases with cycles
+                "scc_count": max(
+                    min(spec.scc_count, 1), int(spec.scc_count * args.scale)
+                ),
+            }
+        )
+        for spec in DEFAULT_SPECS
+        if not args.cases or spec.name in args.cases
+    ]
+    # scoring logs a line per graph
+    logging.getLogger(scoring.__name__).setLevel(logging.WARNING)
+    results = run_benchmarks(specs, args.engines, args.repeat)
+    results_json = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as fout:
+            fout.write(results_json)
+    else:
+        print(results_json)
+
+    if args.baseline:
+        with open(args.baseline, "r") as fin:
+            regressions = compare_results(json.load(fin), results, args.threshold)
+        for regression in regressions:
+            log.warning(
+                f"{regression['case']} {regression['timing']} took"
+                f" {regression['result']:.4f}s vs. {regression['baseline']:.4f}s"
+                f" ({regression['ratio']}x)"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
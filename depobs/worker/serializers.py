@@ -18,6 +18,7 @@ from typing import (
 )
 
 from depobs.database.models import Advisory, NPMRegistryEntry, NPMSIOScore
+from depobs.docker.log_reader import DockerLogStream
 from depobs.scanner.graph_util import npm_packages_to_networkx_digraph, get_graph_stats
 from depobs.scanner.models.org_repo import OrgRepo
 from depobs.scanner.models.git_ref import GitRef
@@ -27,17 +28,45 @@ from depobs.scanner.models.language import (
     ContainerTask,
     package_managers,
 )
-from depobs.scanner.models.nodejs import NPMPackage, flatten_deps
+from depobs.scanner.models.nodejs import (
+    NPMPackage,
+    flatten_deps,
+    flatten_deps_from_json_events,
+)
 from depobs.util.serialize_util import (
     get_in,
     extract_fields,
     extract_nested_fields,
+    iter_chunks,
+    iter_json_events,
     iter_jsonlines,
 )
 
 
 log = logging.getLogger(__name__)
 
+# number of chars or bytes of stdout to parse at a time when streaming it
+STDOUT_CHUNK_SIZE = 1 << 16
+
+
+def get_task_stdout(task_result: Dict) -> Optional[str]:
+    "Returns task stdout from its output spool or stdout field"
+    output = get_in(task_result, ["output"], None)
+    if output is not None:
+        return output.read_text(DockerLogStream.STDOUT)
+    return get_in(task_result, ["stdout"], None)
+
+
+def iter_task_stdout_chunks(task_result: Dict) -> Optional[Iterable[AnyStr]]:
+    "Returns chunks of task stdout from its output spool or stdout field"
+    output = get_in(task_result, ["output"], None)
+    if output is not None:
+        return output.iter_chunks(DockerLogStream.STDOUT, STDOUT_CHUNK_SIZE)
+    stdout = get_in(task_result, ["stdout"], None)
+    if stdout is None:
+        return None
+    return iter_chunks(stdout, STDOUT_CHUNK_SIZE)
+
 
 def parse_stdout_as_json(stdout: Optional[str]) -> Optional[Dict]:
     if stdout is None:
@@ -70,7 +99,33 @@ def parse_stdout_as_jsonlines(stdout: Optional[str]) -> Optional[Sequence[Dict]]
 
 def parse_npm_list(parsed_stdout: Dict) -> Dict:
     deps = [dep for dep in flatten_deps(parsed_stdout)]
-    updates = {"problems": get_in(parsed_stdout, ["problems"], [])}
+    return get_npm_list_updates(deps, get_in(parsed_stdout, ["problems"], []))
+
+
+def parse_npm_list_stdout(stdout_chunks: Optional[Iterable[AnyStr]]) -> Optional[Dict]:
+    """
+    Returns the same updates as parse_npm_list from chunks of npm list
+    JSON stdout flattening deps while parsing instead of loading the
+    output
+    """
+    if stdout_chunks is None:
+        return None
+
+    top_level_fields: Dict[str, Any] = {}
+    try:
+        deps = list(
+            flatten_deps_from_json_events(
+                iter_json_events(stdout_chunks), top_level_fields,
+            )
+        )
+    except json.decoder.JSONDecodeError as e:
+        log.warn(f"error parsing stdout as JSON: {e}")
+        return None
+    return get_npm_list_updates(deps, top_level_fields.get("problems", []))
+
+
+def get_npm_list_updates(deps: List[NPMPackage], problems: List) -> Dict:
+    updates: Dict[str, Any] = {"problems": problems}
     updates["dependencies"] = [asdict(dep) for dep in deps]
     updates["dependencies_count"] = len(deps)
     updates["problems_count"] = len(updates["problems"])
@@ -188,14 +243,18 @@ def parse_yarn_audit(parsed_stdout: Sequence[Dict]) -> Optional[Dict]:
 
 def parse_npm_task(task_name: str, task_result: Dict) -> Optional[Dict]:
     # TODO: reuse cached results for each set of dep files w/ hashes and task name
-    parsed_stdout = parse_stdout_as_json(get_in(task_result, ["stdout"], None))
+    if task_name == "list_metadata":
+        updates = parse_npm_list_stdout(iter_task_stdout_chunks(task_result))
+        if updates is None:
+            log.warn("got non-JSON stdout for npm")
+        return updates
+
+    parsed_stdout = parse_stdout_as_json(get_task_stdout(task_result))
     if parsed_stdout is None:
         log.warn("got non-JSON stdout for npm")
         return None
 
-    if task_name == "list_metadata":
-        return parse_npm_list(parsed_stdout)
-    elif task_name == "audit":
+    if task_name == "audit":
         return parse_npm_audit(parsed_stdout)
     elif task_name == "install":
         return None
@@ -204,7 +263,7 @@ def parse_npm_task(task_name: str, task_result: Dict) -> Optional[Dict]:
 
 
 def parse_yarn_task(task_name: str, task_result: Dict) -> Optional[Dict]:
-    parsed_stdout = parse_stdout_as_jsonlines(get_in(task_result, ["stdout"], None))
+    parsed_stdout = parse_stdout_as_jsonlines(get_task_stdout(task_result))
     if parsed_stdout is None:
         log.warn("got non-JSON lines stdout for yarn")
         return None
@@ -260,7 +319,7 @@ def parse_cargo_audit(parsed_stdout: Dict) -> Dict:
 
 
 def parse_cargo_task(task_name: str, task_result: Dict) -> Optional[Dict]:
-    parsed_stdout = parse_stdout_as_json(get_in(task_result, ["stdout"], None))
+    parsed_stdout = parse_stdout_as_json(get_task_stdout(task_result))
     if parsed_stdout is None:
         log.warn("got non-JSON stdout for cargo task")
         return None
@@ -1,10 +1,12 @@
 import asyncio
 from collections import ChainMap
+import contextlib
 import datetime
 import json
 import os
 from random import randrange
 import sys
+import time
 from typing import (
     AbstractSet,
     Any,
@@ -15,12 +17,14 @@ from typing import (
     Iterable,
     List,
     Optional,
+    Set,
     Tuple,
     TypeVar,
 )
 import logging
 
 import celery
+from celery.signals import worker_process_shutdown
 from celery.utils.log import get_task_logger
 import celery.result
 from flask import current_app
@@ -57,9 +61,14 @@ from depobs.clients.npm_registry import (
 from depobs.database.models import (
     PackageGraph,
     PackageVersion,
-    insert_package_graph,
+    bulk_insert_package_graph,
 )
 import depobs.docker.containers as containers
+from depobs.docker.pool import (
+    ContainerLease,
+    close_container_pools,
+    get_container_pool,
+)
 from depobs.scanner.models.package_meta_result import Result
 from depobs.scanner.repo_tasks import (
     RunRepoTasksConfig,
@@ -85,6 +94,27 @@ def add(x: int, y: int) -> int:
     return x + y
 
 
+@contextlib.asynccontextmanager
+async def run_unpooled_container(
+    image: DockerImage,
+) -> AsyncGenerator[ContainerLease, None]:
+    "Runs a container for one scan in /tmp"
+    # TODO: reuse flask request ID or celery task id
+    # use a unique container names to avoid conflicts
+    container_name = (
+        f"dependency-observatory-scanner-scan_tarball_url-{hex(randrange(1 << 32))[2:]}"
+    )
+    async with containers.run(
+        image.local.repo_name_tag, name=container_name, cmd="/bin/bash",
+    ) as c:
+        yield ContainerLease(c, container_name, "/tmp")
+
+
+@worker_process_shutdown.connect
+def close_worker_container_pools(**kwargs: Any) -> None:
+    asyncio.run(close_container_pools())
+
+
 async def scan_tarball_url(
     config: RunRepoTasksConfig,
     tarball_url: str,
@@ -110,20 +140,20 @@ async def scan_tarball_url(
             ContainerTask(
                 name="write_package_json",
                 # \\ before " so shlex doesn't strip the "
-                command=f"""bash -c "cat <<EOF > /tmp/package.json\n{{\\"dependencies\\": {{\\"{package_name}\\": \\"{package_version}\\"}} }}\nEOF" """,
+                command=f"""bash -c "cat <<EOF > package.json\n{{\\"dependencies\\": {{\\"{package_name}\\": \\"{package_version}\\"}} }}\nEOF" """,
                 check=True,
             ),
             ContainerTask(
-                name="check_package_json",
-                command="""cat /tmp/package.json""",
-                check=True,
+                name="check_package_json", command="""cat package.json""", check=True,
             ),
         ] + container_tasks
         # TODO: handle this in depobs.scanner.models.language?
-        # fixup install command to take the tarball URL
+        # fixup install command to take the tarball URL and, in a pooled
+        # container shared with later scans, not run install scripts
+        install_args = "--ignore-scripts " if config["container_pool_size"] else ""
         for t in container_tasks:
             if t.name == "install" and t.command == "npm install --save=true":
-                t.command = f"npm install --save=true {tarball_url}"
+                t.command = f"npm install --save=true {install_args}{tarball_url}"
 
         if config["dry_run"]:
             log.info(
@@ -133,18 +163,20 @@ async def scan_tarball_url(
             )
             continue
 
-        # TODO: reuse flask request ID or celery task id
-        # use a unique container names to avoid conflicts
-        container_name = f"dependency-observatory-scanner-scan_tarball_url-{hex(randrange(1 << 32))[2:]}"
+        if config["container_pool_size"]:
+            lease_cm = get_container_pool(
+                image, config["container_pool_size"], config["container_pool_max_uses"]
+            ).lease()
+        else:
+            lease_cm = run_unpooled_container(image)
 
-        async with containers.run(
-            image.local.repo_name_tag, name=container_name, cmd="/bin/bash",
-        ) as c:
+        async with lease_cm as lease:
+            c, working_dir = lease.container, lease.working_dir
             # NB: running in /app will fail when /app is mounted for local
             version_results = await asyncio.gather(
                 *[
                     containers.run_container_cmd_no_args_return_first_line_or_none(
-                        command, c, working_dir="/tmp"
+                        command, c, working_dir=working_dir
                     )
                     for command in version_commands.values()
                 ]
@@ -155,12 +187,19 @@ async def scan_tarball_url(
             }
 
             task_results = [
-                await run_repo_task(c, task, "/tmp", container_name)
+                await run_repo_task(
+                    c,
+                    task,
+                    working_dir,
+                    lease.container_name,
+                    config["exec_output_spool_max_size"],
+                )
                 for task in container_tasks
             ]
             for tr in task_results:
                 if isinstance(tr, Exception):
                     log.error(f"error running container task: {tr}")
+                    lease.failed = True
 
             result: Dict[str, Any] = dict(
                 versions=versions,
@@ -213,45 +252,63 @@ def scan_npm_package(
             )
             log.info(f"got container task results for {package_name}@{package_version}")
             log.debug(f"got container task results:\n{container_task_results}")
-            for task_result in container_task_results["task_results"]:
-                serialized_container_task_result: Optional[
-                    Dict[str, Any]
-                ] = serializers.serialize_repo_task(
-                    task_result, {"list_metadata", "audit"}
-                )
-                if not serialized_container_task_result:
-                    continue
-
-                task_data = serialized_container_task_result
-                task_name = task_data["name"]
-                if task_name == "list_metadata":
-                    insert_package_graph(task_data)
-                elif task_name == "audit":
-
-                    for (
-                        advisory,
-                        impacted_versions,
-                    ) in serializers.node_repo_task_audit_output_to_advisories_and_impacted_versions(
-                        task_data
-                    ):
-                        models.insert_advisories([advisory])
-                        models.update_advisory_vulnerable_package_versions(
-                            advisory, set(impacted_versions)
+            # build_report_tree scores graphs from this scan with the new data
+            scanned_root_package_version_ids: List[int] = []
+            try:
+                for task_result in container_task_results["task_results"]:
+                    serialized_container_task_result: Optional[
+                        Dict[str, Any]
+                    ] = serializers.serialize_repo_task(
+                        task_result, {"list_metadata", "audit"}
+                    )
+                    # done with the task output spool (closing twice is fine)
+                    task_result["output"].close()
+                    if not serialized_container_task_result:
+                        continue
+
+                    task_data = serialized_container_task_result
+                    task_name = task_data["name"]
+                    if task_name == "list_metadata":
+                        scanned_root_package_version_ids.append(
+                            bulk_insert_package_graph(task_data).root_package_version_id
                         )
-                else:
-                    log.warning(f"skipping unrecognized task {task_name}")
-
-                # TODO: use asyncio.gather to run these concurrently
-                fetch_and_save_npmsio_scores(
-                    row[0]
-                    for row in models.get_package_names_with_missing_npms_io_scores()
-                    if row is not None
-                )
-                fetch_and_save_registry_entries(
-                    row[0]
-                    for row in models.get_package_names_with_missing_npm_entries()
-                    if row is not None
-                )
+                    elif task_name == "audit":
+                        advisories_and_versions = list(
+                            serializers.node_repo_task_audit_output_to_advisories_and_impacted_versions(
+                                task_data
+                            )
+                        )
+                        impacted_package_version_ids = models.bulk_insert_advisories_and_link_package_versions(
+                            zip(
+                                serializers.serialize_advisories(
+                                    advisory for advisory, _ in advisories_and_versions
+                                ),
+                                (versions for _, versions in advisories_and_versions),
+                            )
+                        )
+                        if impacted_package_version_ids:
+                            rescore_package_versions.delay(
+                                sorted(impacted_package_version_ids),
+                                scanned_root_package_version_ids,
+                            )
+                    else:
+                        log.warning(f"skipping unrecognized task {task_name}")
+
+                    # TODO: use asyncio.gather to run these concurrently
+                    fetch_and_save_npmsio_scores(
+                        row[0]
+                        for row in models.get_package_names_with_missing_npms_io_scores()
+                        if row is not None
+                    )
+                    fetch_and_save_registry_entries(
+                        row[0]
+                        for row in models.get_package_names_with_missing_npm_entries()
+                        if row is not None
+                    )
+            finally:
+                # close every spool even when parsing or saving a task fails
+                for task_result in container_task_results["task_results"]:
+                    task_result["output"].close()
         elif source_url and git_head:
             # TODO: port scanner find_dep_files and run_repo_tasks pipelines as used in analyze_package.sh
             raise NotImplementedError(
@@ -284,10 +341,77 @@ def build_report_tree(package_version_tuple: Tuple[str, str]) -> None:
     )
     if db_graph is None:
         log.info(f"{package.name} {package.version} has no children")
-        db_graph = PackageGraph(id=None, link_ids=[])
+        db_graph = PackageGraph(
+            id=None, link_ids=[], root_package_version_id=package.id
+        )
         db_graph.distinct_package_ids = set([package.id])
 
-    store_package_reports(list(scoring.score_package_graph(db_graph).values()))
+    traversal_engine = current_app.config["SCORING_TRAVERSAL_ENGINE"]
+    # an unpersisted cache can't hit scoring one graph
+    report_cache: Optional[scoring.ScoredReportCache] = None
+    if (
+        current_app.config["PERSIST_REPORT_FINGERPRINTS"]
+        and traversal_engine != "networkx"
+    ):
+        report_cache = scoring.ScoredReportCache(persisted=True)
+    stats = scoring.ScoringStats(graph_id=db_graph.id)
+    reports = scoring.score_package_graph(
+        db_graph,
+        traversal_engine=traversal_engine,
+        report_cache=report_cache,
+        stats=stats,
+        profile=(
+            db_graph.id is not None
+            and db_graph.id == current_app.config["SCORING_PROFILE_GRAPH_ID"]
+        ),
+    )
+    # reused reports are already stored
+    new_reports = [report for report in reports.values() if report.id is None]
+    with stats.timed("store", nodes=len(new_reports)):
+        models.bulk_store_package_reports(
+            new_reports, current_app.config["BULK_INSERT_CHUNK_SIZE"]
+        )
+        if report_cache is not None:
+            report_cache.save()
+    log.info(stats.summary())
+
+
+@app.task()
+def rescore_package_versions(
+    package_version_ids: List[int],
+    skipped_root_package_version_ids: Optional[List[int]] = None,
+) -> None:
+    """
+    Rescores reports affected by new data (e.g. advisories or npms.io
+    scores) for the package versions in the newest graph of each root
+    including them, reusing reports for unaffected dependencies.
+
+    Skips graphs of the skipped roots e.g. graphs from a scan that
+    build_report_tree will score.
+    """
+    changed_package_version_ids = set(package_version_ids)
+    db_graphs = [
+        db_graph
+        for db_graph in models.get_latest_graphs_including_package_versions(
+            changed_package_version_ids
+        )
+        if db_graph.root_package_version_id
+        not in set(skipped_root_package_version_ids or [])
+    ]
+    log.info(
+        f"rescoring {len(db_graphs)} graphs including"
+        f" {len(changed_package_version_ids)} changed package versions"
+    )
+    for db_graph in db_graphs:
+        reports = scoring.rescore_package_graph(
+            db_graph,
+            changed_package_version_ids,
+            traversal_engine=current_app.config["SCORING_TRAVERSAL_ENGINE"],
+        )
+        if reports:
+            models.bulk_store_package_reports(
+                list(reports.values()), current_app.config["BULK_INSERT_CHUNK_SIZE"]
+            )
 
 
 @app.task()
@@ -323,6 +447,16 @@ async def fetch_package_data(
     return package_results
 
 
+def log_bulk_insert_throughput(
+    row_kind: str, inserted: int, skipped: int, start: float
+) -> None:
+    elapsed = time.monotonic() - start
+    log.info(
+        f"inserted {inserted} and skipped {skipped} existing {row_kind}"
+        f" in {elapsed:.2f}s ({(inserted + skipped) / elapsed if elapsed else 0:.0f} rows/s)"
+    )
+
+
 @app.task()
 def fetch_and_save_npmsio_scores(package_names: Iterable[str]) -> List[Dict]:
     package_names = list(package_names)
@@ -342,11 +476,24 @@ def fetch_and_save_npmsio_scores(package_names: Iterable[str]) -> List[Dict]:
         log.info(
             f"fetched {len(npmsio_scores)} scores for {len(package_names)} package names"
         )
-    models.insert_npmsio_scores(
+    serialized_scores = list(
         serializers.serialize_npmsio_scores(
             score for score in npmsio_scores if score is not None
         )
     )
+    start = time.monotonic()
+    inserted_package_names: Set[str] = set()
+    inserted, skipped = models.bulk_insert_npmsio_scores(
+        serialized_scores,
+        current_app.config["BULK_INSERT_CHUNK_SIZE"],
+        inserted_package_names,
+    )
+    log_bulk_insert_throughput("npms.io scores", inserted, skipped, start)
+    if inserted_package_names:
+        # scores are looked up by package name for the closest version
+        rescore_package_versions.delay(
+            sorted(models.get_package_version_ids_by_names(inserted_package_names))
+        )
     return npmsio_scores
 
 
@@ -372,11 +519,14 @@ def fetch_and_save_registry_entries(package_names: Iterable[str]) -> List[Dict]:
             f"fetched {len(npm_registry_entries)} registry entries for {len(package_names)} package names"
         )
     # inserts new entries for new versions (but doesn't update old ones)
-    models.insert_npm_registry_entries(
+    start = time.monotonic()
+    inserted, skipped = models.bulk_insert_npm_registry_entries(
         serializers.serialize_npm_registry_entries(
             registry_entry
             for registry_entry in npm_registry_entries
             if registry_entry is not None
-        )
+        ),
+        current_app.config["BULK_INSERT_CHUNK_SIZE"],
     )
+    log_bulk_insert_throughput("npm registry entries", inserted, skipped, start)
     return npm_registry_entries
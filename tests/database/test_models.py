@@ -0,0 +1,304 @@
+import datetime
+
+import pytest
+
+from depobs.database.mixins import SEMVER_COLUMN_NAMES, get_semver_columns
+from depobs.database.models import (
+    MATERIALIZED_VIEWS,
+    VIEWS,
+    NPMRegistryEntry,
+    PackageReport,
+    PackageVersion,
+    ReportScore,
+    get_insert_row,
+)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "view_sql",
+    [VIEWS["report_score_view"], MATERIALIZED_VIEWS["report_score_view"]],
+    ids=["plain", "materialized"],
+)
+def test_report_score_views_select_report_columns_by_name(view_sql):
+    assert "reports.*" not in view_sql
+    for column in PackageReport.__table__.columns:
+        assert f'reports."{column.name}"' in view_sql
+
+
+@pytest.mark.unit
+def test_materialized_report_score_view_keeps_reports_without_scores():
+    view_sql = MATERIALIZED_VIEWS["report_score_view"]
+    assert "left join report_scores" in view_sql
+    assert "WHERE reports.status = 'scanned'" in view_sql
+
+
+@pytest.mark.unit
+def test_report_scores_only_saves_computed_columns():
+    assert [column.name for column in ReportScore.__table__.columns] == [
+        "id",
+        "score",
+        "score_code",
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "model, table_name",
+    [
+        (PackageReport, "reports"),
+        (PackageVersion, "package_versions"),
+        (NPMRegistryEntry, "npm_registry_entries"),
+    ],
+)
+def test_semver_models_have_a_semver_index(model, table_name):
+    assert f"{table_name}_semver_idx" in {
+        index.name for index in model.__table__.indexes
+    }
+
+
+@pytest.mark.unit
+def test_get_insert_row_uses_the_same_keys_for_every_row():
+    rows = [
+        get_insert_row(
+            NPMRegistryEntry(package_name="foo", package_version=version),
+            exclude=["id"],
+        )
+        for version in ["1.2.3", "not-a-version", None]
+    ]
+    assert rows[0].keys() == rows[1].keys() == rows[2].keys()
+    assert "id" not in rows[0]
+    assert "inserted_at" not in rows[0]
+    assert [row["version_major"] for row in rows] == [1, None, None]
+    assert (
+        rows[0]["version_prerelease_key"]
+        == get_semver_columns("1.2.3")["version_prerelease_key"]
+    )
+
+
+@pytest.mark.unit
+def test_reports_index_latest_scoring_date_by_package_and_version():
+    (index,) = [
+        index
+        for index in PackageReport.__table__.indexes
+        if index.name == "reports_scoring_date_idx"
+    ]
+    assert [str(expression) for expression in index.expressions] == [
+        "reports.package",
+        "reports.version",
+        "scoring_date DESC",
+    ]
+
+
+def test_refresh_missing_report_scores_only_adds_missing_rows(models):
+    name = "dep-obs-internal-missing-report-scores"
+    models.PackageReport.query.filter_by(package=name).delete()
+    models.db.session.commit()
+    reports = [
+        models.PackageReport(
+            package=name,
+            version=version,
+            status="scanned",
+            npmsio_score=0.5,
+            all_deps=0,
+        )
+        for version in ["1.0.0", "1.0.1"]
+    ]
+    models.db.session.add_all(reports)
+    models.db.session.commit()
+    models.refresh_report_scores([reports[0].id])
+    models.db.session.query(models.ReportScore).filter_by(id=reports[0].id).update(
+        dict(score_code="Z")
+    )
+    models.db.session.commit()
+
+    models.refresh_missing_report_scores()
+    score_codes = dict(
+        models.db.session.query(models.ReportScore.id, models.ReportScore.score_code)
+        .filter(models.ReportScore.id.in_([report.id for report in reports]))
+        .all()
+    )
+    # keeps saved rows and adds rows for reports without one
+    assert score_codes == {reports[0].id: "Z", reports[1].id: "B"}
+
+
+def get_saved_semver_columns(models, model, name_column, name):
+    return {
+        row[0]: tuple(row[1:])
+        for row in models.db.session.query(
+            getattr(model, model.semver_version_column_name),
+            *(getattr(model, column_name) for column_name in SEMVER_COLUMN_NAMES),
+        ).filter(name_column == name)
+    }
+
+
+def test_bulk_inserts_save_semver_columns_like_orm_inserts(models):
+    versions = ["1.2.3", "1.2.3-beta.2", "not-a-version"]
+    for name in ["dep-obs-internal-semver-bulk", "dep-obs-internal-semver-orm"]:
+        models.PackageVersion.query.filter_by(name=name).delete()
+        models.NPMRegistryEntry.query.filter_by(package_name=name).delete()
+    models.db.session.commit()
+
+    models.bulk_insert_package_graph(
+        dict(
+            command="npm ls --json",
+            root=dict(name="dep-obs-internal-semver-bulk", version=versions[0]),
+            dependencies=[
+                dict(name="dep-obs-internal-semver-bulk", version=version)
+                for version in versions
+            ],
+        )
+    )
+    models.bulk_insert_npm_registry_entries(
+        models.NPMRegistryEntry(
+            package_name="dep-obs-internal-semver-bulk",
+            package_version=version,
+            shasum=version,
+            tarball=version,
+            source_url=version,
+        )
+        for version in versions
+    )
+    for version in versions:
+        models.db.session.add(
+            models.PackageVersion(
+                name="dep-obs-internal-semver-orm", version=version, language="node"
+            )
+        )
+        models.db.session.add(
+            models.NPMRegistryEntry(
+                package_name="dep-obs-internal-semver-orm",
+                package_version=version,
+                shasum=version,
+                tarball=version,
+                source_url=version,
+            )
+        )
+    models.db.session.commit()
+
+    for model, name_column in [
+        (models.PackageVersion, models.PackageVersion.name),
+        (models.NPMRegistryEntry, models.NPMRegistryEntry.package_name),
+    ]:
+        orm_semver_columns = get_saved_semver_columns(
+            models, model, name_column, "dep-obs-internal-semver-orm"
+        )
+        assert orm_semver_columns["1.2.3"] == (
+            1,
+            2,
+            3,
+            get_semver_columns("1.2.3")["version_prerelease_key"],
+        )
+        assert orm_semver_columns["not-a-version"] == (None, None, None, None)
+        assert (
+            get_saved_semver_columns(
+                models, model, name_column, "dep-obs-internal-semver-bulk"
+            )
+            == orm_semver_columns
+        )
+
+
+def test_bulk_insert_advisories_returns_only_newly_linked_package_versions(models):
+    name = "dep-obs-internal-advisory"
+    url = f"https://example.com/advisories/{name}"
+    models.Advisory.query.filter_by(url=url).delete()
+    models.PackageVersion.query.filter_by(name=name).delete()
+    models.db.session.add_all(
+        models.PackageVersion(name=name, version=version, language="node")
+        for version in ["1.0.0", "1.0.1"]
+    )
+    models.db.session.commit()
+    package_version_ids = models.get_package_version_ids_by_name_and_version(
+        [(name, "1.0.0"), (name, "1.0.1")]
+    )
+
+    def link(versions):
+        return models.bulk_insert_advisories_and_link_package_versions(
+            [(models.Advisory(package_name=name, language="node", url=url), versions)]
+        )
+
+    assert link({"1.0.0"}) == {package_version_ids[(name, "1.0.0")]}
+    assert link({"1.0.0"}) == set()
+    assert link({"1.0.0", "1.0.1"}) == {package_version_ids[(name, "1.0.1")]}
+    assert models.Advisory.query.filter_by(
+        url=url
+    ).one().vulnerable_package_version_ids == sorted(package_version_ids.values())
+
+
+def test_bulk_insert_npmsio_scores_counts_and_collects_inserted_package_names(models,):
+    names = ["dep-obs-internal-npmsio-a", "dep-obs-internal-npmsio-b"]
+    for name in names:
+        models.NPMSIOScore.query.filter_by(package_name=name).delete()
+    models.db.session.commit()
+    analyzed_at = datetime.datetime(2020, 1, 1)
+
+    def score(name):
+        return models.NPMSIOScore(
+            package_name=name,
+            package_version="1.0.0",
+            analyzed_at=analyzed_at,
+            source_url=name,
+        )
+
+    inserted_package_names = set()
+    assert models.bulk_insert_npmsio_scores(
+        [score(names[0])], inserted_package_names=inserted_package_names
+    ) == (1, 0)
+    assert inserted_package_names == {names[0]}
+
+    inserted_package_names = set()
+    assert models.bulk_insert_npmsio_scores(
+        [score(name) for name in names], inserted_package_names=inserted_package_names
+    ) == (1, 1)
+    assert inserted_package_names == {names[1]}
+
+
+def test_get_graph_scored_package_reports_walks_the_root_report_tree(models):
+    names = [
+        "dep-obs-internal-graph-root",
+        "dep-obs-internal-graph-a",
+        "dep-obs-internal-graph-b",
+    ]
+    # deletes through the session to delete dependencies rows
+    for report in models.PackageReport.query.filter(
+        models.PackageReport.package.in_(names)
+    ):
+        models.db.session.delete(report)
+    models.db.session.commit()
+    # root -> a <-> b
+    reports = [
+        models.PackageReport(
+            package=name,
+            version="1.0.0",
+            status="scanned",
+            scoring_date=datetime.datetime.now(),
+        )
+        for name in names
+    ]
+    reports[0].dependencies.append(reports[1])
+    reports[1].dependencies.append(reports[2])
+    reports[2].dependencies.append(reports[1])
+    models.db.session.add_all(reports)
+    models.db.session.commit()
+
+    def create_graph(links):
+        return models.PackageGraph(
+            id=-1,
+            root_package_version_id=0,
+            package_links_by_id=dict(enumerate(links)),
+            distinct_package_versions_by_id={
+                node_id: models.PackageVersion(id=node_id, name=name, version="1.0.0")
+                for node_id, name in enumerate(names)
+            },
+        )
+
+    assert models.get_graph_scored_package_reports_by_package_version_id(
+        create_graph([(0, 1), (1, 2), (2, 1)])
+    ) == dict(enumerate(reports))
+    # the root report tree is from a graph with other dependencies
+    assert (
+        models.get_graph_scored_package_reports_by_package_version_id(
+            create_graph([(0, 1), (1, 2), (2, 1), (0, 2)])
+        )
+        == {}
+    )
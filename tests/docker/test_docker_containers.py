@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import depobs.docker.containers as m
+
+
+class FakeDocker:
+    def __init__(self, inspect_results):
+        self.inspect_results = list(inspect_results)
+
+    async def _query_json(self, path, method="GET", **kwargs):
+        assert path == "exec/exec-id/json"
+        return self.inspect_results.pop(0)
+
+
+@pytest.mark.unit
+def test_exec_wait_polls_inspect_until_not_running(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(m.asyncio, "sleep", fake_sleep)
+    docker = FakeDocker([dict(Running=True)] * 4 + [dict(Running=False, ExitCode=2)])
+    exec_ = m.Exec("exec-id", SimpleNamespace(docker=docker))
+
+    result = asyncio.run(exec_.wait(min_delay=0.25, max_delay=1.0))
+    assert result == dict(Running=False, ExitCode=2)
+    assert exec_.last_inspect == result
+    assert delays == [0.25, 0.5, 1.0, 1.0]
+    assert exec_.api_call_counts == {"inspect": 5}
+
+
+@pytest.mark.parametrize(
+    "inspect_results, expected_delays",
+    [
+        ([dict(Running=False, ExitCode=0)], []),
+        # docker can report the exec running briefly after its output ends
+        ([dict(Running=True)] * 3 + [dict(Running=False, ExitCode=0)], [0.25] * 3),
+    ],
+    ids=["exited", "still_running"],
+)
+@pytest.mark.unit
+def test_exec_wait_inspects_once_after_attached_output_ends(
+    monkeypatch, inspect_results, expected_delays
+):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(m.asyncio, "sleep", fake_sleep)
+    docker = FakeDocker(inspect_results)
+    exec_ = m.Exec("exec-id", SimpleNamespace(docker=docker))
+    exec_.output_ended = True
+
+    result = asyncio.run(exec_.wait(min_delay=0.25, max_delay=1.0))
+    assert result == dict(Running=False, ExitCode=0)
+    # retries without backoff
+    assert delays == expected_delays
+    assert exec_.api_call_counts == {"inspect": len(inspect_results)}
@@ -194,3 +194,61 @@ def test_messages_defaults_to_returning_stdout():
         ]
     )
     assert len(tuple(m.iter_lines(msgs))) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+@pytest.mark.unit
+def test_decoder_feed_chunks_matches_iter_messages(
+    long_cargo_metadata_output, chunk_size
+):
+    msg_bytes = (
+        b"\x01\x00\x00\x00\x00\x00\x00\x06hello\n"
+        + b"\x02\x00\x00\x00\x00\x00\x00\x00"
+        + long_cargo_metadata_output[
+            : 3 * (m.HEADER_LENGTH + m.STARTING_BUF_CONTENTS_LEN)
+        ]
+    )
+    decoder = m.DockerLogDecoder()
+    msgs = []
+    for start in range(0, len(msg_bytes), chunk_size):
+        msgs.extend(decoder.feed(msg_bytes[start : start + chunk_size]))
+    decoder.close()
+    assert msgs == list(m.iter_messages(msg_bytes))
+
+
+@pytest.mark.unit
+def test_decoder_close_raises_for_partial_message():
+    decoder = m.DockerLogDecoder()
+    assert decoder.feed(b"\x01\x00\x00\x00\x00\x00\x00\x06hello\n\x01\x00") == [
+        (m.DockerLogStream.STDOUT, b"hello\n")
+    ]
+    with pytest.raises(m.DockerLogReadError):
+        decoder.close()
+
+
+@pytest.mark.unit
+def test_line_assembler_joins_lines_and_utf8_split_across_messages():
+    assembler = m.LineAssembler()
+    snowman = "☃".encode("utf-8")
+    assert assembler.feed(b"a\n" + snowman[:1]) == ["a"]
+    assert assembler.feed(snowman[1:]) == []
+    assert assembler.feed(b"\nb\n\nc") == ["☃", "b", ""]
+    assert assembler.close() == ["c"]
+    assert assembler.close() == []
+
+
+@pytest.mark.parametrize("max_size", [None, 4])
+@pytest.mark.unit
+def test_spool_reads_back_lines_and_text(max_size):
+    spool = m.DockerLogSpool(max_size)
+    for msg in m.iter_messages(
+        b"\x01\x00\x00\x00\x00\x00\x00\x06hello\n"
+        b"\x02\x00\x00\x00\x00\x00\x00\x06error\n"
+        b"\x01\x00\x00\x00\x00\x00\x00\x06world\n"
+    ):
+        spool.write(*msg)
+    assert spool.sizes == {m.DockerLogStream.STDOUT: 12, m.DockerLogStream.STDERR: 6}
+    assert list(spool.iter_lines(m.DockerLogStream.STDOUT)) == ["hello", "world"]
+    assert spool.read_text(m.DockerLogStream.STDOUT) == "hello\nworld"
+    assert b"".join(spool.iter_chunks(m.DockerLogStream.STDERR, 4)) == b"error\n"
+    spool.close()
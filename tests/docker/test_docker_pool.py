@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+from typing import Dict, List
+
+import pytest
+
+import depobs.docker.containers as containers
+import depobs.docker.pool as m
+
+
+class FakeContainer:
+    def __init__(self, client: "FakeClient", container_id: str):
+        self.client = client
+        self.container_id = container_id
+
+    async def run(self, cmd: str, **kwargs) -> None:
+        self.client.cmds.append((self.container_id, cmd))
+        if cmd.startswith("mkdir") and self.container_id in self.client.broken_ids:
+            raise containers.DockerRunException(f"{cmd} failed")
+
+    async def delete(self, force: bool = False) -> None:
+        self.client.deleted_ids.append(self.container_id)
+
+
+class FakeContainers:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+
+    def container(self, container_id: str, **kwargs) -> FakeContainer:
+        return FakeContainer(self.client, container_id)
+
+
+class FakeClient:
+    def __init__(self):
+        self.containers = FakeContainers(self)
+        self.cmds: List = []
+        self.deleted_ids: List[str] = []
+        self.broken_ids: List[str] = []
+        self.started = 0
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeClient()
+
+    @contextlib.asynccontextmanager
+    async def fake_aiodocker_client():
+        yield client
+
+    async def fake_start(_, repository_tag: str, name: str, cmd: str = None):
+        client.started += 1
+        return {"Id": f"container-{client.started}"}
+
+    monkeypatch.setattr(m, "aiodocker_client", fake_aiodocker_client)
+    monkeypatch.setattr(containers, "start", fake_start)
+    return client
+
+
+async def lease_n_times(pool: m.ContainerPool, n: int, failed: bool = False):
+    working_dirs = []
+    for _ in range(n):
+        async with pool.lease() as lease:
+            working_dirs.append(lease.working_dir)
+            lease.failed = failed
+    return working_dirs
+
+
+@pytest.mark.unit
+def test_container_pool_reuses_containers_with_wiped_working_dirs(fake_client):
+    pool = m.ContainerPool("dep-obs/node-10:latest", 1, 3, "test")
+    working_dirs = asyncio.run(lease_n_times(pool, 4))
+
+    assert len(set(working_dirs)) == 4
+    assert all(wd.startswith("/scans/") for wd in working_dirs)
+    # recycled after 3 uses
+    assert fake_client.started == 2
+    assert fake_client.deleted_ids == ["container-1"]
+    assert ("container-1", f"rm -rf {working_dirs[0]}") in fake_client.cmds
+    assert pool.stats == dict(started=2, leased=4, reused=2, recycled=1)
+    assert [pooled.id for pooled in pool.idle] == ["container-2"]
+
+    asyncio.run(pool.close())
+    assert fake_client.deleted_ids == ["container-1", "container-2"]
+    assert pool.idle == []
+
+
+@pytest.mark.unit
+def test_container_pool_recycles_failed_and_unusable_containers(fake_client):
+    pool = m.ContainerPool("dep-obs/node-10:latest", 1, 3, "test")
+    asyncio.run(lease_n_times(pool, 1, failed=True))
+    assert fake_client.deleted_ids == ["container-1"]
+
+    asyncio.run(lease_n_times(pool, 1))
+    assert [pooled.id for pooled in pool.idle] == ["container-2"]
+    fake_client.broken_ids.append("container-2")
+    asyncio.run(lease_n_times(pool, 1))
+    assert fake_client.deleted_ids == ["container-1", "container-2"]
+    assert [pooled.id for pooled in pool.idle] == ["container-3"]
+
+
+@pytest.mark.unit
+def test_container_pool_lease_recycles_and_reraises_docker_run_exception(fake_client,):
+    pool = m.ContainerPool("dep-obs/node-10:latest", 1, 3, "test")
+
+    async def fail_in_lease():
+        async with pool.lease():
+            raise containers.DockerRunException("command failed")
+
+    # so callers don't treat a failed scan as an empty one
+    with pytest.raises(containers.DockerRunException):
+        asyncio.run(fail_in_lease())
+    assert fake_client.deleted_ids == ["container-1"]
+    assert pool.idle == [] and pool.leased == {}
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import depobs.scanner.csr_graph as m
+from depobs.scanner.graph_traversal import node_dep_ids_bitset_iter
+
+
+def to_csr_graph(g: m.nx.DiGraph) -> m.CSRPackageGraph:
+    return m.CSRPackageGraph(g.nodes, g.edges)
+
+
+@pytest.mark.unit
+def test_csr_node_dep_ids_iter():
+    graph = m.nx.DiGraph([(4, 3), (3, 2), (0, 1), (1, 2), (2, 0)])
+    assert list(m.csr_node_dep_ids_iter(to_csr_graph(graph))) == [
+        (2, {0}, {1}),
+        (1, {2}, {0}),
+        (0, {1}, {2}),
+        (3, {2}, {0, 1}),
+        (4, {3}, {0, 1, 2}),
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.unit
+def test_csr_node_dep_ids_iter_matches_bitset_iter_for_random_graphs(seed):
+    graph = m.nx.gnp_random_graph(30, 0.08, seed=seed, directed=True)
+    assert list(m.csr_node_dep_ids_iter(to_csr_graph(graph))) == list(
+        node_dep_ids_bitset_iter(graph)
+    )
+
+
+@pytest.mark.unit
+def test_csr_node_dep_ids_iter_yields_nothing_for_empty_graph():
+    assert list(m.csr_node_dep_ids_iter(m.CSRPackageGraph([], []))) == []
+
+
+@pytest.mark.unit
+def test_csr_graph_to_networkx():
+    g = m.CSRPackageGraph([10, 30], [(10, 20), (20, 30), (10, 20)], graph_id=5)
+    g.update_node_attrs(label={10: "a@1.0.0", 20: "b@1.0.0"}, missing={40: None})
+
+    assert len(g.nodes) == 3
+    assert len(g.edges) == 2
+    assert list(g.successors(10)) == [20]
+    assert list(g.predecessors(30)) == [20]
+    assert "label" not in g.nodes[30]
+
+    nx_graph = g.to_networkx()
+    assert nx_graph.graph["id"] == 5
+    assert sorted(nx_graph.edges) == [(10, 20), (20, 30)]
+    assert dict(nx_graph.nodes(data=True)) == {
+        10: {"label": "a@1.0.0"},
+        20: {"label": "b@1.0.0"},
+        30: {},
+    }
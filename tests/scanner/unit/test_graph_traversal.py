@@ -4,11 +4,11 @@ from typing import List, Set, Tuple
 
 import pytest
 
+from depobs.scanner.csr_graph import CSRPackageGraph
 import depobs.scanner.graph_traversal as m
 
 
 outer_in_dag_iter_failing_testcases = {
-    "no_nodes_no_edges": m.nx.empty_graph(n=0, create_using=m.nx.DiGraph),
     "self_loop": (m.nx.DiGraph([(0, 0)]), [set([0])],),
     "two_node_loop": m.nx.DiGraph([(0, 1), (1, 0)]),
     "three_node_loop": m.nx.DiGraph([(0, 1), (1, 2), (2, 0)]),
@@ -74,20 +74,19 @@ def test_outer_in_dag_iter(graph, expected_nodes):
     assert len(nodes) == len(expected_nodes)
 
 
-outer_in_graph_iter_failing_testcases = {
-    "no_nodes_no_edges": m.nx.empty_graph(n=0, create_using=m.nx.DiGraph),
-}
-
-
 @pytest.mark.parametrize(
-    "bad_graph, expected_exception",
-    [(g, Exception) for g in outer_in_graph_iter_failing_testcases.values()],
-    ids=outer_in_graph_iter_failing_testcases.keys(),
+    "graph_iter", [m.outer_in_dag_iter, m.outer_in_graph_iter, m.node_dep_ids_iter]
 )
 @pytest.mark.unit
-def test_outer_in_graph_iter_bad_input(bad_graph, expected_exception):
-    with pytest.raises(expected_exception):
-        next(m.outer_in_graph_iter(bad_graph))
+def test_graph_iters_yield_nothing_for_empty_graph(graph_iter):
+    assert list(graph_iter(m.nx.empty_graph(n=0, create_using=m.nx.DiGraph))) == []
+
+
+@pytest.mark.unit
+def test_outer_in_dag_iter_groups_nodes_by_longest_path_to_leaf():
+    # 0 -> 3 is a shortcut around 0 -> 1 -> 2 -> 3
+    graph = m.nx.DiGraph([(0, 1), (1, 2), (2, 3), (0, 3), (4, 3)])
+    assert list(m.outer_in_dag_iter(graph)) == [{3}, {2, 4}, {1}, {0}]
 
 
 graph_iter_testcases = {
@@ -201,6 +200,7 @@ node_dep_ids_iter_testcases = {
 }
 
 
+@pytest.mark.parametrize("engine", m.node_dep_ids_iters.keys())
 @pytest.mark.parametrize(
     "graph, expected_values",
     node_dep_ids_iter_testcases.values(),
@@ -212,8 +212,16 @@ def test_node_dep_ids_iter(
     expected_values: List[
         Tuple[m.nxGraphNodeID, Set[m.nxGraphNodeID], Set[m.nxGraphNodeID]]
     ],
+    engine: str,
 ):
-    vals = list(m.node_dep_ids_iter(graph))
+    if engine == "csr":
+        vals = list(
+            m.node_dep_ids_iters[engine](
+                CSRPackageGraph(graph.nodes, graph.edges), None
+            )
+        )
+    else:
+        vals = list(m.node_dep_ids_iters[engine](graph, None))
 
     # visits all nodes
     assert len(graph.nodes()) == len(vals)
@@ -227,3 +235,24 @@ def test_node_dep_ids_iter(
     # returns expected values
     assert vals == expected_values
     assert len(vals) == len(expected_values)
+
+
+@pytest.mark.unit
+def test_node_dep_ids_bitset_iter_only_includes_reachable_indirect_deps():
+    # 0 and 2 are visited in the same batch but don't share dependencies
+    graph = m.nx.DiGraph([(0, 1), (1, 4), (2, 3), (3, 5)])
+    vals = {node_id: deps for (node_id, *deps) in m.node_dep_ids_bitset_iter(graph)}
+    assert vals[0] == [{1}, {4}]
+    assert vals[2] == [{3}, {5}]
+
+
+@pytest.mark.parametrize(
+    "to_graph", [m.nx.DiGraph, lambda edges: CSRPackageGraph([], edges)]
+)
+@pytest.mark.unit
+def test_node_and_dependent_ids(to_graph):
+    graph = to_graph([(0, 1), (1, 2), (3, 2), (4, 0), (5, 6), (6, 5)])
+    assert m.node_and_dependent_ids(graph, [1, 7]) == {0, 1, 4}
+    assert m.node_and_dependent_ids(graph, [2]) == {0, 1, 2, 3, 4}
+    assert m.node_and_dependent_ids(graph, [6]) == {5, 6}
+    assert m.node_and_dependent_ids(graph, []) == set()
@@ -9,6 +9,7 @@ from typing import Any, Callable, Dict, List, Sequence, Tuple, Union, Optional
 import pytest
 
 import depobs.scanner.models.nodejs as m
+from depobs.util.serialize_util import iter_chunks, iter_json_events
 
 
 def load_json_fixture(path: str) -> Dict[str, Any]:
@@ -134,3 +135,92 @@ def test_flatten_deps_from_fixtures(
             flattened_dep == expected_dep
         ), f"unexpected dep at index {i} got {flattened_dep} expected {expected_dep}"
     assert flattened == expected
+
+
+@pytest.mark.parametrize(
+    "node_js_ls_output_path,expected_json_path",
+    itertools.zip_longest(
+        sorted(
+            (
+                pathlib.Path(__file__).parent
+                / ".."
+                / "fixtures"
+                / "nodejs"
+                / "flatten"
+                / "input"
+            ).glob("*.json")
+        ),
+        sorted(
+            (
+                pathlib.Path(__file__).parent
+                / ".."
+                / "fixtures"
+                / "nodejs"
+                / "flatten"
+                / "output"
+            ).glob("*.json")
+        ),
+    ),
+)
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+@pytest.mark.unit
+def test_flatten_deps_from_json_events_from_fixtures(
+    node_js_ls_output_path: str, expected_json_path: str, chunk_size: int
+):
+    with open(node_js_ls_output_path, "rb") as fin:
+        node_js_ls_output = fin.read()
+    expected = [m.NPMPackage(**item) for item in load_json_fixture(expected_json_path)]
+
+    top_level_fields: Dict[str, Any] = {}
+    flattened = list(
+        m.flatten_deps_from_json_events(
+            iter_json_events(iter_chunks(node_js_ls_output, chunk_size)),
+            top_level_fields,
+        )
+    )
+    assert flattened == expected
+    assert flattened == list(m.flatten_deps(json.loads(node_js_ls_output)))
+    assert top_level_fields["name"] == expected[-1].name
+
+
+@pytest.mark.parametrize(
+    "node_js_ls_output",
+    [
+        pytest.param({}, id="empty_dict"),
+        pytest.param({"dependencies": {}}, id="empty_deps_dict"),
+        pytest.param([], id="empty_list"),
+        pytest.param(
+            {
+                "name": "root",
+                "version": "1.0.0",
+                "dependencies": {
+                    # missing resolved so not a valid node or root dep
+                    "invalid": {
+                        "version": "1.0.0",
+                        "from": "invalid@1.0.0",
+                        "dependencies": {
+                            "valid": {
+                                "version": "2.0.0",
+                                "from": "valid@2.0.0",
+                                "resolved": "https://example.com/valid-2.0.0.tgz",
+                                "_args": [["valid@2.0.0", {"dependencies": {}}]],
+                            },
+                        },
+                    },
+                    "unresolved": "^1.0.0",
+                },
+            },
+            id="valid_dep_of_invalid_dep",
+        ),
+    ],
+)
+@pytest.mark.unit
+def test_flatten_deps_from_json_events_matches_flatten_deps(
+    node_js_ls_output: Union[Dict, List]
+):
+    flattened = list(
+        m.flatten_deps_from_json_events(
+            iter_json_events(iter_chunks(json.dumps(node_js_ls_output), 3))
+        )
+    )
+    assert flattened == list(m.flatten_deps(node_js_ls_output))
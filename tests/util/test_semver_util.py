@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import depobs.util.semver_util as m
+
+
+@pytest.mark.parametrize(
+    "version,expected",
+    [
+        ("1.1.0", m.ParsedSemver(1, 1, 0, "~")),
+        ("=v10.0.1", m.ParsedSemver(10, 0, 1, "~")),
+        ("1.0.0-alpha.1", m.ParsedSemver(1, 0, 0, "1alpha 0011")),
+        ("1.0.0+exp.sha.5114f85", m.ParsedSemver(1, 0, 0, "~")),
+        ("1.0", None),
+        ("latest", None),
+        ("1.0.0-", None),
+        (f"{2 ** 63}.0.0", None),
+        (None, None),
+    ],
+)
+@pytest.mark.unit
+def test_parse_semver(version, expected):
+    assert m.parse_semver(version) == expected
+
+
+@pytest.mark.unit
+def test_parsed_semver_orders_by_semver_precedence():
+    # from https://semver.org/#spec-item-11
+    expected = [
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha.beta",
+        "1.0.0-beta",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "1.0.0",
+        "1.1.0",
+        "1.2.0",
+        "1.10.0",
+    ]
+    assert sorted(reversed(expected), key=m.parse_semver) == expected
+
+
+@pytest.mark.parametrize(
+    "versions, version, expected",
+    [
+        (["1.10.0", "1.0.0"], "1.1.0", "1.0.0"),
+        (["1.0.0", "1.2.0", "1.10.0"], "1.3.0", "1.2.0"),
+        (["0.9.0", "1.5.0"], "1.0.0", "1.5.0"),
+        (["1.0.0", "2.0.0"], "1.5.0", "1.0.0"),
+        (["1.0.0-rc.1", "1.0.1"], "1.0.0", "1.0.0-rc.1"),
+        (["v1.0.0"], "1.0.0", "v1.0.0"),
+        (["latest"], "1.0.0", None),
+        (["1.0.0"], "latest", None),
+    ],
+)
+@pytest.mark.unit
+def test_semver_index_closest(versions, version, expected):
+    assert m.SemverIndex(versions).closest(version) == expected
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import json
+
 import pytest
 
 import depobs.util.serialize_util as m
@@ -32,3 +34,35 @@ def test_get_in(value, path, default, expected):
 def test_get_in_errors(value, path, default, expected_error):
     with pytest.raises(expected_error):
         m.get_in(value, path, default)
+
+
+@pytest.mark.parametrize(
+    "json_str",
+    [
+        "{}",
+        "[]",
+        "-0",
+        "-1.5e3",
+        '"a\\u00e9\\"b"',
+        ' {"a": [1, 2.0, {"b": null, "c": [true, false, []]}], "é": "ü"} ',
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 1 << 16])
+@pytest.mark.parametrize("encode", [False, True])
+@pytest.mark.unit
+def test_iter_json_events_builds_json_loads_value(json_str, chunk_size, encode):
+    events = m.iter_json_events(
+        m.iter_chunks(json_str.encode("utf-8") if encode else json_str, chunk_size)
+    )
+    assert m.build_json_value(*next(events), events) == json.loads(json_str)
+    assert list(events) == []
+
+
+@pytest.mark.parametrize(
+    "json_str", ["", "{", '{"a"}', "[1,]", "[1] 2", "tru", "[1 2]", "[01]", '"abc']
+)
+@pytest.mark.parametrize("chunk_size", [1, 1 << 16])
+@pytest.mark.unit
+def test_iter_json_events_errors(json_str, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(m.iter_json_events(m.iter_chunks(json_str, chunk_size)))
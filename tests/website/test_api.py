@@ -1,3 +1,5 @@
+import datetime
+
 import pytest
 
 
@@ -98,3 +100,164 @@ def test_missing_package_report_for_registered_package_name_initiates_scans_for_
         "/package?package_name=%40hapi%2Fbounce&package_version=1.3.1"
     )
     assert response.status == "202 ACCEPTED"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "package_name=%40hapi%2Fbounce",
+        "package_name=%40hapi%2Fbounce&package_version=2.0.0&depth=0",
+        "package_name=%40hapi%2Fbounce&package_version=2.0.0&depth=1000",
+        "package_name=%40hapi%2Fbounce&package_version=2.0.0&depth=two",
+        "package_name=%40hapi%2Fbounce&package_version=2.0.0&page=0",
+        "package_name=%40hapi%2Fbounce&package_version=2.0.0&per_page=100000",
+    ],
+)
+def test_dependents_invalid_query_params_400(client, query):
+    response = client.get(f"/dependents?{query}")
+    assert response.status == "400 BAD REQUEST"
+
+
+@pytest.mark.parametrize("path", ["/package", "/parents"])
+@pytest.mark.parametrize("depth", ["-1", "1000", "deep"])
+def test_report_tree_invalid_depth_400(client, path, depth):
+    response = client.get(
+        f"{path}?package_name=%40hapi%2Fbounce&package_version=2.0.0&depth={depth}"
+    )
+    assert response.status == "400 BAD REQUEST"
+
+
+def add_package_graph(models, root, links):
+    "Saves a package graph of root and (parent, child) name@version links"
+    package_versions = {root} | {pv for link in links for pv in link}
+    models.bulk_insert_package_graph(
+        dict(
+            command="npm ls --json",
+            root=dict(zip(["name", "version"], root.rsplit("@", 1))),
+            dependencies=[
+                dict(
+                    name=name,
+                    version=version,
+                    dependencies=[child for (parent, child) in links if parent == pv],
+                )
+                for pv in sorted(package_versions)
+                for (name, version) in [pv.rsplit("@", 1)]
+            ],
+        )
+    )
+
+
+def add_dependents_graphs(models):
+    # replaced graph with a link from lib to leaf
+    add_package_graph(
+        models,
+        "dep-obs-internal-app@1.0.0",
+        [
+            ("dep-obs-internal-app@1.0.0", "dep-obs-internal-lib@1.0.0"),
+            ("dep-obs-internal-lib@1.0.0", "dep-obs-internal-leaf@1.0.0"),
+        ],
+    )
+    add_package_graph(
+        models,
+        "dep-obs-internal-app@1.0.0",
+        [("dep-obs-internal-app@1.0.0", "dep-obs-internal-leaf@1.0.0")],
+    )
+    add_package_graph(
+        models,
+        "dep-obs-internal-svc@1.0.0",
+        [
+            ("dep-obs-internal-svc@1.0.0", "dep-obs-internal-mid@1.0.0"),
+            ("dep-obs-internal-mid@1.0.0", "dep-obs-internal-leaf@1.0.0"),
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected_dependents",
+    [
+        (
+            "",
+            [
+                ("dep-obs-internal-app", 1),
+                ("dep-obs-internal-mid", 1),
+                ("dep-obs-internal-svc", 2),
+            ],
+        ),
+        ("&depth=1", [("dep-obs-internal-app", 1), ("dep-obs-internal-mid", 1)],),
+        ("&roots_only=1", [("dep-obs-internal-app", 1), ("dep-obs-internal-svc", 2)],),
+        ("&per_page=1&page=2", [("dep-obs-internal-mid", 1)]),
+    ],
+)
+def test_dependents_only_walks_latest_graphs(
+    models, client, query, expected_dependents
+):
+    add_dependents_graphs(models)
+
+    response = client.get(
+        f"/dependents?package_name=dep-obs-internal-leaf&package_version=1.0.0{query}"
+    )
+    assert response.status == "200 OK"
+    assert [
+        (dependent["package"], dependent["depth"])
+        for dependent in response.json["dependents"]
+    ] == expected_dependents
+    assert all(
+        dependent["version"] == "1.0.0" for dependent in response.json["dependents"]
+    )
+
+
+def add_report_chain(models, package_names):
+    "Saves scanned reports where each package depends on the next"
+    for package_name in package_names:
+        delete_reports(models, package_name, "0.0.1")
+    reports = [
+        models.PackageReport(
+            package=package_name,
+            version="0.0.1",
+            status="scanned",
+            scoring_date=datetime.datetime.now(),
+        )
+        for package_name in package_names
+    ]
+    for report, dependency in zip(reports, reports[1:]):
+        report.dependencies.append(dependency)
+    models.db.session.add_all(reports)
+    models.db.session.commit()
+
+
+def report_tree_packages(report_json, relation):
+    "Returns a list of package names from the report tree depth first"
+    return [report_json["package"]] + [
+        package
+        for related in report_json[relation]
+        for package in report_tree_packages(related, relation)
+    ]
+
+
+@pytest.mark.parametrize(
+    "path, package_name, relation",
+    [
+        ("/package", "dep-obs-internal-tree-a", "dependencies"),
+        ("/parents", "dep-obs-internal-tree-c", "parents"),
+    ],
+)
+@pytest.mark.parametrize(
+    "depth, expected_tree_size", [("", 2), ("&depth=0", 1), ("&depth=2", 3)]
+)
+def test_report_tree_depth(
+    models, client, path, package_name, relation, depth, expected_tree_size
+):
+    chain = [
+        "dep-obs-internal-tree-a",
+        "dep-obs-internal-tree-b",
+        "dep-obs-internal-tree-c",
+    ]
+    add_report_chain(models, chain)
+    if relation == "parents":
+        chain.reverse()
+
+    response = client.get(
+        f"{path}?package_name={package_name}&package_version=0.0.1{depth}"
+    )
+    assert response.status == "200 OK"
+    assert report_tree_packages(response.json, relation) == chain[:expected_tree_size]
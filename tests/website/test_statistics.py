@@ -0,0 +1,76 @@
+import pytest
+
+from depobs.website.statistics import StatisticsCache
+
+
+@pytest.mark.unit
+def test_statistics_cache_refreshes_exact_then_estimated_counts(mocker):
+    exact = mocker.patch(
+        "depobs.database.models.get_statistics",
+        return_value=dict(package_versions=3, advisories=2, reports=1),
+    )
+    estimated = mocker.patch(
+        "depobs.database.models.get_estimated_statistics",
+        return_value=dict(package_versions=4, advisories=2, reports=1),
+    )
+    monotonic = mocker.patch("depobs.website.statistics.time.monotonic")
+
+    cache = StatisticsCache(cache_seconds=60, exact_refresh_seconds=3600)
+    monotonic.return_value = 0
+    assert cache.get() == dict(package_versions=3, advisories=2, reports=1)
+    monotonic.return_value = 30
+    assert cache.get()["package_versions"] == 3
+    assert exact.call_count == 1
+    assert estimated.call_count == 0
+
+    monotonic.return_value = 90
+    assert cache.get()["package_versions"] == 4
+    assert estimated.call_count == 1
+
+    monotonic.return_value = 3600
+    assert cache.get()["package_versions"] == 3
+    assert exact.call_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("reltuples", [-1, 0])
+def test_estimated_statistics_falls_back_to_exact_counts_for_unanalyzed_tables(
+    models, mocker, reltuples
+):
+    exact = mocker.patch.object(
+        models,
+        "get_statistics",
+        return_value=dict(package_versions=3, advisories=2, reports=1),
+    )
+    execute = mocker.patch.object(models.db.session, "execute")
+    execute.return_value.fetchall.return_value = [
+        ("package_versions", 10),
+        ("advisories", reltuples),
+        ("reports", 10),
+    ]
+
+    assert models.get_estimated_statistics() == exact.return_value
+
+
+def test_estimated_statistics_reads_analyzed_table_row_counts(models, mocker):
+    name = "dep-obs-internal-statistics"
+    models.Advisory.query.filter_by(package_name=name).delete()
+    models.PackageVersion.query.filter_by(name=name).delete()
+    models.PackageReport.query.filter_by(package=name).delete()
+    models.db.session.add_all(
+        [
+            models.Advisory(package_name=name, language="node", url=name),
+            models.PackageVersion(name=name, version="0.0.1", language="node"),
+            models.PackageReport(package=name, version="0.0.1"),
+        ]
+    )
+    models.db.session.commit()
+    for table_name in ["package_versions", "advisories", "reports"]:
+        models.db.session.execute(f"ANALYZE {table_name}")
+    exact = models.get_statistics()
+    mocker.patch.object(models, "get_statistics", side_effect=AssertionError)
+
+    estimated = models.get_estimated_statistics()
+
+    assert estimated["advisories"] == exact["advisories"]
+    assert estimated["reports"] == exact["reports"]
@@ -155,6 +155,36 @@ score_package_component_testcases = {
         [m.NPMSIOScoreComponent],
         {"npmsio_score": 1.0, "npmsio_scored_package_version": "10.0.0"},
     ],
+    "npmsio_score_closest_semver_minor_version_match": [
+        create_single_node_digraph_with_attrs(
+            {"npmsio_score": ("1.1.0", {"1.10.0": 0.9, "1.0.0": 0.4})}
+        ),
+        0,
+        [m.NPMSIOScoreComponent],
+        {"npmsio_score": 0.4, "npmsio_scored_package_version": "1.0.0"},
+    ],
+    "npmsio_score_closest_semver_with_prebuilt_index": [
+        create_single_node_digraph_with_attrs(
+            {
+                "npmsio_score": (
+                    "2.9.0",
+                    {"1.9.0": 0.9, "2.10.0": 0.4, "3.0.0": 0.1},
+                    m.SemverIndex(["1.9.0", "2.10.0", "3.0.0"]),
+                )
+            }
+        ),
+        0,
+        [m.NPMSIOScoreComponent],
+        {"npmsio_score": 0.4, "npmsio_scored_package_version": "2.10.0"},
+    ],
+    "npmsio_score_common_prefix_match_for_invalid_semver": [
+        create_single_node_digraph_with_attrs(
+            {"npmsio_score": ("0.1", {"0.1.3": 0.34, "1.0.0": 0.9})}
+        ),
+        0,
+        [m.NPMSIOScoreComponent],
+        {"npmsio_score": 0.34, "npmsio_scored_package_version": "0.1.3"},
+    ],
     "null_npm_reg": [
         create_single_node_digraph_with_attrs({"registry_entry": None}),
         0,
@@ -540,6 +570,7 @@ score_package_graph_testcases = {
 }
 
 
+@pytest.mark.parametrize("traversal_engine", ["networkx", "bitset", "csr"])
 @pytest.mark.parametrize(
     "db_graph, expected_package_reports_with_deps_json",
     score_package_graph_testcases.values(),
@@ -549,6 +580,7 @@ score_package_graph_testcases = {
 def test_score_package_graph(
     db_graph: m.PackageGraph,
     expected_package_reports_with_deps_json: List[Dict[str, Any]],
+    traversal_engine: str,
     mocker,
 ):
     dt_mock = mocker.patch("depobs.worker.scoring.datetime")
@@ -557,7 +589,9 @@ def test_score_package_graph(
         for dep in r.get("dependencies", []):
             dep["scoring_date"] = dt_mock.now()
 
-    reports = list(m.score_package_graph(db_graph).values())
+    reports = list(
+        m.score_package_graph(db_graph, traversal_engine=traversal_engine).values()
+    )
 
     # one report per node
     assert (
@@ -573,6 +607,229 @@ def test_score_package_graph(
         assert report.json_with_dependencies() == expected_report_json
 
 
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.unit
+def test_advisory_score_component_dedupes_dep_advisories_by_id(vectorized):
+    shared_advisory = m.Advisory(id=1, severity="high")
+    g = create_digraph(
+        nodes=[
+            (0, {"advisories": []}),
+            (1, {"advisories": [shared_advisory, m.Advisory(severity="low")]}),
+            (2, {"advisories": [m.Advisory(id=1, severity="high")]}),
+        ],
+        edges=[(0, 1), (0, 2), (1, 2)],
+    )
+    dep_ids_by_node_id = {2: (set(), set()), 1: ({2}, set()), 0: ({1, 2}, set())}
+    if vectorized:
+        updates = m.AdvisoryScoreComponent.get_package_report_updates_by_node_id(
+            m.AdvisoryScoreComponent, g, dep_ids_by_node_id
+        )
+    else:
+        updates = m.ScoreComponent.get_package_report_updates_by_node_id(
+            m.AdvisoryScoreComponent, g, dep_ids_by_node_id
+        )
+
+    assert updates[0]["indirectVulnsHigh_score"] == 1
+    assert updates[0]["indirectVulnsLow_score"] == 1
+    assert updates[1]["directVulnsHigh_score"] == 1
+    assert updates[1]["indirectVulnsHigh_score"] == 1
+    assert updates[2]["directVulnsHigh_score"] == 1
+    assert updates[2]["indirectVulnsHigh_score"] == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(traversal_engine="csr", nx_graph=create_digraph(nodes=[(0, {})])),
+        dict(traversal_engine="igraph"),
+        dict(traversal_engine="networkx", report_cache=m.ScoredReportCache()),
+    ],
+)
+@pytest.mark.unit
+def test_score_package_graph_rejects_unsupported_traversal_engine_args(kwargs):
+    with pytest.raises(ValueError):
+        m.score_package_graph(m.PackageGraph(id=-1), **kwargs)
+
+
+@pytest.mark.parametrize("traversal_engine", ["networkx", "bitset", "csr"])
+@pytest.mark.unit
+def test_rescore_package_graph_reuses_unaffected_dependency_reports(traversal_engine):
+    # 0 -> 1 -> 2 and 0 -> 3 with a new score for 1
+    db_graph = m.PackageGraph(
+        id=-1,
+        root_package_version_id=0,
+        package_links_by_id={0: (0, 1), 1: (1, 2), 2: (0, 3)},
+        distinct_package_versions_by_id={
+            0: m.PackageVersion(id=0, name="test-root-pkg", version="0.1.0"),
+            1: m.PackageVersion(id=1, name="test-child-pkg", version="0.0.3"),
+            2: m.PackageVersion(id=2, name="test-grandchild-pkg", version="2.1.0"),
+            3: m.PackageVersion(id=3, name="test-other-child-pkg", version="1.0.0"),
+        },
+        get_npmsio_scores_by_package_version_id=lambda: {
+            0: ("0.1.0", {}),
+            1: ("0.0.3", {"0.0.3": 0.9}),
+            2: ("2.1.0", {}),
+            3: ("1.0.0", {}),
+        },
+        get_npm_registry_data_by_package_version_id=lambda: {
+            0: None,
+            1: None,
+            2: None,
+            3: None,
+        },
+        get_advisories_by_package_version_id=lambda: {
+            0: [],
+            1: [],
+            2: [m.Advisory(id=1, severity="high")],
+            3: [],
+        },
+    )
+    # reports from the graph's last scoring
+    saved_reports = {
+        0: m.PackageReport(package="test-root-pkg", version="0.1.0"),
+        1: m.PackageReport(package="test-child-pkg", version="0.0.3"),
+        2: m.PackageReport(package="test-grandchild-pkg", version="2.1.0"),
+        3: m.PackageReport(package="test-other-child-pkg", version="1.0.0"),
+    }
+
+    def get_reusable_reports(graph):
+        assert graph is db_graph
+        return saved_reports
+
+    reports = m.rescore_package_graph(
+        db_graph,
+        [1],
+        traversal_engine=traversal_engine,
+        get_reusable_reports=get_reusable_reports,
+    )
+
+    assert set(reports.keys()) == {0, 1}
+    assert reports[1].npmsio_score == 0.9
+    assert reports[1].indirectVulnsHigh_score == 1
+    assert reports[1].dependencies == [saved_reports[2]]
+    assert reports[0].all_deps == 3
+    assert reports[0].indirectVulnsHigh_score == 1
+    assert sorted(reports[0].dependencies, key=lambda r: r.package) == [
+        reports[1],
+        saved_reports[3],
+    ]
+
+    # unaffected graphs, unscored graphs, and graphs with unaffected deps
+    # not scored with the graph aren't rescored
+    assert (
+        m.rescore_package_graph(
+            db_graph, [4], get_reusable_reports=get_reusable_reports
+        )
+        == {}
+    )
+    assert (
+        m.rescore_package_graph(db_graph, [1], get_reusable_reports=lambda graph: {})
+        == {}
+    )
+    assert (
+        m.rescore_package_graph(
+            db_graph,
+            [1],
+            get_reusable_reports=lambda graph: {
+                node_id: report
+                for node_id, report in saved_reports.items()
+                if node_id != 3
+            },
+        )
+        == {}
+    )
+
+
+@pytest.mark.parametrize("traversal_engine", ["bitset", "csr"])
+@pytest.mark.unit
+def test_score_package_graph_reuses_cached_reports_for_same_subtrees(
+    traversal_engine, monkeypatch
+):
+    if traversal_engine == "csr":
+        # fingerprints use the SCCs found traversing the CSR graph
+        monkeypatch.setattr(m.nx.algorithms.components, "condensation", None)
+
+    def create_graph(root_id: int, child_advisories: List[m.Advisory]):
+        # root -> 1 -> 2
+        return m.PackageGraph(
+            id=-1,
+            root_package_version_id=root_id,
+            package_links_by_id={0: (root_id, 1), 1: (1, 2)},
+            distinct_package_versions_by_id={
+                root_id: m.PackageVersion(id=root_id, name="root", version="0.1.0"),
+                1: m.PackageVersion(id=1, name="child", version="0.0.3"),
+                2: m.PackageVersion(id=2, name="grandchild", version="2.1.0"),
+            },
+            get_npmsio_scores_by_package_version_id=lambda: {
+                root_id: ("0.1.0", {}),
+                1: ("0.0.3", {}),
+                2: ("2.1.0", {}),
+            },
+            get_npm_registry_data_by_package_version_id=lambda: {
+                root_id: None,
+                1: None,
+                2: None,
+            },
+            get_advisories_by_package_version_id=lambda: {
+                root_id: [],
+                1: child_advisories,
+                2: [],
+            },
+        )
+
+    report_cache = m.ScoredReportCache()
+    first_reports = m.score_package_graph(
+        create_graph(0, []),
+        traversal_engine=traversal_engine,
+        report_cache=report_cache,
+    )
+    assert report_cache.hits == 0
+
+    # the same subtrees of another root reuse the child and grandchild reports
+    second_reports = m.score_package_graph(
+        create_graph(3, []),
+        traversal_engine=traversal_engine,
+        report_cache=report_cache,
+    )
+    assert report_cache.hits == 2
+    assert second_reports[1] is first_reports[1]
+    assert second_reports[2] is first_reports[2]
+    assert second_reports[3].dependencies == [first_reports[1]]
+
+    # the same root is rescored and a changed child changes its fingerprint
+    third_reports = m.score_package_graph(
+        create_graph(0, [m.Advisory(id=1, severity="high")]),
+        traversal_engine=traversal_engine,
+        report_cache=report_cache,
+    )
+    assert third_reports[2] is first_reports[2]
+    assert third_reports[1] is not first_reports[1]
+    assert third_reports[0] is not first_reports[0]
+    assert third_reports[0].indirectVulnsHigh_score == 1
+    assert third_reports[1].dependencies == [first_reports[2]]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.unit
+def test_score_package_graph_records_stats(vectorized):
+    db_graph = score_package_graph_testcases["three_node_path_graph"][0]
+    stats = m.ScoringStats(graph_id=db_graph.id)
+    m.score_package_graph(db_graph, vectorized=vectorized, stats=stats, profile=True)
+
+    assert list(stats.phases.keys()) == ["hydrate", "traverse", "score", "link"]
+    assert all(timing.calls == 1 for timing in stats.phases.values())
+    assert stats.phases["score"].nodes == 3
+    assert stats.components["AdvisoryScoreComponent"]["hydrate"].calls == 1
+    assert "hydrate" not in stats.components["DependencyCountScoreComponent"]
+    assert stats.components["DependencyCountScoreComponent"]["score"].calls == (
+        1 if vectorized else 3
+    )
+    assert stats.components["DependencyCountScoreComponent"]["score"].nodes == 3
+    assert "score_package_graph" in stats.profile
+    assert stats.to_dict()["phases"]["link"]["nodes"] == 3
+    assert stats.summary().startswith("scoring stats for graph id=-1: hydrate=")
+
+
 count_advisories_by_severity_testcases = {
     "none": ([], m.Counter()),
     "empty_str_ignored": ([m.Advisory(severity=""),], m.Counter(),),
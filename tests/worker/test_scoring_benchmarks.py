@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import networkx as nx
+import pytest
+
+import depobs.worker.scoring_benchmarks as m
+
+
+@pytest.mark.unit
+def test_generate_links_reaches_every_node_from_the_root_with_cycles():
+    spec = m.SyntheticGraphSpec(
+        "test", node_count=100, depth=5, fan_out=3, scc_count=4, scc_size=5
+    )
+    g = nx.DiGraph(m.generate_links(spec))
+    assert set(g.nodes) == set(range(100))
+    assert nx.descendants(g, 0) == set(range(1, 100))
+    assert any(len(scc) >= 5 for scc in nx.strongly_connected_components(g))
+    # deterministic for a seed
+    assert m.generate_links(spec) == m.generate_links(spec)
+
+
+@pytest.mark.unit
+def test_generate_package_graph_advisory_density():
+    db_graph = m.generate_package_graph(
+        m.SyntheticGraphSpec(
+            "test", node_count=200, depth=4, fan_out=2, advisory_density=0.5
+        )
+    )
+    assert len(db_graph.distinct_package_ids) == 200
+    advisory_count = sum(
+        len(advisories)
+        for advisories in db_graph.get_advisories_by_package_version_id().values()
+    )
+    assert 50 < advisory_count < 150
+
+
+@pytest.mark.unit
+def test_run_benchmarks_and_compare_results():
+    spec = m.SyntheticGraphSpec(
+        "test", node_count=20, depth=3, fan_out=2, scc_count=1, scc_size=3
+    )
+    results = json.loads(json.dumps(m.run_benchmarks([spec], repeat=1)))
+
+    timings = results["cases"]["test"]["timings"]
+    for engine in ["networkx", "bitset", "csr"]:
+        assert f"traverse.{engine}" in timings
+        assert f"score.{engine}" in timings
+        assert f"score.{engine}.hydrate" in timings
+        assert f"score.{engine}.AdvisoryScoreComponent.score" in timings
+    assert m.compare_results(results, results) == []
+
+    slower = json.loads(json.dumps(results))
+    for timing in slower["cases"]["test"]["timings"].values():
+        timing["min"] = timing["min"] * 2 + 1
+    assert len(m.compare_results(results, slower)) == len(timings)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from depobs.docker.log_reader import DockerLogSpool, DockerLogStream
+import depobs.worker.serializers as m
+
+
+npm_list_output = {
+    "name": "root",
+    "version": "1.0.0",
+    "problems": ["missing: foo@1.0.0"],
+    "dependencies": {
+        "dep": {
+            "version": "2.0.0",
+            "from": "dep@2.0.0",
+            "resolved": "https://registry.npmjs.org/dep/-/dep-2.0.0.tgz",
+        }
+    },
+}
+
+
+@pytest.mark.parametrize("spool_max_size", [None, 16])
+@pytest.mark.unit
+def test_parse_npm_task_list_metadata_from_output_spool_matches_stdout(spool_max_size,):
+    stdout = json.dumps(npm_list_output)
+    spool = DockerLogSpool(spool_max_size)
+    spool.write(DockerLogStream.STDOUT, stdout.encode("utf-8") + b"\n")
+
+    from_spool = m.parse_npm_task("list_metadata", {"output": spool})
+    assert from_spool == m.parse_npm_task("list_metadata", {"stdout": stdout})
+    assert from_spool == m.parse_npm_list(npm_list_output)
+    assert from_spool["dependencies_count"] == 2
+    assert from_spool["problems_count"] == 1
+    spool.close()
+
+
+@pytest.mark.unit
+def test_parse_npm_task_list_metadata_non_json_stdout():
+    assert m.parse_npm_task("list_metadata", {"stdout": "npm ERR!"}) is None
+    assert m.parse_npm_task("list_metadata", {}) is None